@@ -0,0 +1,570 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+これで送迎 - ベンチマークスクリプト
+
+合成データを使って距離行列の計算、ルート最適化、エクスポート、
+データの読み書き、1年分の週間計画の保存、Excel / CSV / JSON Linesの入出力の処理時間を計測し、
+結果をJSONに出力する。
+
+使い方:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 10 50 --repeat 5
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/前回の結果.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import threading
+import tracemalloc
+import types
+import urllib.request
+
+# ルートディレクトリと src ディレクトリをPATHに追加（run.py と同じ構成）
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "src"), os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from synthetic import generate_roster, generate_routes, generate_dated_routes
+from distance_provider import FakeDistanceProvider
+from data_store import DataStore
+from startup import measure_startup
+from models import Route
+from route_table import RouteTable
+from excel_import import import_excel
+from bulk_io import export_file, import_file
+from planner import DatePlanner
+from geocode_cache import GeocodeCache
+from route_geometry import RouteGeometryStore
+from search_index import SearchIndex
+from local_search import plan_cost, solve as local_search_solve
+from repair import repair_routes
+from distance_store import DistanceStore, DistanceTable
+from multi_facility import Facility, MultiFacilityPlanner
+from plan_service import PlanService, make_server
+from scenarios import scenario_grid, run_scenarios
+
+DEFAULT_SIZES = [10, 50, 200, 1000]
+ARCHIVE_WEEKS = 52  # 1年分の週間計画
+MONTH_WEEKS = 4  # 1か月分の計画
+DEFAULT_IMPORT_ROWS = 10000  # Excelインポートの行数
+FACILITY_COUNTS = [1, 2, 4]  # 複数施設の計画で比較する施設の数
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+def measure(func, repeat, setup=None):
+    """func を repeat 回実行し、各回の経過時間（秒）のリストを返す"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(name, n_users, timings, **extra):
+    """計測結果を1件のレコードにまとめる"""
+    record = {
+        "benchmark": name,
+        "users": n_users,
+        "repeat": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "max_s": max(timings),
+    }
+    record.update(extra)
+    return record
+
+def measure_memory(func):
+    """func の戻り値が保持しているメモリ量（バイト）を tracemalloc で計測し、(戻り値, バイト数) を返す"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+def measure_peak(func):
+    """func の実行中に確保されたメモリの最大量（バイト）を tracemalloc で計測"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def git_revision():
+    """計測対象のコミット（取得できない場合はNone）"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_size(n_users, repeat, seed, work_dir):
+    """指定した利用者数でベンチマークを実行"""
+    from src.optimizer import TransportOptimizer
+    from ui.export_manager import ExportManager
+    from ui.map_view import MapView
+
+    roster = generate_roster(n_users, seed=seed)
+    settings = roster["settings"]
+    provider = FakeDistanceProvider(roster["coordinates"])
+    cache_file = os.path.join(work_dir, f"distance_cache_{n_users}.json")
+    results = []
+
+    def new_optimizer(use_local_search=True):
+        return TransportOptimizer("", settings["facility_address"], distance_provider=provider,
+                                  cache_file=cache_file, use_local_search=use_local_search)
+
+    def clear_cache():
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+    # 距離行列（キャッシュなし）
+    users = roster["users"]
+    provider.call_count = 0
+    timings = measure(lambda: new_optimizer().calculate_distance_matrix(users), repeat, setup=clear_cache)
+    results.append(summarize("calculate_distance_matrix_cold", n_users, timings,
+                             provider_calls=provider.call_count // repeat))
+
+    # 距離行列（キャッシュあり）
+    new_optimizer().calculate_distance_matrix(users)
+    timings = measure(lambda: new_optimizer().calculate_distance_matrix(users), repeat)
+    results.append(summarize("calculate_distance_matrix_warm", n_users, timings))
+
+    # ルート最適化（月曜日の朝と夕方、キャッシュあり）
+    day = settings["workdays"][0]
+    day_users = [u for u in users if day in u.attendance_days]
+
+    def optimize_day():
+        optimizer = new_optimizer()
+        routes = optimizer.optimize_routes(day_users, roster["vehicles"], roster["staff"], day, is_morning=True)
+        routes += optimizer.optimize_routes(day_users, roster["vehicles"], roster["staff"], day, is_morning=False)
+        return routes
+
+    timings = measure(optimize_day, repeat)
+    results.append(summarize("optimize_routes_day", n_users, timings, day_users=len(day_users)))
+
+    # OR-Toolsだけ（車両ごとに解く）と、車両間の局所探索で改善した場合の比較（月曜日の朝）
+    def optimize_morning(use_local_search):
+        optimizer = new_optimizer(use_local_search)
+        optimizer.optimize_routes(day_users, roster["vehicles"], roster["staff"], day, is_morning=True)
+        return optimizer.subproblems[-1]
+
+    for name, use_local_search in (("optimize_routes_ortools_only", False), ("optimize_routes_local_search", True)):
+        timings = measure(lambda: optimize_morning(use_local_search), repeat)
+        subproblem = optimize_morning(use_local_search)
+        results.append(summarize(name, n_users, timings, objective=subproblem["objective"],
+                                 unserved_users=subproblem["unserved_users"]))
+
+    # 同じ住所の利用者が3割いる場合に、1つの停車地点にまとめるかどうかの比較（月曜日の朝と夕方、キャッシュなし）
+    colocated = generate_roster(n_users, seed=seed, shared_address_ratio=0.3)
+    colocated_users = [u for u in colocated["users"] if day in u.attendance_days]
+    for name, merge in (("optimize_routes_colocated_separate", False), ("optimize_routes_colocated_merged", True)):
+        colocated_provider = FakeDistanceProvider(colocated["coordinates"])
+
+        def optimize_colocated():
+            optimizer = TransportOptimizer("", settings["facility_address"], distance_provider=colocated_provider,
+                                           distance_store=DistanceStore(colocated_provider),
+                                           merge_same_address=merge)
+            for is_morning in (True, False):
+                optimizer.optimize_routes(colocated_users, colocated["vehicles"], colocated["staff"], day, is_morning)
+            return optimizer
+
+        timings = measure(optimize_colocated, repeat)
+        optimizer = optimize_colocated()
+        results.append(summarize(name, n_users, timings, day_users=len(colocated_users),
+                                 matrix_nodes=len(optimizer.distance_matrix), api_calls=optimizer.stats["api_calls"],
+                                 objective=sum(p["objective"] for p in optimizer.subproblems),
+                                 unserved_users=sum(p["unserved_users"] for p in optimizer.subproblems)))
+
+    # 当日のキャンセル（月曜日の朝のルートから、乗車する利用者の5%をキャンセル）
+    repair_optimizer = new_optimizer()
+    morning_routes = repair_optimizer.optimize_routes(day_users, roster["vehicles"], roster["staff"], day, is_morning=True)
+    riders = [stop.user.id for route in morning_routes for stop in route.stops if stop.user]
+    cancelled = riders[::20]
+    timings = measure(lambda: repair_routes(repair_optimizer, morning_routes, cancelled), repeat)
+    repaired = repair_routes(repair_optimizer, morning_routes, cancelled)
+    results.append(summarize("repair_routes_day", n_users, timings, riders=len(riders), cancelled=len(cancelled),
+                             moved=len(repaired.moved), before=repaired.before, after=repaired.after))
+
+    # OR-Toolsを使わない局所探索だけの解法（運転できる職員の数だけの車両を使う）
+    matrix = new_optimizer().calculate_distance_matrix(day_users)
+    drivers = sum(1 for s in roster["staff"] if s.can_drive and day in s.workdays)
+    capacities = [v.capacity for v in roster["vehicles"][:drivers]]
+    timings = measure(lambda: local_search_solve(matrix, capacities), repeat)
+    solved_routes, unassigned = local_search_solve(matrix, capacities)
+    results.append(summarize("local_search_solve", n_users, timings, objective=plan_cost(matrix, solved_routes),
+                             unserved_users=len(unassigned)))
+
+    # 日付ごとの計画（1週間と、同じ入力の週を再利用する4週間）
+    start_date = datetime.date(2024, 1, 1)
+    for name, weeks in (("plan_dates_week", 1), ("plan_dates_month", MONTH_WEEKS)):
+        end_date = start_date + datetime.timedelta(weeks=weeks, days=-1)
+
+        def plan_dates():
+            planner = DatePlanner(new_optimizer(), users, roster["vehicles"], roster["staff"], settings["workdays"])
+            return planner.plan(start_date, end_date)
+
+        timings = measure(plan_dates, repeat)
+        plan = plan_dates()
+        results.append(summarize(name, n_users, timings, dates=len(plan.dates),
+                                 solved=plan.solved, reused=plan.reused))
+
+    # 複数施設の計画（月曜日）。利用者を施設に振り分け、4人に1人は複数の施設に通うものとする。
+    # 施設ごとに別のキャッシュで計画する場合と、DistanceStore を共有して並行に計画する場合を比べる
+    for k in FACILITY_COUNTS:
+        facilities = [
+            Facility(f"施設{i + 1}", f"東京都豊島区東池袋{i + 1}-1-1",
+                     [u for n, u in enumerate(users) if n % k == i or n % 4 == 0],
+                     roster["staff"], roster["vehicles"], workdays=[day])
+            for i in range(k)
+        ]
+        for name, shared in (("multi_facility_separate", False), ("multi_facility_shared", True)):
+            api_calls = []
+
+            def plan_facilities():
+                if shared:
+                    store = DistanceStore(provider)
+                    result = MultiFacilityPlanner(facilities, store).plan()
+                else:
+                    result = None
+                    for facility in facilities:
+                        store = DistanceStore(provider)
+                        result = MultiFacilityPlanner([facility], store, max_workers=1).plan()
+                        api_calls.append(store.stats["api_calls"])
+                    return result
+                api_calls.append(store.stats["api_calls"])
+                return result
+
+            timings = measure(plan_facilities, repeat)
+            results.append(summarize(f"{name}_{k}", n_users, timings, facilities=k,
+                                     api_calls=sum(api_calls) // repeat))
+
+    # 計画サービス（HTTPで月曜日の計画を依頼して、結果を取得するまで。2回目は入力のハッシュで結果を再利用する）
+    service = PlanService(DistanceStore(provider), workers=2)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    payload = {
+        "users": [u.to_dict() for u in users],
+        "staff": [s.to_dict() for s in roster["staff"]],
+        "vehicles": [v.to_dict() for v in roster["vehicles"]],
+        "settings": settings,
+        "days": [day],
+    }
+
+    def request_plan():
+        request = urllib.request.Request(base_url + "/jobs", data=json.dumps(payload).encode("utf-8"), method="POST")
+        with urllib.request.urlopen(request) as response:
+            location = response.headers["Location"]
+        while True:
+            with urllib.request.urlopen(base_url + location) as response:
+                status = json.loads(response.read())["status"]
+            if status in ("done", "failed"):
+                break
+            time.sleep(0.01)
+        with urllib.request.urlopen(base_url + location + "/result") as response:
+            return json.loads(response.read())
+
+    try:
+        timings = measure(request_plan, 1)
+        result = request_plan()
+        results.append(summarize("plan_service_job", n_users, timings, routes=result["route_count"]))
+        timings = measure(request_plan, repeat)
+        results.append(summarize("plan_service_cached", n_users, timings))
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+    # 車両・ドライバーの数を変えた8つのシナリオ（月曜日）。距離行列は1回だけ計算して全シナリオで共有する
+    table = DistanceTable.build(DistanceStore(provider), [settings["facility_address"]] + [u.address for u in users])
+    n_vehicles = len(roster["vehicles"])
+    scenarios = scenario_grid([max(1, n_vehicles - 2), n_vehicles - 1, n_vehicles, n_vehicles + 1], [0, -1])
+    for name, workers in (("scenario_sweep_serial", 1), ("scenario_sweep_parallel", None)):
+        timings = measure(lambda: run_scenarios(scenarios, table, settings["facility_address"], users,
+                                                roster["staff"], roster["vehicles"], [day], workers=workers), repeat)
+        results.append(summarize(name, n_users, timings, scenarios=len(scenarios), cpus=os.cpu_count()))
+
+    # エクスポート（1週間分のルート）
+    routes = generate_routes(roster)
+    app = types.SimpleNamespace(
+        settings=settings,
+        staff_list=roster["staff"],
+        user_list=users,
+        vehicle_list=roster["vehicles"],
+    )
+    export_manager = ExportManager(app)
+    export_manager.export_dir = work_dir
+
+    timings = measure(lambda: export_manager.export_to_excel(routes), repeat)
+    results.append(summarize("export_to_excel", n_users, timings, routes=len(routes),
+                             peak_memory_bytes=measure_peak(lambda: export_manager.export_to_excel(routes))))
+
+    # エクスポート（1か月分の日付ごとのルート）
+    month_routes = generate_dated_routes(roster, MONTH_WEEKS)
+    timings = measure(lambda: export_manager.export_to_excel(month_routes), repeat)
+    results.append(summarize("export_to_excel_month", n_users, timings, routes=len(month_routes),
+                             peak_memory_bytes=measure_peak(lambda: export_manager.export_to_excel(month_routes))))
+
+    timings = measure(lambda: export_manager.export_to_text(routes), repeat)
+    results.append(summarize("export_to_text", n_users, timings, routes=len(routes)))
+
+    # 1日の地図（1週間分をまとめて作成。座標はキャッシュ済み）
+    map_view = MapView(settings["facility_address"])
+    map_view.html_dir = work_dir
+    geocoder = GeocodeCache(provider, os.path.join(work_dir, f"geocode_cache_{n_users}.json"))
+    geocoder.lookup([settings["facility_address"]] + [u.address for u in users])
+    timings = measure(lambda: map_view.create_overview_maps(routes, geocoder), repeat)
+    results.append(summarize("overview_maps_week", n_users, timings, routes=len(routes)))
+
+    # 区間の経路の取得（1週間分、キャッシュなし）
+    geometry_file = os.path.join(work_dir, f"route_geometry_{n_users}.json")
+
+    def clear_geometry():
+        if os.path.exists(geometry_file):
+            os.remove(geometry_file)
+
+    def fill_geometry():
+        return RouteGeometryStore(provider, geometry_file).fill(routes, settings["facility_address"])
+
+    timings = measure(fill_geometry, repeat, setup=clear_geometry)
+    results.append(summarize("route_geometry_fill_week", n_users, timings,
+                             legs=len(RouteGeometryStore(None, geometry_file).polylines)))
+
+    timings = measure(lambda: export_manager.export_to_text(month_routes), repeat)
+    results.append(summarize("export_to_text_month", n_users, timings, routes=len(month_routes),
+                             peak_memory_bytes=measure_peak(lambda: export_manager.export_to_text(month_routes))))
+
+    timings = measure(lambda: export_manager.export_data_to_excel("user"), repeat)
+    results.append(summarize("export_data_to_excel_user", n_users, timings))
+
+    # データの保存・読み込み
+    store = DataStore(os.path.join(work_dir, f"data_{n_users}"), background=False)
+    timings = measure(lambda: store.save_all(roster["staff"], users, roster["vehicles"], settings), repeat)
+    results.append(summarize("data_save_all", n_users, timings))
+
+    def load_all():
+        store.load_staff()
+        store.load_users()
+        store.load_vehicles()
+        store.load_settings()
+
+    timings = measure(load_all, repeat)
+    results.append(summarize("data_load_all", n_users, timings))
+
+    # 利用者の検索（名前・住所の索引の作成と、名前の一部での検索）
+    def build_index():
+        index = SearchIndex()
+        for user in users:
+            index.add(user.id, user.name, user.address)
+        return index
+
+    timings = measure(build_index, repeat)
+    results.append(summarize("search_index_build_user", n_users, timings))
+
+    index = build_index()
+    queries = [user.name[1:3] for user in users[:100]]
+    timings = measure(lambda: [index.search(query) for query in queries], repeat)
+    results.append(summarize("search_index_query_user_x100", n_users, timings, queries=len(queries)))
+
+    # 利用者1人の編集の保存（ジャーナルへの1行の追記）
+    timings = measure(lambda: store.record_upsert("user", users[0]), repeat)
+    results.append(summarize("data_save_one_user", n_users, timings))
+
+    results += run_archive(roster, n_users, repeat)
+
+    return results
+
+def run_archive(roster, n_users, repeat, weeks=ARCHIVE_WEEKS):
+    """1年分の週間計画を、オブジェクトのリストと列指向の表（RouteTable）で保持・保存した場合を比較"""
+    archive, objects_bytes = measure_memory(lambda: generate_dated_routes(roster, weeks))
+    table, table_bytes = measure_memory(lambda: RouteTable.from_routes(archive))
+    stops = len(table.stops)
+    results = []
+
+    users_by_id = {u.id: u for u in roster["users"]}
+    vehicles_by_id = {v.id: v for v in roster["vehicles"]}
+    staff_by_id = {s.id: s for s in roster["staff"]}
+
+    # 書き出し（メモリ使用量もこのレコードに記録する）
+    objects_json = json.dumps([route.to_dict() for route in archive], ensure_ascii=False)
+    table_json = json.dumps(table.to_dict(), ensure_ascii=False)
+    table_binary = table.to_bytes()
+
+    timings = measure(lambda: json.dumps([route.to_dict() for route in archive], ensure_ascii=False), repeat)
+    results.append(summarize("archive_objects_to_json", n_users, timings, weeks=weeks, routes=len(archive),
+                             stops=stops, memory_bytes=objects_bytes, size_bytes=len(objects_json.encode())))
+    timings = measure(lambda: json.dumps(table.to_dict(), ensure_ascii=False), repeat)
+    results.append(summarize("archive_table_to_json", n_users, timings, weeks=weeks, routes=len(archive),
+                             stops=stops, memory_bytes=table_bytes, size_bytes=len(table_json.encode()),
+                             memory_factor=objects_bytes / table_bytes if table_bytes else None))
+    timings = measure(table.to_bytes, repeat)
+    results.append(summarize("archive_table_to_bytes", n_users, timings, size_bytes=len(table_binary)))
+
+    # 読み込み
+    def objects_from_json():
+        return [Route.from_dict(data, users_by_id, vehicles_by_id, staff_by_id)
+                for data in json.loads(objects_json)]
+
+    timings = measure(objects_from_json, repeat)
+    results.append(summarize("archive_objects_from_json", n_users, timings))
+    timings = measure(lambda: RouteTable.from_dict(json.loads(table_json)), repeat)
+    results.append(summarize("archive_table_from_json", n_users, timings))
+    timings = measure(lambda: RouteTable.from_bytes(table_binary), repeat)
+    results.append(summarize("archive_table_from_bytes", n_users, timings))
+
+    return results
+
+def run_import(n_rows, repeat, seed, work_dir):
+    """n_rows 行の利用者データのExcelインポートと、CSV / JSON Linesの入出力を計測"""
+    from openpyxl import load_workbook
+    from ui.export_manager import ExportManager
+
+    roster = generate_roster(n_rows, seed=seed)
+    app = types.SimpleNamespace(
+        settings=roster["settings"],
+        staff_list=roster["staff"],
+        user_list=roster["users"],
+        vehicle_list=roster["vehicles"],
+    )
+    export_manager = ExportManager(app)
+    export_manager.export_dir = work_dir
+    filepath = export_manager.export_data_to_excel("user")
+    results = []
+
+    def import_users():
+        result = import_excel(filepath, "user")
+        if result.errors or len(result.items) != n_rows:
+            raise RuntimeError(f"インポート結果が想定と異なります: {len(result.items)} 件, エラー {len(result.errors)} 件")
+
+    timings = measure(import_users, repeat)
+    results.append(summarize("import_excel_user", n_rows, timings, rows=n_rows,
+                             peak_memory_bytes=measure_peak(import_users)))
+
+    # 比較用: 通常モードでシート全体のセルを読み込む場合
+    def load_full():
+        wb = load_workbook(filepath)
+        rows = list(wb.active.rows)
+        return len(rows)
+
+    timings = measure(load_full, repeat)
+    results.append(summarize("import_excel_user_full_load", n_rows, timings, rows=n_rows,
+                             peak_memory_bytes=measure_peak(load_full)))
+
+    # CSV / JSON Lines
+    for fmt in ("csv", "jsonl"):
+        bulk_path = os.path.join(work_dir, f"users_{n_rows}.{fmt}")
+
+        def export_bulk():
+            export_file(bulk_path, "user", roster["users"])
+
+        def import_bulk():
+            result = import_file(bulk_path, "user")
+            if result.errors or len(result.items) != n_rows:
+                raise RuntimeError(f"インポート結果が想定と異なります: {len(result.items)} 件, エラー {len(result.errors)} 件")
+
+        timings = measure(export_bulk, repeat)
+        results.append(summarize(f"bulk_export_{fmt}_user", n_rows, timings, rows=n_rows,
+                                 peak_memory_bytes=measure_peak(export_bulk)))
+        timings = measure(import_bulk, repeat)
+        results.append(summarize(f"bulk_import_{fmt}_user", n_rows, timings, rows=n_rows,
+                                 peak_memory_bytes=measure_peak(import_bulk)))
+
+    return results
+
+def compare(results, baseline_path):
+    """前回の結果と比較して、中央値の比率を表示する"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    previous = {(r["benchmark"], r["users"]): r for r in baseline.get("results", [])}
+    print(f"\n比較対象: {baseline_path}")
+    for record in results:
+        key = (record["benchmark"], record["users"])
+        if key not in previous:
+            continue
+        ratio = record["median_s"] / previous[key]["median_s"] if previous[key]["median_s"] else float("inf")
+        print(f"  {record['benchmark']:<34} users={record['users']:<5} x{ratio:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="これで送迎のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="利用者数のリスト")
+    parser.add_argument("--repeat", type=int, default=3, help="各ベンチマークの繰り返し回数")
+    parser.add_argument("--seed", type=int, default=0, help="合成データの乱数シード")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--compare", help="比較する前回の結果JSONファイル")
+    parser.add_argument("--skip-startup", action="store_true", help="起動時間の計測を省略する")
+    parser.add_argument("--timings", help="処理段階ごとの計測結果を追記するJSON Linesファイル")
+    parser.add_argument("--import-rows", type=int, default=DEFAULT_IMPORT_ROWS,
+                        help="Excelインポートを計測する行数（0の場合は省略）")
+    args = parser.parse_args()
+
+    if args.timings:
+        from profiling import profiler
+        profiler.configure(args.timings)
+
+    work_dir = tempfile.mkdtemp(prefix="koredesougei_bench_")
+    results = []
+
+    if not args.skip_startup:
+        print("起動時間を計測中...")
+        for record in measure_startup(repeat=args.repeat):
+            print(f"  {record['benchmark']:<34} median={record['median_s']:.4f}s")
+            results.append(record)
+
+    try:
+        for n_users in args.sizes:
+            print(f"利用者数 {n_users} のベンチマークを実行中...")
+            for record in run_size(n_users, args.repeat, args.seed, work_dir):
+                print(f"  {record['benchmark']:<34} median={record['median_s']:.4f}s")
+                results.append(record)
+        if args.import_rows:
+            print(f"{args.import_rows} 行のExcelインポートを計測中...")
+            for record in run_import(args.import_rows, args.repeat, args.seed, work_dir):
+                print(f"  {record['benchmark']:<34} median={record['median_s']:.4f}s")
+                results.append(record)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output_path = args.output
+    if not output_path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(RESULTS_DIR, f"benchmark_{timestamp}.json")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n結果を保存しました: {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
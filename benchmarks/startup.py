@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+起動時間の計測
+
+`python -X importtime` でメインモジュール（src/main.py）のインポート時間を計測し、
+時間のかかっているモジュールの一覧と、起動時間の予算を超えていないかを表示する。
+画面が使える環境では、メインウィンドウが表示されるまでの時間と、
+データを読み込んで操作できるようになるまでの時間（time to interactive）も計測する。
+--data-users を指定すると、その人数の合成データを保存したデータディレクトリでも計測する
+（データが増えても、ウィンドウが表示されるまでの時間は変わらないことを確認する）。
+
+使い方:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 100 --top 20 --output startup.json
+    python benchmarks/startup.py --data-users 2000 10000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# メインモジュールのインポートにかけてよい時間（ミリ秒）
+DEFAULT_BUDGET_MS = 150
+
+# メインウィンドウが表示されるまでの時間と、データを反映するまでの時間を計測するスクリプト
+# （引数はデータディレクトリ。省略時はアプリのデータディレクトリ）
+WINDOW_SCRIPT = """
+import sys
+import time
+start = time.perf_counter()
+import tkinter as tk
+from main import TransportApp
+root = tk.Tk()
+app = TransportApp(root, data_dir=sys.argv[1] if len(sys.argv) > 1 else None)
+root.update()
+window = time.perf_counter() - start
+while not app.data_ready.is_set():
+    root.update()
+    time.sleep(0.001)
+root.update()
+print(window, time.perf_counter() - start)
+root.destroy()
+"""
+
+def parse_importtime(stderr):
+    """
+    -X importtime の出力を解析
+
+    Returns:
+        (モジュール名, 自身の時間[us], 累積時間[us], 階層) のリスト
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+def measure_import(module="main"):
+    """module のインポートを -X importtime 付きの新しいプロセスで計測"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} のインポートに失敗しました:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def measure_process_start(module="main", repeat=5):
+    """インタプリタ起動から module のインポート完了までの時間（秒）のリスト"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=SRC_DIR, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def measure_window(repeat=3, data_dir=None):
+    """
+    メインウィンドウ表示までの時間と、データを反映して操作できるようになるまでの時間を計測
+
+    Returns:
+        (ウィンドウ表示までの秒数のリスト, 操作できるまでの秒数のリスト)。画面が使えない環境ではNone
+    """
+    window, interactive = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", WINDOW_SCRIPT] + ([data_dir] if data_dir else []),
+                                cwd=SRC_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        values = result.stdout.strip().splitlines()[-1].split()
+        window.append(float(values[0]))
+        interactive.append(float(values[1]))
+    return window, interactive
+
+def create_data_dir(n_users, seed=42):
+    """n_users 人の合成データを保存した一時データディレクトリを作成"""
+    for path in (SRC_DIR, os.path.dirname(os.path.abspath(__file__))):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    from synthetic import generate_roster
+    from data_store import DataStore
+
+    roster = generate_roster(n_users, seed=seed)
+    data_dir = tempfile.mkdtemp(prefix=f"koredesougei_startup_{n_users}_")
+    DataStore(data_dir, background=False).save_all(roster["staff"], roster["users"],
+                                                   roster["vehicles"], roster["settings"])
+    return data_dir
+
+def _timing_record(name, n_users, timings):
+    return {
+        "benchmark": name,
+        "users": n_users,
+        "repeat": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "max_s": max(timings),
+    }
+
+def measure_startup(repeat=5, budget_ms=DEFAULT_BUDGET_MS, top=15, data_users=()):
+    """
+    起動時間を計測し、ベンチマーク結果と同じ形式のレコードのリストを返す
+
+    Args:
+        data_users: ウィンドウ表示までの時間を合成データでも計測する利用者数のリスト
+    """
+    entries = measure_import()
+    main_index = next((i for i, e in enumerate(entries) if e[0] == "main" and e[3] == 0), None)
+    import_ms = entries[main_index][2] / 1000 if main_index is not None else None
+
+    # main から読み込まれたモジュール（main の行の直前にある、階層が1以上の行）
+    subtree = []
+    if main_index is not None:
+        i = main_index - 1
+        while i >= 0 and entries[i][3] > 0:
+            subtree.append(entries[i])
+            i -= 1
+    heaviest = sorted(subtree, key=lambda e: e[2], reverse=True)[:top]
+
+    records = [{
+        "benchmark": "startup_import_main",
+        "users": 0,
+        "repeat": 1,
+        "min_s": import_ms / 1000 if import_ms is not None else None,
+        "median_s": import_ms / 1000 if import_ms is not None else None,
+        "mean_s": import_ms / 1000 if import_ms is not None else None,
+        "max_s": import_ms / 1000 if import_ms is not None else None,
+        "budget_ms": budget_ms,
+        "within_budget": import_ms is not None and import_ms <= budget_ms,
+        "heaviest_modules": [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+            for name, self_us, cumulative_us, _ in heaviest
+        ],
+    }]
+
+    records.append(_timing_record("startup_process", 0, measure_process_start(repeat=repeat)))
+
+    # アプリのデータディレクトリ（users=0）と、指定した人数の合成データで計測する
+    for n_users in [0] + list(data_users):
+        data_dir = create_data_dir(n_users) if n_users else None
+        try:
+            timings = measure_window(repeat=min(repeat, 3), data_dir=data_dir)
+        finally:
+            if data_dir:
+                shutil.rmtree(data_dir, ignore_errors=True)
+        if not timings:
+            break
+        records.append(_timing_record("startup_window", n_users, timings[0]))
+        records.append(_timing_record("startup_interactive", n_users, timings[1]))
+
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description="これで送迎の起動時間の計測")
+    parser.add_argument("--repeat", type=int, default=5, help="プロセス起動の計測回数")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="インポート時間の予算（ミリ秒）")
+    parser.add_argument("--top", type=int, default=15, help="表示する重いモジュールの数")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--data-users", type=int, nargs="*", default=[],
+                        help="合成データでもウィンドウ表示までの時間を計測する利用者数")
+    args = parser.parse_args()
+
+    records = measure_startup(args.repeat, args.budget_ms, args.top, args.data_users)
+    summary = records[0]
+
+    print(f"main のインポート: {summary['median_s'] * 1000:.1f} ms（予算 {args.budget_ms:.0f} ms）")
+    print("累積時間の大きいモジュール:")
+    for module in summary["heaviest_modules"]:
+        print(f"  {module['cumulative_ms']:>8.1f} ms  {module['module']}")
+    for record in records[1:]:
+        users = f"（利用者 {record['users']} 人）" if record["users"] else ""
+        print(f"{record['benchmark']}{users}: median {record['median_s'] * 1000:.1f} ms")
+    if len(records) < 3:
+        print("画面が使えないため、ウィンドウ表示までの時間は計測しませんでした。")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"results": records}, f, ensure_ascii=False, indent=2)
+
+    if not summary["within_budget"]:
+        print("起動時間の予算を超えています。")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+ベンチマーク用の合成データ生成
+
+乱数シードを固定して、東京都内に分散した利用者・職員・車両を生成する。
+生成した住所には座標を割り当てるので、FakeDistanceProviderと組み合わせて
+ネットワークなしで距離行列を計算できる。
+"""
+
+import datetime
+import random
+import uuid
+from models import Staff, User, Vehicle, Route, RouteStop
+
+# (区, 町名, 緯度, 経度)
+AREAS = [
+    ("新宿区", "西新宿", 35.6896, 139.6917),
+    ("渋谷区", "道玄坂", 35.6580, 139.6982),
+    ("中野区", "中野", 35.7074, 139.6638),
+    ("杉並区", "荻窪", 35.7047, 139.6200),
+    ("練馬区", "光が丘", 35.7600, 139.6320),
+    ("豊島区", "池袋", 35.7295, 139.7109),
+    ("板橋区", "常盤台", 35.7590, 139.6890),
+    ("北区", "赤羽", 35.7780, 139.7210),
+    ("文京区", "本郷", 35.7080, 139.7600),
+    ("台東区", "浅草", 35.7120, 139.7960),
+    ("荒川区", "町屋", 35.7420, 139.7820),
+    ("世田谷区", "三軒茶屋", 35.6430, 139.6710),
+    ("目黒区", "自由が丘", 35.6070, 139.6690),
+    ("品川区", "大井", 35.6070, 139.7340),
+    ("江東区", "豊洲", 35.6550, 139.7960),
+    ("足立区", "北千住", 35.7490, 139.8050),
+]
+
+SURNAMES = ["佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤",
+            "吉田", "山田", "佐々木", "山口", "松本", "井上", "木村", "林", "斎藤", "清水"]
+GIVEN_NAMES = ["太郎", "花子", "一郎", "次郎", "京子", "健太", "幸子", "智也", "裕子", "三郎",
+               "美香", "大輔", "由美", "翔太", "恵子", "直樹", "明美", "浩二", "久美子", "誠"]
+
+WEEKDAYS = ["月", "火", "水", "木", "金", "土"]
+FACILITY_ADDRESS = "東京都豊島区東池袋1-1-1"
+FACILITY_COORDINATES = (35.7289, 139.7193)
+
+# 数字の全角・半角の変換表（同じ住所の表記の揺れを作る）
+_FULL_WIDTH_DIGITS = str.maketrans("0123456789-", "０１２３４５６７８９－")
+_HALF_WIDTH_DIGITS = str.maketrans("０１２３４５６７８９－", "0123456789-")
+
+def _address(rng):
+    """ランダムな住所と座標を生成"""
+    ward, town, lat, lng = rng.choice(AREAS)
+    address = f"東京都{ward}{town}{rng.randint(1, 5)}-{rng.randint(1, 30)}-{rng.randint(1, 20)}"
+    # 町の中心から最大2km程度ずらす
+    return address, (lat + rng.uniform(-0.018, 0.018), lng + rng.uniform(-0.022, 0.022))
+
+def _time(hour, minute):
+    """sample データと同じ "H:MM" 形式の時刻文字列"""
+    return f"{hour}:{minute:02d}"
+
+def generate_roster(n_users, seed=0, shared_address_ratio=0.0):
+    """
+    合成データを生成
+
+    Args:
+        n_users: 利用者数
+        seed: 乱数シード
+        shared_address_ratio: ほかの利用者と同じ住所（グループホームなど）に住む利用者の割合。
+            住所の半数は数字を全角にした表記にする
+
+    Returns:
+        staff, users, vehicles, settings, coordinates をキーに持つ辞書
+    """
+    rng = random.Random(seed)
+    uuid_rng = random.Random(seed + 1)
+
+    def new_id():
+        return str(uuid.UUID(int=uuid_rng.getrandbits(128), version=4))
+
+    def new_name():
+        return rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES)
+
+    coordinates = {FACILITY_ADDRESS: FACILITY_COORDINATES}
+
+    users = []
+    for _ in range(n_users):
+        if shared_address_ratio and users and rng.random() < shared_address_ratio:
+            address = rng.choice(users).address
+            if rng.random() < 0.5:
+                address = address.translate(_FULL_WIDTH_DIGITS)
+            coordinates[address] = coordinates[address.translate(_HALF_WIDTH_DIGITS)]
+        else:
+            address, coord = _address(rng)
+            coordinates[address] = coord
+        minute = rng.choice(range(0, 60, 5))
+        attendance_days = sorted(rng.sample(WEEKDAYS, rng.randint(2, 5)), key=WEEKDAYS.index)
+        users.append(User(
+            id=new_id(),
+            name=new_name(),
+            address=address,
+            pickup_time_morning=_time(8, minute),
+            dropoff_time_morning=_time(9, minute),
+            pickup_time_evening=_time(16, minute),
+            dropoff_time_evening=_time(17, minute),
+            constraints=rng.choice(["", "", "", "車いす使用", "乗車時に介助が必要"]),
+            attendance_days=attendance_days
+        ))
+
+    # 1日あたりの利用者数に見合う車両と職員
+    n_vehicles = max(3, n_users // 8)
+    vehicles = [
+        Vehicle(id=new_id(), name=f"車両{i + 1}", capacity=rng.choice([2, 3, 4, 4, 6, 8]))
+        for i in range(n_vehicles)
+    ]
+
+    staff = []
+    for i in range(max(5, n_vehicles * 2)):
+        staff.append(Staff(
+            id=new_id(),
+            name=new_name(),
+            can_drive=(i % 2 == 0),
+            workdays=sorted(rng.sample(WEEKDAYS, rng.randint(3, 6)), key=WEEKDAYS.index)
+        ))
+
+    settings = {
+        "workdays": list(WEEKDAYS),
+        "api_key": "",
+        "facility_address": FACILITY_ADDRESS
+    }
+
+    return {
+        "staff": staff,
+        "users": users,
+        "vehicles": vehicles,
+        "settings": settings,
+        "coordinates": coordinates,
+    }
+
+def generate_routes(roster, days=None):
+    """
+    エクスポートのベンチマーク用に、最適化を行わずに1週間分のルートを組み立てる
+
+    各曜日の利用者を車両の定員ごとに順番に割り当て、朝と夕方のルートを作る。
+    """
+    days = days or roster["settings"]["workdays"]
+    vehicles = roster["vehicles"]
+    drivers = [s for s in roster["staff"] if s.can_drive]
+    assistants = [s for s in roster["staff"] if not s.can_drive]
+    routes = []
+
+    for day in days:
+        day_users = [u for u in roster["users"] if day in u.attendance_days]
+        for is_morning in (True, False):
+            start = 0
+            vehicle_index = 0
+            while start < len(day_users):
+                vehicle = vehicles[vehicle_index % len(vehicles)]
+                chunk = day_users[start:start + vehicle.capacity]
+                start += vehicle.capacity
+                facility_minute = 8 * 60 + 30 if is_morning else 16 * 60
+
+                stops = [RouteStop(user=None, is_pickup=not is_morning,
+                                   time=f"{facility_minute // 60:02d}:{facility_minute % 60:02d}")]
+                for i, user in enumerate(chunk, 1):
+                    minute = facility_minute + i * 10 if is_morning else facility_minute - i * 10
+                    stops.append(RouteStop(user=user, is_pickup=is_morning,
+                                           time=f"{minute // 60:02d}:{minute % 60:02d}"))
+                stops.sort(key=lambda stop: stop.time)
+
+                routes.append(Route(
+                    id=len(routes) + 1,
+                    vehicle=vehicle,
+                    driver=drivers[vehicle_index % len(drivers)] if drivers else None,
+                    assistant=assistants[vehicle_index % len(assistants)] if assistants else None,
+                    stops=stops,
+                    date=day,
+                    is_morning=is_morning
+                ))
+                vehicle_index += 1
+
+    return routes
+
+def generate_dated_routes(roster, weeks, start_date=datetime.date(2024, 1, 1)):
+    """
+    generate_routes の1週間分を weeks 週繰り返し、曜日の代わりに日付（"2024-01-01" など）を設定する
+
+    start_date は月曜日を指定する。
+    """
+    weekdays = ["月", "火", "水", "木", "金", "土", "日"]
+    routes = []
+    for week in range(weeks):
+        for route in generate_routes(roster):
+            offset = weekdays.index(route.date) if route.date in weekdays else 0
+            route.date = (start_date + datetime.timedelta(weeks=week, days=offset)).isoformat()
+            routes.append(route)
+    return routes
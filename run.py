@@ -11,6 +11,7 @@ import sys
 import tkinter as tk
 import traceback
 import logging
+import datetime
 
 # ロギングの設定
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
@@ -54,13 +55,19 @@ def main():
         for path in sys.path:
             logging.info(f"  {path}")
         
-        # ORToolsのインポートチェック
+        # 処理時間の計測（JSON Lines形式で logs/timings.jsonl に追記）
+        from profiling import profiler
+        timings_file = os.path.join(log_dir, "timings.jsonl")
+        profiler.configure(timings_file)
+        logging.info(f"処理時間の記録先: {timings_file}")
+        
+        # ORToolsのインストールチェック（起動を速くするため、インポートせずにメタデータだけ確認する）
         try:
-            import ortools
-            logging.info(f"ORTools version: {ortools.__version__}")
-        except ImportError as e:
-            logging.error(f"ORToolsのインポートに失敗: {e}")
-            raise
+            import importlib.metadata
+            logging.info(f"ORTools version: {importlib.metadata.version('ortools')}")
+        except importlib.metadata.PackageNotFoundError as e:
+            logging.error(f"ORToolsが見つかりません: {e}")
+            raise ImportError("ORToolsをインストールしてください: pip install ortools") from e
         
         # サンプルデータ作成フラグの処理
         create_sample = "--sample" in sys.argv
@@ -83,10 +90,37 @@ def main():
         root.mainloop()
         logging.info("アプリケーションの終了")
         
+        # 終了時点のカウンタ（API呼び出し回数、キャッシュヒット率）を記録
+        profiler.emit_counters("app.exit")
+        profiler.close()
+        
     except Exception as e:
         logging.error(f"アプリケーションの起動エラー: {e}")
         traceback.print_exc(file=open(log_file, 'a'))
         raise
 
+def main_with_profile():
+    """cProfileで計測しながらアプリケーションを実行"""
+    import cProfile
+    import pstats
+    
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    stats_file = os.path.join(log_dir, f"profile_{timestamp}.prof")
+    summary_file = os.path.join(log_dir, f"profile_{timestamp}.txt")
+    
+    profile = cProfile.Profile()
+    try:
+        profile.runcall(main)
+    finally:
+        profile.dump_stats(stats_file)
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(profile, stream=f)
+            stats.sort_stats("cumulative").print_stats(50)
+        logging.info(f"プロファイル結果を保存: {stats_file}")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # --profile を指定すると実行全体のcProfile結果を logs/ に保存する
+    if "--profile" in sys.argv:
+        main_with_profile()
+    else:
+        main() 
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+住所の正規化と、同じ住所の利用者のまとめ
+
+グループホームや集合住宅では、複数の利用者が同じ住所に住んでいる。最適化では
+同じ住所の利用者を1つの停車地点として扱い、距離行列とOR-Toolsのノードを減らす。
+
+住所は次の規則で正規化してから比較する（表記の揺れだけを吸収し、部屋番号などは区別したまま）。
+    - NFKC正規化（全角の英数字・記号を半角に）と空白の除去
+    - 数字の間のハイフンに似た文字（－、ー、‐ など）を "-" に統一
+    - 「1丁目2番3号」「1丁目2番地3」を「1-2-3」に統一
+
+    groups = group_by_address(users)  # [[利用者, 利用者], [利用者], ...]（最初に現れた順）
+"""
+
+import re
+import unicodedata
+
+# 数字の間のハイフンに似た文字
+_DASH = re.compile(r"(?<=\d)[‐‑‒–—―−ー－-](?=\d)")
+
+# 数字の後の「丁目」「番」「番地」（後に数字が続くもの）と、末尾の「号」
+_BLOCK = re.compile(r"(?<=\d)(?:丁目|番地|番)(?=\d)")
+_NUMBER_END = re.compile(r"(?<=\d)号$")
+
+def normalize_address(address):
+    """比較用に住所を正規化"""
+    text = "".join(unicodedata.normalize("NFKC", address or "").split())
+    text = _DASH.sub("-", text)
+    text = _BLOCK.sub("-", text)
+    return _NUMBER_END.sub("", text)
+
+def group_by_address(users):
+    """
+    正規化した住所が同じ利用者をまとめる
+
+    Returns:
+        利用者のリストのリスト（グループの順は、各グループの最初の利用者が現れた順。
+        住所が空の利用者は1人ずつのグループにする）
+    """
+    groups = {}
+    for user in users:
+        # 住所が空の利用者は、同じ場所とはみなさない
+        key = normalize_address(user.address) or id(user)
+        groups.setdefault(key, []).append(user)
+    return list(groups.values())
@@ -0,0 +1,218 @@
+"""
+職員・利用者・車両データのCSV / JSON Lines入出力
+
+列（JSONのキー）は models.py の to_dict と同じ。ファイルは1行ずつ読み書きし、
+読み込みは一定行数ごとに検証して返すので、件数が多くてもメモリ使用量はほぼ一定になる。
+検証の内容とエラーの形式はExcelインポート（excel_import.py）と同じ。
+
+CSVでは曜日のリストはカンマ区切り（"月,水,金"）、真偽値は true / false で表す。
+
+    export_file("users.csv", "user", app.user_list)
+    result = import_file("users.jsonl", "user")
+
+夜間の同期などでは、コマンドラインからデータファイルに直接取り込める
+（取り込み中はアプリを起動しないこと）。
+
+    python src/bulk_io.py export --kind user --output users.csv
+    python src/bulk_io.py import --kind user --input users.csv
+    python src/bulk_io.py import --kind user --input users.jsonl --dry-run
+"""
+
+import csv
+import itertools
+import json
+import os
+from models import Staff, User, Vehicle
+from excel_import import ImportResult, validate_rows
+
+# 種別ごとのモデルクラスと、曜日のリストを持つ属性
+MODEL_CLASSES = {"staff": Staff, "user": User, "vehicle": Vehicle}
+DAYS_ATTRS = {"staff": "workdays", "user": "attendance_days", "vehicle": None}
+
+# 1回に読み込んで検証する行数
+CHUNK_SIZE = 1000
+
+def fields_for(kind):
+    """種別の列名のリスト（to_dict のキーの順）"""
+    return list(MODEL_CLASSES[kind]().to_dict().keys())
+
+def detect_format(filepath):
+    """拡張子からファイル形式（"csv" または "jsonl"）を判定"""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"ファイル形式を判定できません（.csv または .jsonl を指定してください）: {filepath}")
+
+# ---- 書き出し ----
+
+def _csv_value(value):
+    """to_dict の値をCSVのセルの文字列に変換"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return ",".join(value)
+    return value
+
+def export_file(filepath, kind, entities, fmt=None):
+    """
+    職員・利用者・車両をCSVまたはJSON Linesに書き出す
+
+    一時ファイルに1行ずつ書いてから置き換えるので、書き込み途中のファイルは残らない。
+
+    Args:
+        filepath: 出力先
+        kind: "staff", "user", "vehicle" のいずれか
+        entities: 書き出すモデルのイテラブル
+        fmt: "csv" または "jsonl"（Noneの場合は拡張子から判定）
+
+    Returns:
+        書き出した件数
+    """
+    fmt = fmt or detect_format(filepath)
+    fields = fields_for(kind)
+    tmp_path = filepath + ".tmp"
+    count = 0
+
+    # CSVはExcelでも文字化けしないようBOM付きで書き出す
+    with open(tmp_path, 'w', encoding='utf-8-sig' if fmt == "csv" else 'utf-8', newline='') as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for entity in entities:
+                data = entity.to_dict()
+                writer.writerow([_csv_value(data[field]) for field in fields])
+                count += 1
+        else:
+            for entity in entities:
+                f.write(json.dumps(entity.to_dict(), ensure_ascii=False) + "\n")
+                count += 1
+    os.replace(tmp_path, filepath)
+    return count
+
+# ---- 読み込み ----
+
+def iter_records(filepath, fmt=None):
+    """
+    CSVまたはJSON Linesのレコードを (行番号, 辞書) として順に返す
+
+    JSONとして読めない行は (行番号, ValueError) を返す。
+    """
+    fmt = fmt or detect_format(filepath)
+    if fmt == "csv":
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("オブジェクトではありません")
+                except ValueError as e:
+                    yield line_number, ValueError(f"JSONとして読み込めません: {e}")
+                    continue
+                yield line_number, record
+
+def iter_import_chunks(filepath, kind, fmt=None, chunk_size=CHUNK_SIZE):
+    """
+    ファイルを chunk_size 行ずつ読み込んで検証し、チャンクごとの ImportResult を返す
+
+    IDの重複はファイル全体で検出する。
+    """
+    fields = fields_for(kind)
+    seen_ids = set()
+    records = iter_records(filepath, fmt)
+
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        result = ImportResult(kind)
+        rows = []
+        for line_number, record in chunk:
+            if isinstance(record, ValueError):
+                result.errors.append((line_number, str(record)))
+                result.rows += 1
+                continue
+            rows.append((line_number, tuple(record.get(field) for field in fields)))
+        yield validate_rows(kind, rows, result, seen_ids)
+
+def import_file(filepath, kind, fmt=None, chunk_size=CHUNK_SIZE):
+    """
+    CSVまたはJSON Linesから職員・利用者・車両を読み込む
+
+    Returns:
+        ImportResult（全チャンクの結果をまとめたもの）
+    """
+    if kind not in MODEL_CLASSES:
+        raise ValueError(f"不明なデータ型です: {kind}")
+    total = ImportResult(kind)
+    for result in iter_import_chunks(filepath, kind, fmt, chunk_size):
+        total.items.extend(result.items)
+        total.errors.extend(result.errors)
+        total.skipped_ids.update(result.skipped_ids)
+        total.rows += result.rows
+    return total
+
+# ---- コマンドライン ----
+
+def default_data_dir():
+    """アプリと同じデータディレクトリ"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def main():
+    import argparse
+    import sys
+    from data_store import DataStore
+    from repository import Repository
+
+    parser = argparse.ArgumentParser(description="職員・利用者・車両データのCSV / JSON Lines入出力")
+    parser.add_argument("command", choices=["export", "import"], help="export: 書き出し, import: 取り込み")
+    parser.add_argument("--kind", required=True, choices=list(MODEL_CLASSES), help="データの種別")
+    parser.add_argument("--input", help="取り込むファイル（.csv / .jsonl）")
+    parser.add_argument("--output", help="書き出し先（.csv / .jsonl）")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="ファイル形式（省略時は拡張子から判定）")
+    parser.add_argument("--data-dir", default=default_data_dir(), help="データディレクトリ")
+    parser.add_argument("--keep-missing", action="store_true", help="ファイルにないデータを削除しない")
+    parser.add_argument("--dry-run", action="store_true", help="検証と差分の表示だけを行い、保存しない")
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir, background=False)
+    loaders = {"staff": store.load_staff, "user": store.load_users, "vehicle": store.load_vehicles}
+    items = loaders[args.kind]() or []
+
+    if args.command == "export":
+        if not args.output:
+            parser.error("export には --output を指定してください")
+        count = export_file(args.output, args.kind, items, args.format)
+        print(f"{count} 件を書き出しました: {args.output}")
+        return
+
+    if not args.input:
+        parser.error("import には --input を指定してください")
+    result = import_file(args.input, args.kind, args.format)
+    if result.errors:
+        print(f"{len(result.errors)} 行にエラーがあります（これらの行は取り込みません）:")
+        print(result.error_summary(limit=50))
+
+    repository = Repository(args.kind, items, days_attr=DAYS_ATTRS[args.kind],
+                            data_store=None if args.dry_run else store)
+    changes = repository.upsert_all(result.items, remove_missing=not args.keep_missing,
+                                    keep_ids=result.skipped_ids)
+    print(f"{len(result.items)} 件を読み込みました（{changes.summary()}）")
+
+    if not args.dry_run:
+        # ジャーナルに記録した変更をスナップショットに統合する
+        store.close()
+    sys.exit(1 if result.errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+データの保存
+
+職員・利用者・車両・設定は、スナップショット（staff.json などのJSONファイル）と、
+それ以降の変更を1件ずつ追記するジャーナル（journal.jsonl）に分けて保存する。
+
+- 1人分の編集はジャーナルへの1行の追記で済む（全件を書き直さない）
+- ジャーナルへの書き込みはバックグラウンドのスレッドで行う
+- ジャーナルが大きくなったら、バックグラウンドでスナップショットに統合（コンパクション）する
+- スナップショットは一時ファイルに書いてから置き換えるので、書き込み途中で壊れない
+
+読み込み時はスナップショットにジャーナルを順に適用して最新の状態を復元する。
+"""
+
+import json
+import os
+import threading
+from models import Staff, User, Vehicle
+
+# ジャーナルの種別ごとの設定（スナップショットのファイル名、モデルクラス）
+ENTITY_KINDS = {
+    "staff": ("staff.json", Staff),
+    "user": ("users.json", User),
+    "vehicle": ("vehicles.json", Vehicle),
+}
+
+def atomic_write_json(filepath, data, indent=2):
+    """一時ファイルに書いてから置き換えることで、JSONファイルを安全に書き込む"""
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+class DataStore:
+    """職員・利用者・車両・設定データをJSONファイルで読み書きするクラス"""
+
+    # ジャーナルがこの行数を超えたらスナップショットに統合する
+    COMPACT_THRESHOLD = 500
+
+    # バックグラウンドでジャーナルを書き出す間隔（秒）
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, data_dir, background=True):
+        """
+        初期化
+
+        Args:
+            data_dir: データファイルを保存するディレクトリ
+            background: ジャーナルの書き出しとコンパクションをバックグラウンドで行うか
+        """
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        # データファイルのパス
+        self.staff_file = os.path.join(self.data_dir, "staff.json")
+        self.users_file = os.path.join(self.data_dir, "users.json")
+        self.vehicles_file = os.path.join(self.data_dir, "vehicles.json")
+        self.settings_file = os.path.join(self.data_dir, "settings.json")
+        self.journal_file = os.path.join(self.data_dir, "journal.jsonl")
+        # コンパクション中のジャーナル（異常終了した場合は次回の読み込み時に適用する）
+        self.compacting_file = self.journal_file + ".compacting"
+
+        self._pending = []  # まだジャーナルに書いていない変更
+        self._journal_lines = self._count_lines(self.journal_file)
+        self._lock = threading.Lock()  # _pending と _journal_lines を保護
+        self._io_lock = threading.Lock()  # ファイルへの書き込みを直列化
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._flush_loop, name="DataStoreFlusher", daemon=True)
+            self._thread.start()
+
+    # ---- 読み込み ----
+
+    def _load_json(self, filepath):
+        """JSONファイルを読み込む（ファイルがない場合はNone）"""
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _count_lines(self, filepath):
+        """ファイルの行数"""
+        if not os.path.exists(filepath):
+            return 0
+        with open(filepath, 'rb') as f:
+            return sum(1 for _ in f)
+
+    def _iter_journal(self):
+        """ジャーナルのレコードを古い順に返す（書きかけの最終行は読み飛ばす）"""
+        for filepath in (self.compacting_file, self.journal_file):
+            if not os.path.exists(filepath):
+                continue
+            with open(filepath, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def _load_records(self, kind):
+        """スナップショットにジャーナルを適用した、種別 kind の辞書のリスト（データがなければNone）"""
+        filename, _ = ENTITY_KINDS[kind]
+        snapshot = self._load_json(os.path.join(self.data_dir, filename))
+        records = None if snapshot is None else {item.get("id"): item for item in snapshot}
+
+        for entry in self._iter_journal():
+            if entry.get("kind") != kind:
+                continue
+            if records is None:
+                records = {}
+            if entry["op"] == "delete":
+                records.pop(entry["id"], None)
+            else:
+                records[entry["id"]] = entry["data"]
+
+        return None if records is None else list(records.values())
+
+    def load_staff(self):
+        """職員データを読み込む"""
+        data = self._load_records("staff")
+        return None if data is None else [Staff.from_dict(item) for item in data]
+
+    def load_users(self):
+        """利用者データを読み込む"""
+        data = self._load_records("user")
+        return None if data is None else [User.from_dict(item) for item in data]
+
+    def load_vehicles(self):
+        """車両データを読み込む"""
+        data = self._load_records("vehicle")
+        return None if data is None else [Vehicle.from_dict(item) for item in data]
+
+    def load_settings(self):
+        """設定データを読み込む"""
+        settings = self._load_json(self.settings_file)
+        for entry in self._iter_journal():
+            if entry.get("kind") == "settings":
+                settings = entry["data"]
+        return settings
+
+    # ---- 変更の記録 ----
+
+    def _append(self, entry):
+        """変更をジャーナルの書き出し待ちに追加する"""
+        with self._lock:
+            self._pending.append(entry)
+        if not self._thread:
+            self.flush()
+
+    def record_upsert(self, kind, entity):
+        """職員・利用者・車両の追加または更新を記録"""
+        self._append({"kind": kind, "op": "upsert", "id": entity.id, "data": entity.to_dict()})
+
+    def record_delete(self, kind, entity_id):
+        """職員・利用者・車両の削除を記録"""
+        self._append({"kind": kind, "op": "delete", "id": entity_id})
+
+    def record_settings(self, settings):
+        """設定の変更を記録"""
+        self._append({"kind": "settings", "op": "upsert", "id": None, "data": dict(settings)})
+
+    def flush(self, wait=True):
+        """
+        書き出し待ちの変更をジャーナルに追記する
+
+        Args:
+            wait: Falseの場合はバックグラウンドのスレッドに依頼してすぐに戻る
+        """
+        if not wait and self._thread:
+            self._wakeup.set()
+            return
+
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._journal_lines += len(pending)
+
+    # ---- スナップショット ----
+
+    def save_all(self, staff_list, user_list, vehicle_list, settings):
+        """
+        すべてのデータをスナップショットとして保存（インポートなどで全件を置き換えた場合）
+
+        書き出し待ちの変更とジャーナルは、このスナップショットに含まれるので破棄する。
+        """
+        with self._io_lock:
+            with self._lock:
+                self._pending = []
+            atomic_write_json(self.staff_file, [staff.to_dict() for staff in staff_list])
+            atomic_write_json(self.users_file, [user.to_dict() for user in user_list])
+            atomic_write_json(self.vehicles_file, [vehicle.to_dict() for vehicle in vehicle_list])
+            atomic_write_json(self.settings_file, settings)
+            for filepath in (self.journal_file, self.compacting_file):
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            with self._lock:
+                self._journal_lines = 0
+
+    def compact(self):
+        """ジャーナルをスナップショットに統合する"""
+        self.flush()
+        with self._io_lock:
+            if not os.path.exists(self.journal_file) and not os.path.exists(self.compacting_file):
+                return
+            # 統合中の追記は新しいジャーナルに入るよう、現在のジャーナルを退避する
+            if os.path.exists(self.journal_file):
+                if os.path.exists(self.compacting_file):
+                    # 前回のコンパクションが途中で終わっている場合は連結する
+                    with open(self.compacting_file, 'a', encoding='utf-8') as dst, \
+                         open(self.journal_file, 'r', encoding='utf-8') as src:
+                        dst.write(src.read())
+                    os.remove(self.journal_file)
+                else:
+                    os.replace(self.journal_file, self.compacting_file)
+            with self._lock:
+                self._journal_lines = 0
+
+            # ジャーナルを退避した後なので、_load_records は退避分だけを適用する
+            for kind, (filename, _) in ENTITY_KINDS.items():
+                records = self._load_records(kind)
+                if records is not None:
+                    atomic_write_json(os.path.join(self.data_dir, filename), records)
+            settings = self.load_settings()
+            if settings is not None:
+                atomic_write_json(self.settings_file, settings)
+
+            os.remove(self.compacting_file)
+
+    def _flush_loop(self):
+        """バックグラウンドでジャーナルを書き出し、必要に応じてコンパクションする"""
+        while not self._closed:
+            self._wakeup.wait(self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if self._journal_lines > self.COMPACT_THRESHOLD:
+                    self.compact()
+            except Exception as e:
+                print(f"データの書き出しに失敗しました: {e}")
+
+    def close(self):
+        """書き出し待ちの変更を保存してバックグラウンドのスレッドを止める"""
+        self._closed = True
+        if self._thread:
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.compact()
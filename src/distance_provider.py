@@ -0,0 +1,145 @@
+import hashlib
+import math
+
+class GoogleDistanceProvider:
+    """Google Maps Distance Matrix APIを使用して所要時間を取得するクラス"""
+
+    URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+    GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+    DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.call_count = 0  # APIの呼び出し回数
+
+    def get_duration(self, from_addr, to_addr):
+        """
+        2地点間の所要時間を取得
+
+        Args:
+            from_addr: 出発地の住所
+            to_addr: 目的地の住所
+
+        Returns:
+            秒単位の所要時間（取得できなかった場合はNone）
+        """
+        params = {
+            "origins": from_addr,
+            "destinations": to_addr,
+            "key": self.api_key
+        }
+
+        # requests は初回のAPI呼び出し時に読み込む
+        import requests
+
+        self.call_count += 1
+        response = requests.get(self.URL, params=params)
+        data = response.json()
+
+        if data['status'] != 'OK':
+            return None
+
+        element = data['rows'][0]['elements'][0]
+        if element.get('status', 'OK') != 'OK':
+            return None
+        return element['duration']['value']
+
+    def geocode(self, address):
+        """
+        住所の座標を取得（Geocoding API）
+
+        Returns:
+            (緯度, 経度)（取得できなかった場合はNone）
+        """
+        import requests
+
+        self.call_count += 1
+        response = requests.get(self.GEOCODE_URL, params={"address": address, "key": self.api_key})
+        data = response.json()
+
+        if data['status'] != 'OK' or not data['results']:
+            return None
+        location = data['results'][0]['geometry']['location']
+        return (location['lat'], location['lng'])
+
+    def get_leg_geometry(self, from_addr, to_addr):
+        """
+        2地点間の経路の座標列を取得（Directions API）
+
+        Returns:
+            [(緯度, 経度), ...]（取得できなかった場合はNone）
+        """
+        import requests
+        try:
+            from route_geometry import decode_polyline
+        except ImportError:
+            from src.route_geometry import decode_polyline
+
+        self.call_count += 1
+        params = {"origin": from_addr, "destination": to_addr, "key": self.api_key}
+        response = requests.get(self.DIRECTIONS_URL, params=params)
+        data = response.json()
+
+        if data['status'] != 'OK' or not data['routes']:
+            return None
+        return decode_polyline(data['routes'][0]['overview_polyline']['points'])
+
+class FakeDistanceProvider:
+    """
+    ネットワークを使わずに所要時間を計算するクラス（ベンチマーク・オフライン確認用）
+
+    座標が与えられていない住所は、住所文字列のハッシュから東京近郊の
+    座標を決定的に割り当てる。所要時間は直線距離に迂回係数を掛け、
+    平均速度で割って求める。
+    """
+
+    # 東京23区をおおむね含む範囲（南端, 北端, 西端, 東端）
+    TOKYO_BOUNDS = (35.55, 35.82, 139.55, 139.92)
+
+    def __init__(self, coordinates=None, speed_kmh=20.0, detour_factor=1.4):
+        """
+        初期化
+
+        Args:
+            coordinates: 住所から(緯度, 経度)への辞書
+            speed_kmh: 平均移動速度（km/h）
+            detour_factor: 直線距離に対する道路距離の倍率
+        """
+        self.coordinates = dict(coordinates or {})
+        self.speed_kmh = speed_kmh
+        self.detour_factor = detour_factor
+        self.call_count = 0
+
+    def geocode(self, address):
+        """住所の座標を取得"""
+        if address not in self.coordinates:
+            digest = hashlib.md5(address.encode('utf-8')).digest()
+            south, north, west, east = self.TOKYO_BOUNDS
+            lat = south + (north - south) * int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+            lng = west + (east - west) * int.from_bytes(digest[4:8], 'big') / 0xFFFFFFFF
+            self.coordinates[address] = (lat, lng)
+        return self.coordinates[address]
+
+    def get_duration(self, from_addr, to_addr):
+        """2地点間の所要時間（秒）を計算"""
+        self.call_count += 1
+        if from_addr == to_addr:
+            return 0
+
+        distance_km = haversine_km(self.geocode(from_addr), self.geocode(to_addr))
+        hours = distance_km * self.detour_factor / self.speed_kmh
+        # 乗降のための最低所要時間として1分を加算
+        return int(hours * 3600) + 60
+
+    def get_leg_geometry(self, from_addr, to_addr):
+        """2地点間の経路（直線）の座標列"""
+        self.call_count += 1
+        return [self.geocode(from_addr), self.geocode(to_addr)]
+
+def haversine_km(origin, destination):
+    """2つの(緯度, 経度)間の大円距離（km）"""
+    lat1, lng1 = map(math.radians, origin)
+    lat2, lng2 = map(math.radians, destination)
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
@@ -0,0 +1,169 @@
+"""
+複数の施設で共有する距離のキャッシュ
+
+TransportOptimizer は最適化のたびに距離キャッシュファイルを読み込んで保存するので、
+施設ごとに最適化すると、同じ区間の所要時間を施設の数だけ問い合わせることになる。
+DistanceStore はキャッシュをメモリに1つだけ持ち、複数のスレッドから同時に使える。
+別のスレッドが問い合わせ中の区間は、重ねて問い合わせずにその結果を待つ。
+ファイルへの保存は save() を呼んだときだけ行う。
+
+    store = DistanceStore(GoogleDistanceProvider(api_key), "data/distance_matrix_cache.json")
+    optimizer = TransportOptimizer(api_key, facility_address, distance_store=store)
+    ...
+    store.save()
+
+DistanceTable は計算済みの行列から部分行列を取り出すだけのもので、別のプロセスに渡して
+同じ行列で何度も最適化する場合（scenarios.py）に使う。
+"""
+
+import json
+import os
+import threading
+import numpy as np
+from data_store import atomic_write_json
+
+class DistanceStore:
+    """所要時間のキャッシュをスレッド間で共有するクラス"""
+
+    def __init__(self, provider, cache_file=None):
+        """
+        初期化
+
+        Args:
+            provider: get_duration(出発地, 目的地) で所要時間（秒）を返すプロバイダー
+            cache_file: キャッシュファイルのパス（TransportOptimizer と同じ形式。Noneの場合は保存しない）
+        """
+        self.provider = provider
+        self.cache_file = cache_file
+        self.cache = self._load()  # 出発地 -> {目的地: 所要時間}
+        self.stats = {"api_calls": 0, "cache_hits": 0, "cache_misses": 0}
+        self._pending = {}  # 問い合わせ中の区間 -> 取得したときにセットする Event
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """キャッシュファイルを読み込む"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"距離キャッシュの読み込みに失敗しました: {e}")
+            return {}
+
+    def _lookup(self, from_addr, to_addr):
+        """キャッシュにある所要時間（ない場合はNone。_lock を取得した状態で呼ぶ）"""
+        row = self.cache.get(from_addr)
+        return row.get(to_addr) if row else None
+
+    def matrix(self, addresses):
+        """
+        住所の間の所要時間の行列
+
+        キャッシュにない区間だけをプロバイダーに問い合わせる。取得できなかった区間は0のままにする。
+
+        Args:
+            addresses: 住所のリスト（先頭が施設）
+
+        Returns:
+            (行列, キャッシュにあった区間の数, 問い合わせた区間の数)
+        """
+        n = len(addresses)
+        matrix = np.zeros((n, n))
+        hits = 0
+        fetch = []  # このスレッドで問い合わせる区間
+        waits = []  # ほかのスレッドが問い合わせ中の区間
+
+        with self._lock:
+            for i, from_addr in enumerate(addresses):
+                for j, to_addr in enumerate(addresses):
+                    if i == j or from_addr == to_addr:
+                        continue
+                    duration = self._lookup(from_addr, to_addr)
+                    if duration is not None:
+                        matrix[i][j] = duration
+                        hits += 1
+                        continue
+                    key = (from_addr, to_addr)
+                    event = self._pending.get(key)
+                    if event is None:
+                        self._pending[key] = threading.Event()
+                        fetch.append((i, j))
+                    else:
+                        waits.append((i, j, event))
+            self.stats["cache_hits"] += hits + len(waits)
+            self.stats["cache_misses"] += len(fetch)
+
+        # 問い合わせは _lock の外で行う（ほかのスレッドはその間もキャッシュを使える）
+        try:
+            for i, j in fetch:
+                from_addr, to_addr = addresses[i], addresses[j]
+                duration = self.provider.get_duration(from_addr, to_addr)
+                with self._lock:
+                    self.stats["api_calls"] += 1
+                    if duration is not None:
+                        self.cache.setdefault(from_addr, {})[to_addr] = duration
+                        self._dirty = True
+                    self._pending.pop((from_addr, to_addr)).set()
+                if duration is not None:
+                    matrix[i][j] = duration
+        finally:
+            # 失敗した場合も、待っているスレッドが止まったままにならないようにする
+            with self._lock:
+                for i, j in fetch:
+                    event = self._pending.pop((addresses[i], addresses[j]), None)
+                    if event is not None:
+                        event.set()
+
+        for i, j, event in waits:
+            event.wait()
+            with self._lock:
+                duration = self._lookup(addresses[i], addresses[j])
+            if duration is not None:
+                matrix[i][j] = duration
+        return matrix, hits + len(waits), len(fetch)
+
+    def save(self):
+        """前回の保存から追加された所要時間があれば、キャッシュファイルに保存する"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            atomic_write_json(self.cache_file, self.cache, indent=None)
+            self._dirty = False
+
+class DistanceTable:
+    """計算済みの距離行列（DistanceStore の代わりに TransportOptimizer に渡す）"""
+
+    def __init__(self, addresses, values):
+        """
+        初期化
+
+        Args:
+            addresses: 行列の行・列の住所のリスト（重複しないもの）
+            values: 所要時間（秒）の行列
+        """
+        self.addresses = list(addresses)
+        self.values = np.asarray(values, dtype=float)
+        self.index = {address: i for i, address in enumerate(self.addresses)}
+        self.provider = None
+
+    @classmethod
+    def build(cls, store, addresses):
+        """DistanceStore で住所（重複は除く）の間の行列を計算して作る"""
+        addresses = list(dict.fromkeys(addresses))
+        values, hits, misses = store.matrix(addresses)
+        return cls(addresses, values)
+
+    def matrix(self, addresses):
+        """
+        住所の間の所要時間の行列（DistanceStore.matrix と同じ戻り値。問い合わせはしない）
+
+        住所はすべて行列に含まれている必要がある（含まれていない場合は KeyError）。
+        """
+        positions = [self.index[address] for address in addresses]
+        n = len(positions)
+        return self.values[np.ix_(positions, positions)], n * (n - 1), 0
@@ -0,0 +1,208 @@
+"""
+職員・利用者・車両データのExcelインポート
+
+ExcelファイルをopenpyxlのRead-onlyモードで1行ずつ読み込み（セルオブジェクトを作らず値だけを取り出す）、
+一定行数ごとにまとめて検証してモデルに変換する。不正な行は読み飛ばさずに、
+行番号とエラー内容を ImportResult.errors に記録する。
+
+    result = import_excel(filepath, "user")
+    result.items   # 取り込めた User のリスト
+    result.errors  # [(行番号, エラー内容), ...]
+"""
+
+import datetime
+import itertools
+import uuid
+from models import Staff, User, Vehicle, time_to_minutes
+
+# 1回にまとめて検証する行数
+BATCH_SIZE = 1000
+
+# 曜日として受け付ける値
+WEEKDAYS = ("月", "火", "水", "木", "金", "土", "日")
+
+class ImportResult:
+    """インポート結果（取り込めたデータと、行ごとのエラー）"""
+
+    def __init__(self, data_type):
+        self.data_type = data_type
+        self.items = []  # 取り込めたモデルのリスト
+        self.errors = []  # (行番号, エラー内容) のリスト
+        self.skipped_ids = set()  # エラーで取り込まなかった行のID（IDが入力されていた場合）
+        self.rows = 0  # 読み込んだデータ行数（空行を除く）
+
+    @property
+    def ok(self):
+        """エラーがなかったか"""
+        return not self.errors
+
+    def error_summary(self, limit=20):
+        """エラーの一覧を表示用の文字列にまとめる"""
+        lines = [f"{row}行目: {message}" for row, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"ほか {len(self.errors) - limit} 件")
+        return "\n".join(lines)
+
+def _text(value):
+    """セルの値を文字列に変換（空の場合は空文字）"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.datetime, datetime.time)):
+        return value.strftime("%H:%M")
+    return str(value).strip()
+
+def _days(value, label):
+    """カンマ区切りの曜日（またはリスト）を曜日のリストに変換"""
+    if isinstance(value, (list, tuple)):
+        days = [_text(day) for day in value if _text(day)]
+    else:
+        days = [day.strip() for day in _text(value).split(",") if day.strip()]
+    unknown = [day for day in days if day not in WEEKDAYS]
+    if unknown:
+        raise ValueError(f"{label}に不明な曜日があります: {', '.join(unknown)}")
+    return days
+
+def _time(value, label):
+    """時刻（"H:MM" 形式または時刻セル）を文字列に変換"""
+    text = _text(value)
+    if text and time_to_minutes(text) < 0:
+        raise ValueError(f"{label}の形式が正しくありません（例: 8:30）: {text}")
+    return text
+
+def _flag(value):
+    """「はい」や true などを真偽値に変換"""
+    if isinstance(value, bool):
+        return value
+    return _text(value).lower() in ("はい", "true", "1", "yes")
+
+def _cell(values, index):
+    """行の index 列目の値（列が足りない場合はNone）"""
+    return values[index] if index < len(values) else None
+
+def parse_staff_row(values):
+    """職員データの1行を Staff に変換（不正な場合は ValueError）"""
+    name = _text(_cell(values, 1))
+    if not name:
+        raise ValueError("名前が入力されていません")
+    return Staff(
+        id=_text(_cell(values, 0)) or str(uuid.uuid4()),
+        name=name,
+        can_drive=_flag(_cell(values, 2)),
+        workdays=_days(_cell(values, 3), "勤務曜日")
+    )
+
+def parse_user_row(values):
+    """利用者データの1行を User に変換（不正な場合は ValueError）"""
+    name = _text(_cell(values, 1))
+    address = _text(_cell(values, 2))
+    if not name:
+        raise ValueError("名前が入力されていません")
+    if not address:
+        raise ValueError("住所が入力されていません")
+    return User(
+        id=_text(_cell(values, 0)) or str(uuid.uuid4()),
+        name=name,
+        address=address,
+        pickup_time_morning=_time(_cell(values, 3), "朝-迎え時間"),
+        dropoff_time_morning=_time(_cell(values, 4), "朝-到着時間"),
+        pickup_time_evening=_time(_cell(values, 5), "夕-迎え時間"),
+        dropoff_time_evening=_time(_cell(values, 6), "夕-到着時間"),
+        constraints=_text(_cell(values, 7)),
+        attendance_days=_days(_cell(values, 8), "通所曜日")
+    )
+
+def parse_vehicle_row(values):
+    """車両データの1行を Vehicle に変換（不正な場合は ValueError）"""
+    name = _text(_cell(values, 1))
+    if not name:
+        raise ValueError("車両名が入力されていません")
+    try:
+        capacity = int(_cell(values, 2))
+    except (ValueError, TypeError):
+        raise ValueError(f"乗車可能人数が数値ではありません: {_text(_cell(values, 2))}")
+    if capacity <= 0:
+        raise ValueError("乗車可能人数は1以上の数値を入力してください")
+    return Vehicle(
+        id=_text(_cell(values, 0)) or str(uuid.uuid4()),
+        name=name,
+        capacity=capacity
+    )
+
+# データ型ごとの行の変換関数
+ROW_PARSERS = {
+    "staff": parse_staff_row,
+    "user": parse_user_row,
+    "vehicle": parse_vehicle_row,
+}
+
+def validate_rows(data_type, numbered_rows, result=None, seen_ids=None):
+    """
+    (行番号, 値のタプル) の列を検証してモデルに変換する
+
+    値の並びはExcelの列の順（to_dict のキーの順と同じ）。
+
+    Args:
+        data_type: "staff", "user", "vehicle" のいずれか
+        numbered_rows: (行番号, 値のタプル) のイテラブル
+        result: 結果を追加する ImportResult（Noneの場合は新しく作る）
+        seen_ids: ID重複の検出に使う、これまでに取り込んだIDの集合（分割して検証する場合に共有する）
+
+    Returns:
+        ImportResult
+    """
+    parse_row = ROW_PARSERS[data_type]
+    result = result or ImportResult(data_type)
+    if seen_ids is None:
+        seen_ids = {item.id for item in result.items}
+
+    rows = iter(numbered_rows)
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        for row_number, values in batch:
+            # 空行は読み飛ばす
+            if all(value is None or value == "" for value in values):
+                continue
+            result.rows += 1
+            try:
+                item = parse_row(values)
+            except ValueError as e:
+                result.errors.append((row_number, str(e)))
+                if _text(_cell(values, 0)):
+                    result.skipped_ids.add(_text(_cell(values, 0)))
+                continue
+            if item.id in seen_ids:
+                result.errors.append((row_number, f"IDが重複しています: {item.id}"))
+                continue
+            seen_ids.add(item.id)
+            result.items.append(item)
+
+    return result
+
+def iter_excel_rows(filepath, min_row=2):
+    """
+    Excelファイルの最初のシートの行を (行番号, 値のタプル) として順に返す
+
+    Read-onlyモードで開くので、シート全体をメモリに読み込まない。
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        for row_number, values in enumerate(ws.iter_rows(min_row=min_row, values_only=True), min_row):
+            yield row_number, values
+    finally:
+        wb.close()
+
+def import_excel(filepath, data_type):
+    """
+    Excelファイルから職員・利用者・車両データを読み込む（1行目はヘッダー）
+
+    Returns:
+        ImportResult
+    """
+    if data_type not in ROW_PARSERS:
+        raise ValueError(f"不明なデータ型です: {data_type}")
+    return validate_rows(data_type, iter_excel_rows(filepath))
@@ -0,0 +1,83 @@
+"""
+住所の座標のキャッシュ
+
+地図の作成のたびに住所を検索しないよう、プロバイダー（geocode を持つもの）で
+取得した座標をJSONファイルに保存しておく。まとめて問い合わせる場合は、
+キャッシュにない住所だけを検索し、ファイルへの保存も最後に1回だけ行う。
+
+    cache = GeocodeCache(GoogleDistanceProvider(api_key), "data/geocode_cache.json")
+    coordinates = cache.lookup(addresses)  # {住所: (緯度, 経度)}
+"""
+
+import json
+import os
+import threading
+from data_store import atomic_write_json
+
+class GeocodeCache:
+    """住所から座標への変換結果をファイルに保存するクラス"""
+
+    def __init__(self, provider, cache_file):
+        """
+        初期化
+
+        Args:
+            provider: geocode(住所) で (緯度, 経度) を返すプロバイダー（Noneの場合はキャッシュだけを使う）
+            cache_file: キャッシュファイルのパス
+        """
+        self.provider = provider
+        self.cache_file = cache_file
+        self.coordinates = self._load()
+        self.lookups = 0  # プロバイダーに問い合わせた回数
+        self._lock = threading.Lock()  # 複数のスレッドからの問い合わせとファイルへの保存を直列化
+
+    def _load(self):
+        """キャッシュファイルを読み込む"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return {address: tuple(point) for address, point in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            print(f"座標のキャッシュの読み込みに失敗しました: {e}")
+            return {}
+
+    def get(self, address):
+        """キャッシュにある座標（ない場合はNone。問い合わせはしない）"""
+        return self.coordinates.get(address)
+
+    def lookup(self, addresses):
+        """
+        住所の座標をまとめて取得する
+
+        キャッシュにない住所だけをプロバイダーに問い合わせる。通信できないなどで
+        問い合わせに失敗した場合は、残りの住所は問い合わせずにキャッシュにある分だけを返す。
+
+        Returns:
+            {住所: (緯度, 経度)}（座標が分からない住所は含まない）
+        """
+        addresses = [address for address in dict.fromkeys(addresses) if address]
+
+        with self._lock:
+            missing = [address for address in addresses if address not in self.coordinates]
+            added = False
+            if missing and self.provider is not None:
+                for address in missing:
+                    try:
+                        self.lookups += 1
+                        point = self.provider.geocode(address)
+                    except Exception as e:
+                        print(f"住所の検索に失敗しました（残りの住所はキャッシュだけを使います）: {e}")
+                        break
+                    if point is not None:
+                        self.coordinates[address] = tuple(point)
+                        added = True
+            if added:
+                self._save()
+        return {address: self.coordinates[address] for address in addresses if address in self.coordinates}
+
+    def _save(self):
+        """キャッシュファイルに保存（_lock を取得した状態で呼ぶ）"""
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        atomic_write_json(self.cache_file, {address: list(point) for address, point in self.coordinates.items()},
+                          indent=None)
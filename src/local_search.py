@@ -0,0 +1,339 @@
+"""
+NumPyによるルートの局所探索（2-opt、Or-opt、ルート間の移動・交換）
+
+ルートは距離行列のノード番号のリスト（0 は施設なので含めない）で表し、
+施設を出て順に回り施設に戻るまでの移動時間の合計を小さくする。
+近傍ごとに、すべての移動の改善量を距離行列から配列演算でまとめて計算し、
+最も改善する移動を適用することを、改善する移動がなくなるまで繰り返す。
+距離行列は非対称でもよい（2-optで向きが変わる区間の移動時間も計算に含める）。
+
+- 2-opt: ルート内の区間を反転する
+- Or-opt: ルート内の1〜3人の連続した区間を別の位置に移す
+- 移動（relocate）: 1人を別のルートの任意の位置に移す（移動先の定員を超えない場合）
+- 交換（exchange）: 別のルートの2人を入れ替える
+
+同じ住所の利用者を1つのノードにまとめた場合は、ノードごとの人数（demands）を渡すと、
+定員をノードの数ではなく人数で判定する。
+
+OR-Toolsなどで作った計画の改善（improve）にも、OR-Toolsを使わない単独の解法（solve）にも使える。
+
+    routes = improve(matrix, routes, capacities)      # 既存の計画を改善
+    routes, unassigned = solve(matrix, capacities)    # 最近傍法の初期解から改善
+"""
+
+import time
+import numpy as np
+
+# 改善とみなす最小の改善量（浮動小数点の誤差で同じ移動を繰り返さないようにする）
+EPSILON = 1e-6
+
+# improve / solve の既定の制限時間（秒）
+DEFAULT_TIME_LIMIT = 1.0
+
+# Or-optで移す区間の最大の長さ
+OR_OPT_MAX_LENGTH = 3
+
+def _tour(route):
+    """施設を両端に加えた巡回のノード番号の配列"""
+    return np.asarray([0] + list(route) + [0], dtype=np.intp)
+
+def route_cost(matrix, route):
+    """ルート（施設を出て戻るまで）の移動時間の合計"""
+    if not route:
+        return 0.0
+    tour = _tour(route)
+    return float(np.asarray(matrix)[tour[:-1], tour[1:]].sum())
+
+def plan_cost(matrix, routes):
+    """計画全体の移動時間の合計"""
+    return sum(route_cost(matrix, route) for route in routes)
+
+# ---- ルート内の近傍 ----
+
+def best_two_opt(matrix, route):
+    """
+    最も改善する2-optの移動
+
+    Returns:
+        (改善量（負の値）, i, j)。route[i:j] を反転する。改善する移動がない場合はNone
+    """
+    tour = _tour(route)
+    m = len(tour)
+    if m < 4:
+        return None
+
+    forward = matrix[tour[:-1], tour[1:]]  # forward[k] = d(tour[k], tour[k+1])
+    backward = matrix[tour[1:], tour[:-1]]  # backward[k] = d(tour[k+1], tour[k])
+    forward_sum = np.concatenate(([0.0], np.cumsum(forward)))
+    backward_sum = np.concatenate(([0.0], np.cumsum(backward)))
+
+    # 辺 i と辺 j（i + 2 <= j）を付け替え、間の tour[i+1..j] を反転する
+    i = np.arange(m - 1)[:, None]
+    j = np.arange(m - 1)[None, :]
+    inner_i = np.minimum(i + 1, m - 1)
+    delta = (matrix[tour[i], tour[j]] + matrix[tour[inner_i], tour[np.minimum(j + 1, m - 1)]]
+             - forward[i] - forward[j]
+             + (backward_sum[j] - backward_sum[inner_i]) - (forward_sum[j] - forward_sum[inner_i]))
+    delta = np.where(j >= i + 2, delta, np.inf)
+
+    best = np.unravel_index(np.argmin(delta), delta.shape)
+    if delta[best] >= -EPSILON:
+        return None
+    return float(delta[best]), int(best[0]), int(best[1])
+
+def apply_two_opt(route, i, j):
+    """2-optの移動を適用したルート"""
+    return route[:i] + route[i:j][::-1] + route[j:]
+
+def best_or_opt(matrix, route, max_length=OR_OPT_MAX_LENGTH):
+    """
+    最も改善するOr-optの移動
+
+    Returns:
+        (改善量（負の値）, 区間の先頭, 区間の長さ, 挿入する辺)。位置は施設を含めた巡回での位置。
+        改善する移動がない場合はNone
+    """
+    tour = _tour(route)
+    n = len(route)
+    best = None
+    for length in range(1, min(max_length, n - 1) + 1):
+        # 区間 tour[s..s+length-1] を外し、その前後を直接つなぐ
+        s = np.arange(1, n - length + 2)
+        first, last = tour[s], tour[s + length - 1]
+        before, after = tour[s - 1], tour[s + length]
+        removal = matrix[before, first] + matrix[last, after] - matrix[before, after]
+
+        # 区間に接していない辺 (tour[p], tour[p+1]) の間に挿入する
+        p = np.arange(n + 1)[None, :]
+        insertion = (matrix[tour[p], first[:, None]] + matrix[last[:, None], tour[p + 1]]
+                     - matrix[tour[p], tour[p + 1]])
+        valid = (p < (s - 1)[:, None]) | (p >= (s + length)[:, None])
+        delta = np.where(valid, insertion - removal[:, None], np.inf)
+
+        k = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[k] < -EPSILON and (best is None or delta[k] < best[0]):
+            best = (float(delta[k]), int(s[k[0]]), length, int(k[1]))
+    return best
+
+def apply_or_opt(route, start, length, edge):
+    """Or-optの移動を適用したルート"""
+    tour = [0] + list(route) + [0]
+    segment = tour[start:start + length]
+    if edge < start:
+        tour = tour[:edge + 1] + segment + tour[edge + 1:start] + tour[start + length:]
+    else:
+        tour = tour[:start] + tour[start + length:edge + 1] + segment + tour[edge + 1:]
+    return tour[1:-1]
+
+def optimize_route(matrix, route, deadline=None):
+    """ルート内の2-optとOr-optを、改善する移動がなくなるまで適用したルート"""
+    route = list(route)
+    while deadline is None or time.perf_counter() < deadline:
+        move = best_two_opt(matrix, route)
+        if move is not None:
+            route = apply_two_opt(route, move[1], move[2])
+            continue
+        move = best_or_opt(matrix, route)
+        if move is None:
+            break
+        route = apply_or_opt(route, *move[1:])
+    return route
+
+# ---- ルート間の近傍 ----
+
+def _plan_arrays(routes):
+    """
+    計画の全員と全辺の配列
+
+    Returns:
+        (nodes, node_route, node_pos, prev, next, edge_from, edge_to, edge_route, edge_pos)
+        node_pos はルート内の位置、edge_pos は辺の前の端のルート内の位置（施設なら-1）
+    """
+    nodes, node_route, node_pos, prev, nxt = [], [], [], [], []
+    edge_from, edge_to, edge_route, edge_pos = [], [], [], []
+    for r, route in enumerate(routes):
+        tour = [0] + list(route) + [0]
+        for k, node in enumerate(route):
+            nodes.append(node)
+            node_route.append(r)
+            node_pos.append(k)
+            prev.append(tour[k])
+            nxt.append(tour[k + 2])
+        for k in range(len(tour) - 1):
+            edge_from.append(tour[k])
+            edge_to.append(tour[k + 1])
+            edge_route.append(r)
+            edge_pos.append(k - 1)
+    return tuple(np.asarray(values, dtype=np.intp) for values in
+                 (nodes, node_route, node_pos, prev, nxt, edge_from, edge_to, edge_route, edge_pos))
+
+def best_inter_route_move(matrix, routes, capacities, home=None, move_penalty=0.0, demands=None):
+    """
+    最も改善するルート間の移動（relocate または exchange）
+
+    Args:
+        matrix: 距離行列
+        routes: ルートのリスト
+        capacities: ルートごとの定員
+        home: ノード番号 -> 元のルートの番号（車両の変更を抑える場合）
+        move_penalty: 利用者を元のルート以外に移すたびに加える移動時間（元に戻す場合は差し引く）
+        demands: ノード番号ごとの人数の配列（Noneの場合はすべて1人）
+
+    Returns:
+        ("relocate", 改善量, 移動元ルート, 移動元の位置, 移動先ルート, 挿入する位置) または
+        ("exchange", 改善量, ルートA, Aの位置, ルートB, Bの位置)。改善する移動がない場合はNone
+    """
+    (nodes, node_route, node_pos, prev, nxt,
+     edge_from, edge_to, edge_route, edge_pos) = _plan_arrays(routes)
+    if len(nodes) == 0 or len(routes) < 2:
+        return None
+
+    # 1人を外したときに短くなる時間と、その人の前後の辺の時間
+    around = matrix[prev, nodes] + matrix[nodes, nxt]
+    removal = around - matrix[prev, nxt]
+    best = None
+
+    # 元のルートを離れている利用者の数の変化に応じた罰則
+    if home is not None and move_penalty:
+        home_route = np.asarray([home.get(int(node), -1) for node in nodes], dtype=np.intp)
+        away = (node_route != home_route).astype(float)
+    else:
+        home_route, away, move_penalty = None, None, 0.0
+
+    # relocate: 利用者 × 辺（別のルートで、定員に空きがあるもの）
+    if demands is None:
+        room = np.asarray([len(route) < capacity for route, capacity in zip(routes, capacities)])
+        fits = room[edge_route][None, :]
+    else:
+        demands = np.asarray(demands)
+        spare = np.asarray(capacities) - np.asarray([demands[route].sum() for route in routes])
+        fits = demands[nodes][:, None] <= spare[edge_route][None, :]
+    insertion = (matrix[edge_from[None, :], nodes[:, None]] + matrix[nodes[:, None], edge_to[None, :]]
+                 - matrix[edge_from, edge_to][None, :])
+    valid = (node_route[:, None] != edge_route[None, :]) & fits
+    delta = insertion - removal[:, None]
+    if home_route is not None:
+        delta += move_penalty * ((edge_route[None, :] != home_route[:, None]) - away[:, None])
+    delta = np.where(valid, delta, np.inf)
+    u, e = np.unravel_index(np.argmin(delta), delta.shape)
+    if delta[u, e] < -EPSILON:
+        best = ("relocate", float(delta[u, e]), int(node_route[u]), int(node_pos[u]),
+                int(edge_route[e]), int(edge_pos[e]) + 1)
+
+    # exchange: 利用者 × 利用者（別のルート）。u の位置に v を、v の位置に u を入れる
+    v_in_u = matrix[prev[:, None], nodes[None, :]] + matrix[nodes[None, :], nxt[:, None]] - around[:, None]
+    delta = v_in_u + v_in_u.T
+    if home_route is not None:
+        moved_away = (node_route[None, :] != home_route[:, None]) - away[:, None]
+        delta += move_penalty * (moved_away + moved_away.T)
+    valid = node_route[:, None] != node_route[None, :]
+    if demands is not None:
+        # 入れ替えた後も両方のルートが定員を超えないこと（u のルートの空き >= v の人数 - u の人数）
+        gain = demands[nodes][None, :] - demands[nodes][:, None]
+        valid &= (gain <= spare[node_route][:, None]) & (-gain <= spare[node_route][None, :])
+    delta = np.where(valid, delta, np.inf)
+    u, v = np.unravel_index(np.argmin(delta), delta.shape)
+    if delta[u, v] < -EPSILON and (best is None or delta[u, v] < best[1]):
+        best = ("exchange", float(delta[u, v]), int(node_route[u]), int(node_pos[u]),
+                int(node_route[v]), int(node_pos[v]))
+    return best
+
+def apply_inter_route_move(routes, move):
+    """ルート間の移動を適用する（routes を直接変更する）"""
+    kind, _, a, i, b, j = move
+    if kind == "relocate":
+        node = routes[a].pop(i)
+        routes[b].insert(j, node)
+    else:
+        routes[a][i], routes[b][j] = routes[b][j], routes[a][i]
+    return a, b
+
+# ---- 計画の改善と単独の解法 ----
+
+def improve(matrix, routes, capacities=None, time_limit=DEFAULT_TIME_LIMIT,
+            move_penalty=0.0, max_moves=None, demands=None):
+    """
+    計画を局所探索で改善する
+
+    Args:
+        matrix: 距離行列（0 は施設）
+        routes: ルート（ノード番号のリスト）のリスト
+        capacities: ルートごとの定員（Noneの場合は制限しない）
+        time_limit: 制限時間（秒。Noneの場合は改善する移動がなくなるまで）
+        move_penalty: 利用者を元のルートから別のルートに移すときの罰則（移動時間と同じ単位）。
+            車両の変更による改善量がこれを超える場合だけ移す
+        max_moves: ルート間の移動・交換の最大回数（Noneの場合は制限しない）
+        demands: ノード番号ごとの人数（Noneの場合はすべて1人）
+
+    Returns:
+        改善したルートのリスト（ルートの数と順序は変えない）
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    routes = [list(route) for route in routes]
+    if capacities is None:
+        capacities = [sum(len(route) for route in routes) if demands is None
+                      else sum(demands[node] for route in routes for node in route)] * len(routes)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    home = {node: r for r, route in enumerate(routes) for node in route} if move_penalty else None
+    moves = 0
+
+    routes = [optimize_route(matrix, route, deadline) for route in routes]
+    while deadline is None or time.perf_counter() < deadline:
+        if max_moves is not None and moves >= max_moves:
+            break
+        move = best_inter_route_move(matrix, routes, capacities, home, move_penalty, demands)
+        if move is None:
+            break
+        moves += 1
+        for r in apply_inter_route_move(routes, move):
+            routes[r] = optimize_route(matrix, routes[r], deadline)
+    return routes
+
+def nearest_neighbor(matrix, capacities, nodes=None):
+    """
+    最近傍法の初期解（車両ごとに、直前の地点から最も近い人を定員まで順に乗せる）
+
+    Returns:
+        (ルートのリスト, 割り当てられなかったノードのリスト)
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    nodes = list(range(1, len(matrix))) if nodes is None else list(nodes)
+    remaining = np.asarray(nodes, dtype=np.intp)
+    routes = []
+    for capacity in capacities:
+        route = []
+        current = 0
+        while len(route) < capacity and len(remaining):
+            k = int(np.argmin(matrix[current, remaining]))
+            current = int(remaining[k])
+            route.append(current)
+            remaining = np.delete(remaining, k)
+        routes.append(route)
+    return routes, [int(node) for node in remaining]
+
+def solve(matrix, capacities, nodes=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    OR-Toolsを使わずに計画を作る（最近傍法の初期解を局所探索で改善）
+
+    Args:
+        matrix: 距離行列（0 は施設）
+        capacities: 車両ごとの定員
+        nodes: 回るノード番号（Noneの場合は施設以外のすべて）
+        time_limit: 改善の制限時間（秒）
+
+    Returns:
+        (ルートのリスト, 定員が足りず割り当てられなかったノードのリスト)
+    """
+    routes, unassigned = nearest_neighbor(matrix, capacities, nodes)
+    return improve(matrix, routes, capacities, time_limit), unassigned
+
+def solve_tour(matrix, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    1台で全員を回る巡回（施設 0 から出て戻る）のノード番号のリスト
+
+    Returns:
+        [0, ..., 0]（OR-Toolsの解と同じ形式）
+    """
+    routes, _ = solve(matrix, [len(matrix)], time_limit=time_limit)
+    return [0] + routes[0] + [0]
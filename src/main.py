@@ -1,66 +1,88 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+import threading
+import time
 import uuid
 from models import Staff, User, Vehicle
+from data_store import DataStore
+from repository import Repository
+from run_history import RunHistoryStore
+from profiling import profiler
 from ui.staff_frame import StaffFrame
 from ui.user_frame import UserFrame
 from ui.vehicle_frame import VehicleFrame
 from ui.schedule_frame import ScheduleFrame
 from ui.settings_frame import SettingsFrame
-from ui.export_manager import ExportManager
+
+# タブ（フレームの属性名, 表示名, フレームのクラス）。フレームはタブを初めて選択したときに作成する
+TABS = [
+    ("staff_frame", "職員", StaffFrame),
+    ("user_frame", "利用者", UserFrame),
+    ("vehicle_frame", "車両", VehicleFrame),
+    ("schedule_frame", "送迎スケジュール", ScheduleFrame),
+    ("settings_frame", "設定", SettingsFrame),
+]
 
 class TransportApp:
     """送迎スケジューリングアプリケーション"""
     
-    def __init__(self, root):
+    def __init__(self, root, data_dir=None):
+        """
+        初期化
+        
+        ウィンドウはデータの読み込みを待たずに表示する。データはバックグラウンドで読み込み、
+        読み込みが終わると data_ready をセットして "<<DataReady>>" イベントを発生させる。
+        
+        Args:
+            root: メインウィンドウ
+            data_dir: データを保存するディレクトリ（Noneの場合はアプリと同じ場所の data）
+        """
         self.root = root
         self.root.title("これで送迎")
         self.root.geometry("1000x700")
+        self.started_at = time.perf_counter()
         
         # データを保存するディレクトリ
-        self.data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-        os.makedirs(self.data_dir, exist_ok=True)
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+        self.data_store = DataStore(self.data_dir)
+        
+        # 最適化の実行履歴
+        self.run_history = RunHistoryStore(os.path.join(self.data_dir, "run_history.jsonl"))
         
         # データファイルのパス
-        self.staff_file = os.path.join(self.data_dir, "staff.json")
-        self.users_file = os.path.join(self.data_dir, "users.json")
-        self.vehicles_file = os.path.join(self.data_dir, "vehicles.json")
-        self.settings_file = os.path.join(self.data_dir, "settings.json")
-        
-        # データの初期化
-        self.staff_list = []
-        self.user_list = []
-        self.vehicle_list = []
+        self.staff_file = self.data_store.staff_file
+        self.users_file = self.data_store.users_file
+        self.vehicles_file = self.data_store.vehicles_file
+        self.settings_file = self.data_store.settings_file
+        
+        # データの初期化（IDと曜日の索引付きリポジトリ。追加・更新・削除はジャーナルにも記録される）
+        self.staff_repository = Repository("staff", days_attr="workdays", data_store=self.data_store)
+        self.user_repository = Repository("user", days_attr="attendance_days", data_store=self.data_store)
+        self.vehicle_repository = Repository("vehicle", data_store=self.data_store)
         self.settings = {
             "workdays": ["月", "火", "水", "木", "金", "土"],
             "api_key": "",
             "facility_address": ""
         }
         
-        # 保存されたデータを読み込む
-        self.load_data()
+        # エクスポートマネージャー（openpyxlの読み込みを避けるため初回使用時に作成）
+        self._export_manager = None
         
-        # エクスポートマネージャーの初期化
-        self.export_manager = ExportManager(self)
+        # データの読み込みの状態
+        self.data_ready = threading.Event()  # 読み込んだデータを反映したらセットする
+        self.load_errors = []  # 読み込みに失敗したデータの警告メッセージ
+        self.ready_seconds = None  # 起動からデータを反映するまでの時間（秒）
         
-        # タブコントロール
+        # タブコントロール（各タブには、フレームを作成するまで読み込み中の表示を置く）
         self.tab_control = ttk.Notebook(root)
-        
-        # 各タブのフレーム
-        self.staff_frame = StaffFrame(self.tab_control, self)
-        self.user_frame = UserFrame(self.tab_control, self)
-        self.vehicle_frame = VehicleFrame(self.tab_control, self)
-        self.schedule_frame = ScheduleFrame(self.tab_control, self)
-        self.settings_frame = SettingsFrame(self.tab_control, self)
-        
-        # タブの追加
-        self.tab_control.add(self.staff_frame, text="職員")
-        self.tab_control.add(self.user_frame, text="利用者")
-        self.tab_control.add(self.vehicle_frame, text="車両")
-        self.tab_control.add(self.schedule_frame, text="送迎スケジュール")
-        self.tab_control.add(self.settings_frame, text="設定")
+        self.tab_containers = []
+        for attr, text, frame_class in TABS:
+            container = ttk.Frame(self.tab_control)
+            ttk.Label(container, text="データを読み込んでいます…", foreground="gray").pack(expand=True)
+            self.tab_control.add(container, text=text)
+            self.tab_containers.append(container)
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         self.tab_control.pack(expand=1, fill="both")
         
@@ -70,63 +92,159 @@ class TransportApp:
         
         # 終了時にデータを保存
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # 保存されたデータをバックグラウンドで読み込む
+        self._load_thread = threading.Thread(target=self.load_data, name="load-data", daemon=True)
+        self._load_thread.start()
+        self.root.after(20, self._check_data_loaded)
+    
+    @property
+    def staff_list(self):
+        """職員の一覧（変更は staff_repository を通して行う）"""
+        return self.staff_repository.all()
     
+    @staff_list.setter
+    def staff_list(self, staff_list):
+        self.staff_repository.replace_all(staff_list)
+    
+    @property
+    def user_list(self):
+        """利用者の一覧（変更は user_repository を通して行う）"""
+        return self.user_repository.all()
+    
+    @user_list.setter
+    def user_list(self, user_list):
+        self.user_repository.replace_all(user_list)
+    
+    @property
+    def vehicle_list(self):
+        """車両の一覧（変更は vehicle_repository を通して行う）"""
+        return self.vehicle_repository.all()
+    
+    @vehicle_list.setter
+    def vehicle_list(self, vehicle_list):
+        self.vehicle_repository.replace_all(vehicle_list)
+    
+    @property
+    def export_manager(self):
+        """エクスポートマネージャー（初回使用時に作成）"""
+        if self._export_manager is None:
+            from ui.export_manager import ExportManager
+            self._export_manager = ExportManager(self)
+        return self._export_manager
+    
+    @profiler.timed("app.load_data")
     def load_data(self):
-        """保存されたデータを読み込む"""
+        """
+        保存されたデータを読み込む（バックグラウンドのスレッドで実行される）
+        
+        フレームはデータを反映するまで作成しないので、リポジトリのリスナーはまだ登録されていない。
+        メッセージボックスはメインスレッドでしか表示できないので、警告は load_errors に記録する。
+        """
         # 職員データ
-        if os.path.exists(self.staff_file):
-            try:
-                with open(self.staff_file, 'r', encoding='utf-8') as f:
-                    staff_data = json.load(f)
-                    self.staff_list = [Staff(**data) for data in staff_data]
-            except Exception as e:
-                messagebox.showwarning("警告", f"職員データの読み込みに失敗しました: {str(e)}")
+        try:
+            staff_list = self.data_store.load_staff()
+            if staff_list is not None:
+                self.staff_list = staff_list
+        except Exception as e:
+            self.load_errors.append(f"職員データの読み込みに失敗しました: {str(e)}")
         
         # 利用者データ
-        if os.path.exists(self.users_file):
-            try:
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    user_data = json.load(f)
-                    self.user_list = [User(**data) for data in user_data]
-            except Exception as e:
-                messagebox.showwarning("警告", f"利用者データの読み込みに失敗しました: {str(e)}")
+        try:
+            user_list = self.data_store.load_users()
+            if user_list is not None:
+                self.user_list = user_list
+        except Exception as e:
+            self.load_errors.append(f"利用者データの読み込みに失敗しました: {str(e)}")
         
         # 車両データ
-        if os.path.exists(self.vehicles_file):
-            try:
-                with open(self.vehicles_file, 'r', encoding='utf-8') as f:
-                    vehicle_data = json.load(f)
-                    self.vehicle_list = [Vehicle(**data) for data in vehicle_data]
-            except Exception as e:
-                messagebox.showwarning("警告", f"車両データの読み込みに失敗しました: {str(e)}")
+        try:
+            vehicle_list = self.data_store.load_vehicles()
+            if vehicle_list is not None:
+                self.vehicle_list = vehicle_list
+        except Exception as e:
+            self.load_errors.append(f"車両データの読み込みに失敗しました: {str(e)}")
         
         # 設定データ
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    self.settings = json.load(f)
-            except Exception as e:
-                messagebox.showwarning("警告", f"設定データの読み込みに失敗しました: {str(e)}")
-    
-    def save_all_data(self):
-        """すべてのデータを保存"""
         try:
-            # 職員データ
-            with open(self.staff_file, 'w', encoding='utf-8') as f:
-                json.dump([staff.to_dict() for staff in self.staff_list], f, ensure_ascii=False, indent=2)
-            
-            # 利用者データ
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump([user.to_dict() for user in self.user_list], f, ensure_ascii=False, indent=2)
-            
-            # 車両データ
-            with open(self.vehicles_file, 'w', encoding='utf-8') as f:
-                json.dump([vehicle.to_dict() for vehicle in self.vehicle_list], f, ensure_ascii=False, indent=2)
-            
-            # 設定データ
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
-            
+            settings = self.data_store.load_settings()
+            if settings is not None:
+                self.settings = settings
+        except Exception as e:
+            self.load_errors.append(f"設定データの読み込みに失敗しました: {str(e)}")
+    
+    def _check_data_loaded(self):
+        """データの読み込みが終わったかを確認"""
+        if self._load_thread.is_alive():
+            self.root.after(20, self._check_data_loaded)
+            return
+        self.on_data_loaded()
+    
+    def wait_for_data(self):
+        """データの読み込みが終わるまで待って反映する（読み込み中に保存や終了をする場合）"""
+        self._load_thread.join()
+        self.on_data_loaded()
+    
+    def on_data_loaded(self):
+        """読み込んだデータを画面に反映する（メインスレッドで実行される）"""
+        if self.data_ready.is_set():
+            return
+        self.data_ready.set()
+        
+        # 選択中のタブのフレームを作成する
+        self.on_tab_changed()
+        self.ready_seconds = time.perf_counter() - self.started_at
+        profiler.emit("span", "app.time_to_interactive", duration_ms=round(self.ready_seconds * 1000, 3),
+                      users=len(self.user_repository), staff=len(self.staff_repository))
+        self.root.event_generate("<<DataReady>>", when="tail")
+        
+        for message in self.load_errors:
+            messagebox.showwarning("警告", message)
+    
+    def on_tab_changed(self, event=None):
+        """タブが選択されたとき（データの読み込みが終わっていれば、フレームを作成する）"""
+        if self.data_ready.is_set():
+            self.build_tab(self.tab_control.index("current"))
+    
+    @profiler.timed("app.build_tab")
+    def build_tab(self, index):
+        """
+        タブのフレームを作成する（作成済みの場合は何もしない）
+        
+        作成したフレームは TABS の属性名（staff_frame など）でアクセスできる。
+        
+        Returns:
+            タブのフレーム
+        """
+        attr, text, frame_class = TABS[index]
+        if hasattr(self, attr):
+            return getattr(self, attr)
+        container = self.tab_containers[index]
+        for child in container.winfo_children():
+            child.destroy()
+        frame = frame_class(container, self)
+        frame.pack(expand=1, fill="both")
+        setattr(self, attr, frame)
+        return frame
+    
+    def save_all_data(self, full=False):
+        """
+        すべてのデータを保存
+        
+        職員・利用者・車両の追加・更新・削除は編集のたびにジャーナルに記録されているので、
+        通常は設定を記録して未書き出しの変更を追記するだけで済む。
+        
+        Args:
+            full: Trueの場合は全件をスナップショットとして書き直す（インポートなどで一覧を置き換えた場合）
+        """
+        # 読み込み前の既定値で保存したデータを上書きしないよう、読み込みを待つ
+        self.wait_for_data()
+        try:
+            if full:
+                self.data_store.save_all(self.staff_list, self.user_list, self.vehicle_list, self.settings)
+            else:
+                self.data_store.record_settings(self.settings)
+                self.data_store.flush()
             messagebox.showinfo("保存完了", "すべてのデータが保存されました。")
         except Exception as e:
             messagebox.showerror("エラー", f"データの保存中にエラーが発生しました: {str(e)}")
@@ -135,11 +253,14 @@ class TransportApp:
         """アプリケーション終了時の処理"""
         if messagebox.askokcancel("終了確認", "変更を保存して終了しますか？"):
             self.save_all_data()
+            # ジャーナルをスナップショットに統合してから終了する
+            self.data_store.close()
             self.root.destroy()
 
 def create_sample_data(app):
     """サンプルデータの作成"""
-    # すでにデータがある場合は作成しない
+    # すでにデータがある場合は作成しない（保存されたデータの読み込みを待ってから確認する）
+    app.wait_for_data()
     if app.staff_list or app.user_list or app.vehicle_list:
         return
     
@@ -191,7 +312,7 @@ def create_sample_data(app):
     }
     
     # データを保存
-    app.save_all_data()
+    app.save_all_data(full=True)
     
     messagebox.showinfo("サンプルデータ", "サンプルデータが作成されました。")
 
@@ -1,11 +1,39 @@
+def time_to_minutes(value):
+    """"H:MM" 形式の時刻を0時からの分数に変換（空または不正な場合は-1）"""
+    if not value:
+        return -1
+    try:
+        hour, minute = value.split(":")
+        return int(hour) * 60 + int(minute)
+    except (ValueError, AttributeError):
+        return -1
+
+def minutes_to_time(minutes):
+    """0時からの分数を "HH:MM" 形式の時刻に変換（-1の場合は空文字）"""
+    if minutes < 0:
+        return ""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 class Staff:
     """職員を表すクラス"""
+    __slots__ = ("id", "name", "can_drive", "workdays")
+
     def __init__(self, id=None, name="", can_drive=False, workdays=None, **kwargs):
         self.id = id  # 自動生成されるID
         self.name = name  # 名前
         self.can_drive = can_drive  # 運転可能かどうか
         self.workdays = workdays or []  # 勤務日 (例: ["月", "火", "水", "木", "金"])
-    
+
+    @classmethod
+    def from_dict(cls, data):
+        """辞書から作成（to_dict の逆変換）"""
+        staff = cls.__new__(cls)
+        staff.id = data.get("id")
+        staff.name = data.get("name", "")
+        staff.can_drive = data.get("can_drive", False)
+        staff.workdays = data.get("workdays") or []
+        return staff
+
     def to_dict(self):
         """辞書形式に変換"""
         return {
@@ -17,8 +45,11 @@ class Staff:
 
 class User:
     """利用者を表すクラス"""
-    def __init__(self, id=None, name="", address="", pickup_time_morning="", 
-                 dropoff_time_morning="", pickup_time_evening="", 
+    __slots__ = ("id", "name", "address", "pickup_time_morning", "dropoff_time_morning",
+                 "pickup_time_evening", "dropoff_time_evening", "constraints", "attendance_days")
+
+    def __init__(self, id=None, name="", address="", pickup_time_morning="",
+                 dropoff_time_morning="", pickup_time_evening="",
                  dropoff_time_evening="", constraints="", attendance_days=None, **kwargs):
         self.id = id  # 自動生成されるID
         self.name = name  # 名前
@@ -29,7 +60,22 @@ class User:
         self.dropoff_time_evening = dropoff_time_evening  # 夕方の到着時間
         self.constraints = constraints  # 制約条件（特記事項）
         self.attendance_days = attendance_days or []  # 通所日
-    
+
+    @classmethod
+    def from_dict(cls, data):
+        """辞書から作成（to_dict の逆変換）"""
+        user = cls.__new__(cls)
+        user.id = data.get("id")
+        user.name = data.get("name", "")
+        user.address = data.get("address", "")
+        user.pickup_time_morning = data.get("pickup_time_morning", "")
+        user.dropoff_time_morning = data.get("dropoff_time_morning", "")
+        user.pickup_time_evening = data.get("pickup_time_evening", "")
+        user.dropoff_time_evening = data.get("dropoff_time_evening", "")
+        user.constraints = data.get("constraints", "")
+        user.attendance_days = data.get("attendance_days") or []
+        return user
+
     def to_dict(self):
         """辞書形式に変換"""
         return {
@@ -46,11 +92,22 @@ class User:
 
 class Vehicle:
     """車両を表すクラス"""
+    __slots__ = ("id", "name", "capacity")
+
     def __init__(self, id=None, name="", capacity=0, **kwargs):
         self.id = id  # 自動生成されるID
         self.name = name  # 車名
         self.capacity = capacity  # 乗車可能人数（利用者）
-    
+
+    @classmethod
+    def from_dict(cls, data):
+        """辞書から作成（to_dict の逆変換）"""
+        vehicle = cls.__new__(cls)
+        vehicle.id = data.get("id")
+        vehicle.name = data.get("name", "")
+        vehicle.capacity = data.get("capacity", 0)
+        return vehicle
+
     def to_dict(self):
         """辞書形式に変換"""
         return {
@@ -61,11 +118,31 @@ class Vehicle:
 
 class RouteStop:
     """ルート上の停車地点を表すクラス"""
+    __slots__ = ("user", "is_pickup", "minutes")
+
     def __init__(self, user=None, is_pickup=True, time=""):
         self.user = user  # 利用者
         self.is_pickup = is_pickup  # 迎えか送りか
         self.time = time  # 時間
-    
+
+    @property
+    def time(self):
+        """時間（"HH:MM" 形式、内部では0時からの分数で保持）"""
+        return minutes_to_time(self.minutes)
+
+    @time.setter
+    def time(self, value):
+        self.minutes = time_to_minutes(value)
+
+    @classmethod
+    def from_dict(cls, data, users_by_id):
+        """辞書から作成（利用者はIDから解決する）"""
+        stop = cls.__new__(cls)
+        stop.user = users_by_id.get(data.get("user_id"))
+        stop.is_pickup = data.get("is_pickup", True)
+        stop.minutes = time_to_minutes(data.get("time", ""))
+        return stop
+
     def to_dict(self):
         """辞書形式に変換"""
         return {
@@ -76,7 +153,9 @@ class RouteStop:
 
 class Route:
     """送迎ルートを表すクラス"""
-    def __init__(self, id=None, vehicle=None, driver=None, assistant=None, 
+    __slots__ = ("id", "vehicle", "driver", "assistant", "stops", "date", "is_morning")
+
+    def __init__(self, id=None, vehicle=None, driver=None, assistant=None,
                  stops=None, date=None, is_morning=True):
         self.id = id  # 自動生成されるID
         self.vehicle = vehicle  # 車両
@@ -85,7 +164,20 @@ class Route:
         self.stops = stops or []  # 停車地点のリスト
         self.date = date  # 日付
         self.is_morning = is_morning  # 朝か夕方か
-    
+
+    @classmethod
+    def from_dict(cls, data, users_by_id, vehicles_by_id, staff_by_id):
+        """辞書から作成（利用者・車両・職員はIDから解決する）"""
+        return cls(
+            id=data.get("id"),
+            vehicle=vehicles_by_id.get(data.get("vehicle_id")),
+            driver=staff_by_id.get(data.get("driver_id")),
+            assistant=staff_by_id.get(data.get("assistant_id")),
+            stops=[RouteStop.from_dict(stop, users_by_id) for stop in data.get("stops", [])],
+            date=data.get("date"),
+            is_morning=data.get("is_morning", True)
+        )
+
     def to_dict(self):
         """辞書形式に変換"""
         return {
@@ -96,4 +188,4 @@ class Route:
             "stops": [stop.to_dict() for stop in self.stops],
             "date": self.date,
             "is_morning": self.is_morning
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,261 @@
+"""
+複数施設の送迎計画
+
+複数の施設（出発・到着地点）の送迎ルートを1つのプロセスで作る。距離のキャッシュは
+DistanceStore を全施設で共有するので、近くの施設が同じ区間を使う場合も問い合わせは1回で済む。
+施設ごとの最適化はスレッドで並行して行う（所要時間の問い合わせを待つ間にほかの施設を進められる）。
+
+車両を施設間で共有する場合は、曜日ごとに、利用者数に対して定員の足りない施設から順に車両を割り当てる。
+
+    store = DistanceStore(GoogleDistanceProvider(api_key), "data/distance_matrix_cache.json")
+    planner = MultiFacilityPlanner([Facility("本館", address, users, staff, vehicles), ...], store,
+                                   shared_vehicles=vehicles)
+    result = planner.plan()
+    result.routes["本館"]  # 施設ごとの1週間分のルート
+    store.save()
+
+コマンドラインから、施設ごとのデータディレクトリの内容で計画できる。
+
+    python src/multi_facility.py --config facilities.json
+
+設定ファイルの形式（JSON。相対パスは設定ファイルの場所から解決する）:
+    {"facilities": [{"name": "本館", "data_dir": "honkan"}, {"name": "分館", "data_dir": "bunkan"}],
+     "cache_dir": "shared",
+     "shared_vehicles": true}
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 同時に最適化する施設の数の上限
+DEFAULT_MAX_WORKERS = 4
+
+class Facility:
+    """1つの施設の計画の入力"""
+
+    def __init__(self, name, facility_address, users, staff, vehicles, workdays=None):
+        """
+        初期化
+
+        Args:
+            name: 施設の名前（結果のキー）
+            facility_address: 施設の住所
+            users: 利用者のリスト
+            staff: 職員のリスト
+            vehicles: 施設の車両のリスト（車両を共有する場合は使わない）
+            workdays: 営業日（曜日）のリスト（省略時は月〜土）
+        """
+        self.name = name
+        self.facility_address = facility_address
+        self.users = list(users)
+        self.staff = list(staff)
+        self.vehicles = list(vehicles)
+        self.workdays = list(workdays or ["月", "火", "水", "木", "金", "土"])
+
+    def day_users(self, day):
+        """曜日に送迎する利用者"""
+        return [user for user in self.users if day in user.attendance_days]
+
+    def drivers(self, day):
+        """曜日に運転できる職員の数"""
+        return sum(1 for s in self.staff if s.can_drive and day in s.workdays)
+
+def allocate_vehicles(facilities, vehicles, day):
+    """
+    共有する車両を曜日ごとに施設に割り当てる
+
+    定員の大きい車両から順に、利用者数に対して定員の不足が最も大きい施設に割り当てる。
+    運転できる職員の数より多くの車両は割り当てない。不足のある施設がなくなったら残りは割り当てない。
+
+    Returns:
+        施設の名前 -> 車両のリスト
+    """
+    demand = {facility.name: len(facility.day_users(day)) for facility in facilities}
+    drivers = {facility.name: facility.drivers(day) for facility in facilities}
+    allocation = {facility.name: [] for facility in facilities}
+    for vehicle in sorted(vehicles, key=lambda v: v.capacity, reverse=True):
+        candidates = [name for name in allocation
+                      if demand[name] > 0 and len(allocation[name]) < drivers[name]]
+        if not candidates:
+            break
+        name = max(candidates, key=lambda name: demand[name])
+        allocation[name].append(vehicle)
+        demand[name] -= vehicle.capacity
+    return allocation
+
+class MultiFacilityResult:
+    """複数施設の計画の結果"""
+
+    def __init__(self):
+        self.routes = {}  # 施設の名前 -> ルートのリスト
+        self.vehicles = {}  # 施設の名前 -> 曜日 -> 割り当てた車両のリスト
+        self.stats = {}  # 施設の名前 -> 距離取得の統計（TransportOptimizer.stats）
+        self.seconds = {}  # 施設の名前 -> 最適化にかかった時間（秒）
+        self.api_calls = 0  # 全施設でプロバイダーに問い合わせた回数
+        self.elapsed_seconds = 0.0
+
+    def summary(self):
+        """表示用の要約"""
+        routes = sum(len(routes) for routes in self.routes.values())
+        return (f"{len(self.routes)} 施設、{routes} ルートを作成しました"
+                f"（所要時間の問い合わせ {self.api_calls} 回、{self.elapsed_seconds:.1f} 秒）")
+
+class MultiFacilityPlanner:
+    """複数の施設の送迎ルートを、距離のキャッシュを共有して作るクラス"""
+
+    def __init__(self, facilities, distance_store, shared_vehicles=None,
+                 max_workers=DEFAULT_MAX_WORKERS, use_local_search=True):
+        """
+        初期化
+
+        Args:
+            facilities: Facility のリスト
+            distance_store: 全施設で共有する DistanceStore
+            shared_vehicles: 施設間で共有する車両のリスト（Noneの場合は各施設の車両を使う）
+            max_workers: 同時に最適化する施設の数の上限
+            use_local_search: TransportOptimizer の use_local_search
+        """
+        self.facilities = list(facilities)
+        self.distance_store = distance_store
+        self.shared_vehicles = None if shared_vehicles is None else list(shared_vehicles)
+        self.max_workers = max_workers
+        self.use_local_search = use_local_search
+
+    def vehicles_by_day(self, facility, allocations):
+        """施設が曜日ごとに使う車両"""
+        if self.shared_vehicles is None:
+            return {day: facility.vehicles for day in facility.workdays}
+        return {day: allocations[day][facility.name] for day in facility.workdays}
+
+    def plan_facility(self, facility, vehicles_by_day):
+        """
+        1つの施設の1週間分のルートを作る
+
+        Returns:
+            (ルートのリスト, TransportOptimizer)
+        """
+        from optimizer import TransportOptimizer
+
+        optimizer = TransportOptimizer("", facility.facility_address,
+                                       distance_provider=self.distance_store.provider,
+                                       use_local_search=self.use_local_search,
+                                       distance_store=self.distance_store)
+        routes = []
+        for day in facility.workdays:
+            users = facility.day_users(day)
+            for is_morning in (True, False):
+                routes.extend(optimizer.optimize_routes(users, vehicles_by_day[day], facility.staff,
+                                                        day, is_morning))
+        return routes, optimizer
+
+    def plan(self):
+        """
+        全施設の1週間分のルートを作る
+
+        Returns:
+            MultiFacilityResult
+        """
+        started = time.perf_counter()
+        result = MultiFacilityResult()
+        api_calls = self.distance_store.stats["api_calls"]
+
+        allocations = {}
+        if self.shared_vehicles is not None:
+            days = dict.fromkeys(day for facility in self.facilities for day in facility.workdays)
+            allocations = {day: allocate_vehicles([f for f in self.facilities if day in f.workdays],
+                                                  self.shared_vehicles, day)
+                           for day in days}
+
+        def run(facility):
+            facility_started = time.perf_counter()
+            vehicles_by_day = self.vehicles_by_day(facility, allocations)
+            routes, optimizer = self.plan_facility(facility, vehicles_by_day)
+            return facility, vehicles_by_day, routes, optimizer, time.perf_counter() - facility_started
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.facilities)))) as executor:
+            for facility, vehicles_by_day, routes, optimizer, seconds in executor.map(run, self.facilities):
+                result.routes[facility.name] = routes
+                result.vehicles[facility.name] = vehicles_by_day
+                result.stats[facility.name] = optimizer.stats
+                result.seconds[facility.name] = seconds
+
+        result.api_calls = self.distance_store.stats["api_calls"] - api_calls
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+# ---- コマンドライン ----
+
+def load_config(filepath):
+    """
+    設定ファイルを読み込み、施設ごとのデータディレクトリの内容から Facility を作る
+
+    Returns:
+        (Facility のリスト, 施設ごとの設定のリスト, 共有するデータのディレクトリ, 車両を共有するか)
+    """
+    import json
+    from data_store import DataStore
+
+    base_dir = os.path.dirname(os.path.abspath(filepath))
+    with open(filepath, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    facilities = []
+    settings_list = []
+    for entry in config.get("facilities", []):
+        data_dir = os.path.join(base_dir, entry["data_dir"])
+        store = DataStore(data_dir, background=False)
+        settings = store.load_settings() or {}
+        facilities.append(Facility(
+            entry.get("name") or os.path.basename(data_dir),
+            entry.get("facility_address") or settings.get("facility_address", ""),
+            store.load_users() or [],
+            store.load_staff() or [],
+            store.load_vehicles() or [],
+            settings.get("workdays")
+        ))
+        settings_list.append(settings)
+
+    cache_dir = os.path.join(base_dir, config.get("cache_dir", "."))
+    return facilities, settings_list, cache_dir, bool(config.get("shared_vehicles", False))
+
+def main():
+    import argparse
+    import sys
+    import types
+    from distance_provider import GoogleDistanceProvider
+    from distance_store import DistanceStore
+    from ui.export_manager import ExportManager
+
+    parser = argparse.ArgumentParser(description="複数施設の送迎計画")
+    parser.add_argument("--config", required=True, help="施設の一覧を記録したJSONファイル")
+    parser.add_argument("--output-dir", help="施設ごとのExcelファイルの出力先（省略時はテキストを標準出力に書き出す）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="同時に最適化する施設の数")
+    args = parser.parse_args()
+
+    facilities, settings_list, cache_dir, shared = load_config(args.config)
+    if not facilities:
+        print("設定ファイルに施設がありません", file=sys.stderr)
+        sys.exit(1)
+
+    api_key = next((s.get("api_key") for s in settings_list if s.get("api_key")), "")
+    store = DistanceStore(GoogleDistanceProvider(api_key), os.path.join(cache_dir, "distance_matrix_cache.json"))
+    shared_vehicles = [v for facility in facilities for v in facility.vehicles] if shared else None
+    planner = MultiFacilityPlanner(facilities, store, shared_vehicles=shared_vehicles, max_workers=args.workers)
+    result = planner.plan()
+    store.save()
+    print(result.summary(), file=sys.stderr)
+
+    for facility, settings in zip(facilities, settings_list):
+        settings = dict(settings, workdays=facility.workdays)
+        export_manager = ExportManager(types.SimpleNamespace(settings=settings))
+        routes = result.routes[facility.name]
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            export_manager.export_to_excel(routes, os.path.join(args.output_dir, f"{facility.name}.xlsx"))
+        else:
+            print(f"=== {facility.name} ===")
+            export_manager.write_text(routes, sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import numpy as np
-import requests
 import os
 import json
 import sys
+import time
 import traceback
 from datetime import datetime, timedelta
 
@@ -15,23 +15,10 @@ except ImportError as e:
     print(f"Python検索パス: {sys.path}")
     print(f"現在のディレクトリ: {os.getcwd()}")
     traceback.print_exc()
-    # アプリケーションを終了せずにダミーのクラスとして定義
-    class routing_enums_pb2:
-        class FirstSolutionStrategy:
-            PATH_CHEAPEST_ARC = 0
-    
-    class pywrapcp:
-        @staticmethod
-        def RoutingIndexManager(*args, **kwargs):
-            raise ImportError("ORToolsをインストールしてください: pip install ortools")
-        
-        @staticmethod
-        def RoutingModel(*args, **kwargs):
-            raise ImportError("ORToolsをインストールしてください: pip install ortools")
-        
-        @staticmethod
-        def DefaultRoutingSearchParameters():
-            return None
+    # アプリケーションを終了せずに、ルートは局所探索（local_search.py）だけで最適化する
+    print("ORToolsが使えないため、局所探索でルートを最適化します")
+    routing_enums_pb2 = None
+    pywrapcp = None
 
 # モデルをインポート
 try:
@@ -43,21 +30,66 @@ except ImportError:
         print(f"モデルインポートエラー: {e}")
         traceback.print_exc()
 
+try:
+    from src.distance_provider import GoogleDistanceProvider
+except ImportError:
+    from distance_provider import GoogleDistanceProvider
+
+try:
+    from src.local_search import improve, route_cost, solve_tour
+except ImportError:
+    from local_search import improve, route_cost, solve_tour
+
+try:
+    from src.addresses import group_by_address
+except ImportError:
+    from addresses import group_by_address
+
+# 計測用のインスタンスは run.py と共有するため、src をPATHに含む構成を優先する
+try:
+    from profiling import profiler
+except ImportError:
+    from src.profiling import profiler
+
 class TransportOptimizer:
     """送迎ルートの最適化を行うクラス"""
     
-    def __init__(self, api_key, facility_address):
+    def __init__(self, api_key, facility_address, distance_provider=None, cache_file=None,
+                 use_local_search=True, distance_store=None, merge_same_address=True):
         """
         初期化
         
         Args:
             api_key: GoogleマップまたはOpenRouteServiceのAPIキー
             facility_address: 施設の住所
+            distance_provider: 所要時間の取得に使うプロバイダー（省略時はGoogle Maps）
+            cache_file: 距離キャッシュファイルのパス（省略時は data/distance_matrix_cache.json）
+            use_local_search: 車両ごとに解いた後、車両間で利用者を移す局所探索で計画を改善するか
+            distance_store: ほかの施設と共有する DistanceStore、または計算済みの DistanceTable
+                            （指定した場合は cache_file を使わず、キャッシュの保存は DistanceStore の save() で行う）
+            merge_same_address: 同じ住所（addresses.normalize_address で正規化したもの）の利用者を
+                                1つの停車地点にまとめて最適化するか
         """
         self.api_key = api_key
         self.facility_address = facility_address
         self.distance_matrix = None
         self.users = []
+        self.distance_provider = distance_provider or GoogleDistanceProvider(api_key)
+        self.use_local_search = use_local_search
+        self.distance_store = distance_store
+        self.merge_same_address = merge_same_address
+        
+        # 距離取得の統計（APIの呼び出し回数とキャッシュのヒット数）
+        self.stats = {"api_calls": 0, "cache_hits": 0, "cache_misses": 0}
+        
+        # optimize_routes の呼び出しごとの結果（実行履歴の記録用）
+        self.subproblems = []
+        
+        # キャッシュファイルのパス
+        if cache_file is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+            cache_file = os.path.join(cache_dir, "distance_matrix_cache.json")
+        self.cache_file = cache_file
     
     def calculate_distance_matrix(self, users):
         """
@@ -73,64 +105,60 @@ class TransportOptimizer:
         addresses = [self.facility_address] + [user.address for user in users]
         n = len(addresses)
         
-        # キャッシュファイルのパス
-        cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-        cache_file = os.path.join(cache_dir, "distance_matrix_cache.json")
+        if self.distance_store is not None:
+            try:
+                with profiler.span("optimizer.distance_matrix", nodes=n, shared=True):
+                    matrix, hits, misses = self.distance_store.matrix(addresses)
+                    self._record_cache_stats(hits, misses)
+                return matrix
+            except Exception as e:
+                print(f"距離行列の計算に失敗しました: {e}")
+                return np.random.randint(5, 30, size=(n, n)) * 60  # 5〜30分をランダムに設定
         
         # キャッシュがあれば読み込む
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cache = json.load(f)
-                # キャッシュに必要な住所がすべて含まれているかチェック
-                if all(addr in cache for addr in addresses):
-                    matrix = np.zeros((n, n))
-                    for i, from_addr in enumerate(addresses):
-                        for j, to_addr in enumerate(addresses):
-                            if i != j:  # 同じ場所の場合は0
-                                matrix[i][j] = cache[from_addr].get(to_addr, 0)
-                    return matrix
-        
-        # キャッシュがない場合はAPIで計算
+        with profiler.span("optimizer.distance_cache_load"):
+            cache = self._load_distance_cache()
+        
+        # キャッシュにない区間だけプロバイダーで計算
         try:
-            # Google Maps Distance Matrix API
-            matrix = np.zeros((n, n))
-            cache = {}
-            
-            for i, from_addr in enumerate(addresses):
-                if from_addr not in cache:
-                    cache[from_addr] = {}
+            with profiler.span("optimizer.distance_matrix", nodes=n):
+                matrix = np.zeros((n, n))
+                hits = 0
+                misses = []
                 
-                for j in range(n):
-                    if i == j:
-                        continue  # 同じ場所の場合は0
-                    
-                    to_addr = addresses[j]
-                    
-                    # すでに計算済みならスキップ
-                    if to_addr in cache[from_addr]:
-                        matrix[i][j] = cache[from_addr][to_addr]
-                        continue
-                    
-                    url = f"https://maps.googleapis.com/maps/api/distancematrix/json"
-                    params = {
-                        "origins": from_addr,
-                        "destinations": to_addr,
-                        "key": self.api_key
-                    }
-                    
-                    response = requests.get(url, params=params)
-                    data = response.json()
+                for i, from_addr in enumerate(addresses):
+                    row_cache = cache.setdefault(from_addr, {})
                     
-                    if data['status'] == 'OK':
-                        # 秒単位の所要時間を取得
-                        duration = data['rows'][0]['elements'][0]['duration']['value']
-                        matrix[i][j] = duration
-                        cache[from_addr][to_addr] = duration
+                    for j, to_addr in enumerate(addresses):
+                        if i == j:
+                            continue  # 同じ場所の場合は0
+                        
+                        # すでに計算済みならスキップ
+                        if to_addr in row_cache:
+                            matrix[i][j] = row_cache[to_addr]
+                            hits += 1
+                            continue
+                        
+                        misses.append((i, j))
+                
+                # 秒単位の所要時間を取得
+                updated = False
+                if misses:
+                    with profiler.span("optimizer.distance_api", calls=len(misses)):
+                        for i, j in misses:
+                            from_addr, to_addr = addresses[i], addresses[j]
+                            duration = self.distance_provider.get_duration(from_addr, to_addr)
+                            if duration is not None:
+                                matrix[i][j] = duration
+                                cache[from_addr][to_addr] = duration
+                                updated = True
+                
+                self._record_cache_stats(hits, len(misses))
             
             # キャッシュを保存
-            os.makedirs(cache_dir, exist_ok=True)
-            with open(cache_file, 'w') as f:
-                json.dump(cache, f)
+            if updated:
+                with profiler.span("optimizer.distance_cache_save"):
+                    self._save_distance_cache(cache)
             
             return matrix
             
@@ -139,6 +167,34 @@ class TransportOptimizer:
             # エラーの場合はダミーデータを生成
             return np.random.randint(5, 30, size=(n, n)) * 60  # 5〜30分をランダムに設定
     
+    def _record_cache_stats(self, hits, misses):
+        """距離キャッシュのヒット数とAPI呼び出し回数を集計"""
+        self.stats["cache_hits"] += hits
+        self.stats["cache_misses"] += misses
+        self.stats["api_calls"] += misses
+        profiler.incr("distance.cache_hits", hits)
+        profiler.incr("distance.cache_misses", misses)
+        profiler.incr("distance.api_calls", misses)
+    
+    def _load_distance_cache(self):
+        """距離キャッシュファイルを読み込む"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"距離キャッシュの読み込みに失敗しました: {e}")
+            return {}
+    
+    def _save_distance_cache(self, cache):
+        """距離キャッシュファイルを保存する"""
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(cache, f)
+    
     def optimize_routes(self, users, vehicles, staff, day, is_morning=True):
         """
         指定された日の送迎ルートを最適化
@@ -156,57 +212,84 @@ class TransportOptimizer:
         if not users or not vehicles or not staff:
             return []
         
+        started = time.perf_counter()
+        
         # 利用可能なドライバーのフィルタリング
         available_drivers = [s for s in staff if s.can_drive and day in s.workdays]
         if not available_drivers:
+            self._record_subproblem(day, is_morning, users, [], [], users, 0.0, started)
             return []
         
-        # 距離行列の計算
-        self.distance_matrix = self.calculate_distance_matrix(users)
+        # 同じ住所の利用者は1つの停車地点にまとめる（距離行列とOR-Toolsのノードは停車地点ごと）
+        if self.merge_same_address:
+            groups = group_by_address(users)
+        else:
+            groups = [[user] for user in users]
+        
+        # 距離行列の計算（停車地点ごとに、最初の利用者の住所を使う）
+        self.distance_matrix = self.calculate_distance_matrix([group[0] for group in groups])
         
         # 車両ごとに最適化
         routes = []
-        remaining_users = users.copy()
-        drivers_assigned = []
+        remaining = [list(group) for group in groups]  # 停車地点ごとの、まだ車両に乗せていない利用者
+        drivers_assigned = set()  # 割り当て済みの職員のID
+        # 利用者の距離行列上の位置（同じ停車地点の利用者は同じ位置）
+        user_positions = {id(user): i + 1 for i, group in enumerate(groups) for user in group}
+        objectives = []
+        solve_seconds = 0.0
+        plans = []  # 車両ごとの [車両, ドライバー, 同乗スタッフ, 停車地点のリスト, 巡回の順序, 部分行列]
         
         for vehicle in vehicles:
-            if not remaining_users or not available_drivers:
+            if not remaining or not available_drivers:
                 break
-                
-            # 車両の容量以下の利用者を選択
-            vehicle_users = remaining_users[:min(len(remaining_users), vehicle.capacity)]
             
             # ドライバーの割り当て
-            available_drivers_for_vehicle = [d for d in available_drivers if d not in drivers_assigned]
-            if not available_drivers_for_vehicle:
+            driver = next((d for d in available_drivers if d.id not in drivers_assigned), None)
+            if driver is None:
                 break
-            
-            driver = available_drivers_for_vehicle[0]
-            drivers_assigned.append(driver)
+            drivers_assigned.add(driver.id)
             
             # 同乗スタッフの割り当て（同乗スタッフはドライバー以外から選ぶ）
-            assistant = None
-            available_assistants = [s for s in staff if s != driver and day in s.workdays and s not in drivers_assigned]
-            if available_assistants:
-                assistant = available_assistants[0]
-                drivers_assigned.append(assistant)
+            assistant = next((s for s in staff if day in s.workdays and s.id not in drivers_assigned), None)
+            if assistant:
+                drivers_assigned.add(assistant.id)
             
-            # この車両用のサブ問題を解く
-            sub_matrix = np.zeros((len(vehicle_users) + 1, len(vehicle_users) + 1))
-            for i in range(len(vehicle_users) + 1):
-                for j in range(len(vehicle_users) + 1):
-                    if i == 0:  # 施設からの経路
-                        if j == 0:
-                            sub_matrix[i][j] = 0
-                        else:
-                            sub_matrix[i][j] = self.distance_matrix[0][users.index(vehicle_users[j-1]) + 1]
-                    elif j == 0:  # 施設への経路
-                        sub_matrix[i][j] = self.distance_matrix[users.index(vehicle_users[i-1]) + 1][0]
-                    else:  # 利用者間の経路
-                        sub_matrix[i][j] = self.distance_matrix[users.index(vehicle_users[i-1]) + 1][users.index(vehicle_users[j-1]) + 1]
+            # 車両の定員まで、停車地点の順に利用者を乗せる（定員を超える停車地点は、乗れる人数だけ乗せて残りは次の車両へ）
+            vehicle_stops = []
+            seats = vehicle.capacity
+            while remaining and seats > 0:
+                group = remaining[0]
+                if len(group) <= seats:
+                    vehicle_stops.append(remaining.pop(0))
+                else:
+                    vehicle_stops.append(group[:seats])
+                    remaining[0] = group[seats:]
+                seats -= len(vehicle_stops[-1])
+            
+            # この車両用のサブ問題を解く（施設と停車地点の部分行列）
+            with profiler.span("optimizer.sub_matrix", nodes=len(vehicle_stops) + 1):
+                nodes = [0] + [user_positions[id(stop[0])] for stop in vehicle_stops]
+                sub_matrix = np.asarray(self.distance_matrix, dtype=float)[np.ix_(nodes, nodes)]
             
             # OR-Tools を使ったルート最適化
-            optimal_route_indices = self._solve_vehicle_routing_problem(sub_matrix, vehicle_users)
+            solve_started = time.perf_counter()
+            optimal_route_indices = self._solve_vehicle_routing_problem(sub_matrix, vehicle_stops)
+            solve_seconds += time.perf_counter() - solve_started
+            plans.append([vehicle, driver, assistant, vehicle_stops, optimal_route_indices, sub_matrix])
+        
+        remaining_users = [user for group in remaining for user in group]
+        
+        # 車両間で利用者を移して計画を改善する（利用者の並び順だけで決めた車両の割り当てを見直す）
+        if self.use_local_search and len(plans) > 1:
+            solve_started = time.perf_counter()
+            self._improve_plans(plans, user_positions)
+            solve_seconds += time.perf_counter() - solve_started
+        
+        for vehicle, driver, assistant, vehicle_stops, optimal_route_indices, sub_matrix in plans:
+            # 目的関数値（施設を出て戻るまでの移動時間の合計）
+            objectives.append(sum(
+                sub_matrix[a][b] for a, b in zip(optimal_route_indices, optimal_route_indices[1:])
+            ))
             
             # ルートを構築
             route = Route(
@@ -219,105 +302,182 @@ class TransportOptimizer:
                 stops=[]
             )
             
-            # 施設の出発時間または到着時間を設定
-            facility_time = "8:30" if is_morning else "16:00"  # デフォルト値
-            facility_time_dt = datetime.strptime(facility_time, "%H:%M")
+            route.stops = self.build_stops(vehicle_stops, optimal_route_indices, sub_matrix, is_morning)
+            
+            routes.append(route)
+        
+        self._record_subproblem(day, is_morning, users, routes, objectives, remaining_users, solve_seconds, started)
+        return routes
+    
+    def build_stops(self, vehicle_users, optimal_route_indices, sub_matrix, is_morning):
+        """
+        巡回の順序から、時刻付きの停車地点のリストを作る
+        
+        Args:
+            vehicle_users: 車両に乗る利用者のリスト（部分行列の1番目以降に対応）。同じ停車地点の
+                           利用者をリストにまとめた場合は、その全員に同じ時刻の停車地点を作る
+            optimal_route_indices: 巡回の順序（部分行列の番号。0は施設）
+            sub_matrix: 施設と利用者の部分行列
+            is_morning: 朝の送迎か夕方の送迎か
+        
+        Returns:
+            RouteStop のリスト
+        """
+        stops = []
+        
+        # 施設の出発時間または到着時間を設定
+        facility_time = "8:30" if is_morning else "16:00"  # デフォルト値
+        facility_time_dt = datetime.strptime(facility_time, "%H:%M")
+        
+        # 時間順序が正しくなるように調整
+        if is_morning:
+            # 朝は施設から出発し、順番に利用者宅へ
+            pickup_times = []
+            current_time = facility_time_dt
+            
+            # まず施設を追加
+            stops.append(RouteStop(
+                user=None,
+                is_pickup=False,  # 施設からの出発
+                time=current_time.strftime("%H:%M")
+            ))
             
-            # 時間順序が正しくなるように調整
-            if is_morning:
-                # 朝は施設から出発し、順番に利用者宅へ
-                pickup_times = []
-                current_time = facility_time_dt
+            last_idx = 0
+            for i, idx in enumerate(optimal_route_indices):
+                if idx == 0:  # 施設は既に追加済み
+                    continue
                 
-                # まず施設を追加
-                route.stops.append(RouteStop(
-                    user=None,
-                    is_pickup=False,  # 施設からの出発
-                    time=current_time.strftime("%H:%M")
-                ))
+                riders = self._riders(vehicle_users[idx - 1])
                 
-                last_idx = 0
-                for i, idx in enumerate(optimal_route_indices):
-                    if idx == 0:  # 施設は既に追加済み
-                        continue
-                        
-                    user = vehicle_users[idx - 1]
-                    
-                    # 前の停留所からの移動時間計算
-                    travel_time_sec = sub_matrix[last_idx][idx]
-                    travel_time_min = travel_time_sec / 60
-                    
-                    # 時間を更新
-                    current_time = current_time + timedelta(minutes=travel_time_min)
-                    
-                    # ルート停留所の追加
-                    route.stops.append(RouteStop(
+                # 前の停留所からの移動時間計算
+                travel_time_sec = sub_matrix[last_idx][idx]
+                travel_time_min = travel_time_sec / 60
+                
+                # 時間を更新
+                current_time = current_time + timedelta(minutes=travel_time_min)
+                
+                # ルート停留所の追加
+                for user in riders:
+                    stops.append(RouteStop(
                         user=user,
                         is_pickup=True,  # 朝は迎え
                         time=current_time.strftime("%H:%M")
                     ))
-                    
-                    last_idx = idx
-            else:
-                # 夕方は利用者宅から施設へ
-                # 夕方ルートではユーザー宅を先に訪問し、最後に施設に到着
-                pickup_times = []
-                # 施設到着時間から逆算
-                current_time = facility_time_dt
                 
-                # 最後に施設を追加するため、一時保存
-                last_stop = RouteStop(
-                    user=None,
-                    is_pickup=True,  # 施設への到着
-                    time=current_time.strftime("%H:%M")
-                )
+                last_idx = idx
+        else:
+            # 夕方は利用者宅から施設へ
+            # 夕方ルートではユーザー宅を先に訪問し、最後に施設に到着
+            pickup_times = []
+            # 施設到着時間から逆算
+            current_time = facility_time_dt
+            
+            # 最後に施設を追加するため、一時保存
+            last_stop = RouteStop(
+                user=None,
+                is_pickup=True,  # 施設への到着
+                time=current_time.strftime("%H:%M")
+            )
+            
+            # ルートを逆順に処理（施設に向かう方向）
+            reversed_indices = list(reversed(optimal_route_indices))
+            last_idx = 0
+            
+            for i, idx in enumerate(reversed_indices):
+                if idx == 0:  # 施設は最後に追加
+                    continue
                 
-                # ルートを逆順に処理（施設に向かう方向）
-                reversed_indices = list(reversed(optimal_route_indices))
-                last_idx = 0
+                riders = self._riders(vehicle_users[idx - 1])
                 
-                for i, idx in enumerate(reversed_indices):
-                    if idx == 0:  # 施設は最後に追加
-                        continue
-                        
-                    user = vehicle_users[idx - 1]
-                    
-                    # 次の停留所への移動時間計算
-                    if i+1 < len(reversed_indices):
-                        next_idx = reversed_indices[i+1]
-                        travel_time_sec = sub_matrix[idx][next_idx]
-                        travel_time_min = travel_time_sec / 60
-                        
-                        # 時間を逆算
-                        pickup_time = current_time - timedelta(minutes=travel_time_min)
-                    else:
-                        # 最初の停留所の場合、施設からの出発時間を設定
-                        pickup_time = current_time - timedelta(minutes=15)  # 仮の移動時間
-                    
-                    current_time = pickup_time
+                # 次の停留所への移動時間計算
+                if i+1 < len(reversed_indices):
+                    next_idx = reversed_indices[i+1]
+                    travel_time_sec = sub_matrix[idx][next_idx]
+                    travel_time_min = travel_time_sec / 60
                     
-                    # ルート停留所の追加
-                    route.stops.append(RouteStop(
+                    # 時間を逆算
+                    pickup_time = current_time - timedelta(minutes=travel_time_min)
+                else:
+                    # 最初の停留所の場合、施設からの出発時間を設定
+                    pickup_time = current_time - timedelta(minutes=15)  # 仮の移動時間
+                
+                current_time = pickup_time
+                
+                # ルート停留所の追加
+                for user in riders:
+                    stops.append(RouteStop(
                         user=user,
                         is_pickup=False,  # 夕方は送り
                         time=current_time.strftime("%H:%M")
                     ))
-                    
-                    last_idx = idx
-                
-                # 施設を最後に追加
-                route.stops.append(last_stop)
                 
-                # 停留所を時間順に並べ替え
-                route.stops = sorted(route.stops, key=lambda x: x.time)
+                last_idx = idx
             
-            routes.append(route)
+            # 施設を最後に追加
+            stops.append(last_stop)
             
-            # 割り当てた利用者を残りのリストから削除
-            for user in vehicle_users:
-                remaining_users.remove(user)
+            # 停留所を時間順に並べ替え
+            stops = sorted(stops, key=lambda x: x.time)
         
-        return routes
+        return stops
+    
+    @staticmethod
+    def _riders(stop):
+        """停車地点で乗り降りする利用者のリスト（停車地点は利用者1人か、利用者のリスト）"""
+        return stop if isinstance(stop, list) else [stop]
+    
+    def _improve_plans(self, plans, user_positions):
+        """
+        車両ごとの巡回を、全体の距離行列の上で局所探索により改善する（plans を直接変更する）
+        
+        定員を超えたため複数の車両に分かれた停車地点もあるので、局所探索のノードは
+        距離行列の位置ではなく車両ごとの停車地点とし、ノードの人数で定員を判定する。
+        
+        Args:
+            plans: optimize_routes の車両ごとの [車両, ドライバー, 同乗スタッフ, 停車地点のリスト, 巡回の順序, 部分行列]
+            user_positions: id(利用者) -> 距離行列上の位置
+        """
+        stops = [None]  # ノード番号 -> 停車地点（0 は施設）
+        positions = [0]  # ノード番号 -> 距離行列上の位置
+        tours = []
+        for plan in plans:
+            tour = []
+            for i in plan[4]:
+                if i == 0:
+                    continue
+                stop = plan[3][i - 1]
+                tour.append(len(stops))
+                stops.append(stop)
+                positions.append(user_positions[id(stop[0])])
+            tours.append(tour)
+        matrix = np.asarray(self.distance_matrix, dtype=float)[np.ix_(positions, positions)]
+        demands = np.asarray([0] + [len(stop) for stop in stops[1:]])
+        
+        with profiler.span("optimizer.local_search", nodes=len(stops) - 1, vehicles=len(plans)):
+            before = sum(route_cost(matrix, tour) for tour in tours)
+            tours = improve(matrix, tours, [plan[0].capacity for plan in plans], demands=demands)
+            after = sum(route_cost(matrix, tour) for tour in tours)
+        profiler.incr("optimizer.local_search_saved_seconds", max(before - after, 0.0))
+        
+        # 改善した巡回の順に停車地点を並べ、部分行列を作り直す
+        for plan, tour in zip(plans, tours):
+            nodes = [0] + tour
+            plan[3] = [stops[node] for node in tour]
+            plan[4] = list(range(len(nodes))) + [0]
+            plan[5] = matrix[np.ix_(nodes, nodes)]
+    
+    def _record_subproblem(self, day, is_morning, users, routes, objectives, unserved_users, solve_seconds, started):
+        """optimize_routes 1回分の結果を記録"""
+        self.subproblems.append({
+            "day": day,
+            "is_morning": is_morning,
+            "users": len(users),
+            "routes": len(routes),
+            "unserved_users": len(unserved_users),
+            "objective": float(sum(objectives)),
+            "solve_seconds": solve_seconds,
+            "elapsed_seconds": time.perf_counter() - started,
+        })
     
     def _solve_vehicle_routing_problem(self, distance_matrix, users):
         """
@@ -325,11 +485,16 @@ class TransportOptimizer:
         
         Args:
             distance_matrix: 距離行列
-            users: 利用者のリスト
+            users: 停車地点（利用者、または同じ住所の利用者のリスト）のリスト
             
         Returns:
             最適なルートのインデックスリスト
         """
+        # OR-Toolsが使えない場合は局所探索で解く
+        if pywrapcp is None:
+            with profiler.span("optimizer.solve", nodes=len(distance_matrix), solver="local_search"):
+                return solve_tour(distance_matrix)
+        
         # インデックス0は施設（デポ）
         manager = pywrapcp.RoutingIndexManager(len(distance_matrix), 1, 0)
         routing = pywrapcp.RoutingModel(manager)
@@ -349,7 +514,8 @@ class TransportOptimizer:
         search_parameters.time_limit.seconds = 10  # 計算時間制限
         
         # 問題を解く
-        solution = routing.SolveWithParameters(search_parameters)
+        with profiler.span("optimizer.solve", nodes=len(distance_matrix)):
+            solution = routing.SolveWithParameters(search_parameters)
         
         if solution:
             route_indices = []
@@ -360,5 +526,5 @@ class TransportOptimizer:
             route_indices.append(manager.IndexToNode(index))  # デポに戻る
             return route_indices
         else:
-            # 解が見つからない場合、デフォルトルートを返す
-            return list(range(len(distance_matrix))) 
\ No newline at end of file
+            # 解が見つからない場合は局所探索で解く
+            return solve_tour(distance_matrix) 
\ No newline at end of file
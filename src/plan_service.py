@@ -0,0 +1,318 @@
+"""
+送迎計画のHTTPサービス
+
+画面を使わずに、ほかのマシンから送迎ルートの最適化を依頼できるようにする。
+利用者・職員・車両・設定を to_dict の形式のJSONで受け取り、決まった数のワーカーで順に最適化する。
+結果は入力のハッシュをキーに保持するので、同じ入力を再び依頼した場合は最適化しない。
+距離のキャッシュ（DistanceStore）はすべての依頼で共有する。
+
+    python src/plan_service.py --port 8765 --workers 2
+    python src/plan_service.py --provider fake   # ネットワークを使わない距離で確認する
+
+API:
+    POST /jobs              計画を依頼する（202。同じ入力の結果があれば 200）
+                            {"users": [...], "staff": [...], "vehicles": [...],
+                             "settings": {"facility_address": "...", "workdays": ["月", ...]}}
+    GET  /jobs/<job_id>         状態（queued / running / done / failed）
+    GET  /jobs/<job_id>/result  結果のルート（完了前は 409）
+    GET  /health                待ち・実行中の依頼の数
+"""
+
+import collections
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from models import Staff, User, Vehicle
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+
+# 待ち・実行中の依頼の数の上限（超えた場合は 503 を返す）
+DEFAULT_MAX_PENDING = 32
+
+# 保持する完了した依頼の数（超えた場合は古いものから捨てる）
+DEFAULT_MAX_RESULTS = 256
+
+# 受け付ける依頼の最大サイズ（バイト）
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+class JobError(Exception):
+    """依頼を受け付けられない場合の例外（status はHTTPのステータスコード）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def job_hash(payload):
+    """依頼の入力のハッシュ（キーの順序によらない）"""
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class Job:
+    """1件の計画の依頼"""
+
+    def __init__(self, job_id, payload):
+        self.id = job_id
+        self.payload = payload
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        """状態の辞書（結果は含めない）"""
+        data = {"job_id": self.id, "status": self.status, "submitted_at": self.submitted_at}
+        if self.started_at is not None:
+            data["queued_seconds"] = round(self.started_at - self.submitted_at, 4)
+        if self.finished_at is not None:
+            data["elapsed_seconds"] = round(self.finished_at - self.started_at, 4)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+class PlanService:
+    """計画の依頼を受け付けてワーカーで実行するクラス（HTTPに依存しない部分）"""
+
+    def __init__(self, distance_store, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 max_results=DEFAULT_MAX_RESULTS):
+        """
+        初期化
+
+        Args:
+            distance_store: すべての依頼で共有する DistanceStore
+            workers: 同時に最適化する依頼の数
+            max_pending: 待ち・実行中の依頼の数の上限
+            max_results: 保持する完了した依頼の数
+        """
+        self.distance_store = distance_store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.jobs = collections.OrderedDict()  # ID -> Job（古い順）
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan-worker")
+        self._lock = threading.Lock()
+
+    def submit(self, payload):
+        """
+        計画を依頼する
+
+        同じ入力の依頼があれば、新しく実行せずにその依頼を返す（失敗したものは実行し直す）。
+
+        Returns:
+            (Job, 新しく受け付けたか)
+        """
+        if not isinstance(payload, dict) or not isinstance(payload.get("users"), list):
+            raise JobError(400, "users, staff, vehicles, settings を含むJSONオブジェクトを指定してください")
+        job_id = job_hash(payload)
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status != "failed":
+                self.jobs.move_to_end(job_id)
+                return job, False
+            if self.pending >= self.max_pending:
+                raise JobError(503, "依頼が多すぎます。しばらくしてから依頼してください")
+            job = self.jobs[job_id] = Job(job_id, payload)
+            self.jobs.move_to_end(job_id)
+            self.pending += 1
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id):
+        """IDの依頼（ない場合はNone）"""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def health(self):
+        """待ち・実行中の依頼の数"""
+        with self._lock:
+            running = sum(1 for job in self.jobs.values() if job.status == "running")
+            return {"status": "ok", "workers": self.workers, "pending": self.pending,
+                    "running": running, "jobs": len(self.jobs)}
+
+    def _run(self, job):
+        """ワーカーで依頼を実行する"""
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = self.plan(job.payload)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        job.finished_at = time.time()
+        with self._lock:
+            self.pending -= 1
+            self._evict()
+        self.distance_store.save()
+
+    def _evict(self):
+        """完了した依頼が max_results を超えたら古いものから捨てる（_lock を取得した状態で呼ぶ）"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_results)]:
+            del self.jobs[job_id]
+
+    def plan(self, payload):
+        """
+        依頼の入力から1週間分のルートを作る
+
+        Returns:
+            結果の辞書（routes は Route.to_dict のリスト）
+        """
+        from multi_facility import Facility, MultiFacilityPlanner
+
+        settings = payload.get("settings") or {}
+        facility = Facility(
+            settings.get("facility_name", "施設"),
+            settings.get("facility_address", ""),
+            [User.from_dict(data) for data in payload.get("users", [])],
+            [Staff.from_dict(data) for data in payload.get("staff", [])],
+            [Vehicle.from_dict(data) for data in payload.get("vehicles", [])],
+            payload.get("days") or settings.get("workdays")
+        )
+        planner = MultiFacilityPlanner([facility], self.distance_store, max_workers=1)
+        result = planner.plan()
+        routes = result.routes[facility.name]
+        # 曜日・時間帯ごとに、送迎が必要なのにルートに含まれなかった利用者を数える
+        riders = {(route.date, route.is_morning, stop.user.id)
+                  for route in routes for stop in route.stops if stop.user}
+        unserved = sum(1 for day in facility.workdays for user in facility.day_users(day)
+                       for is_morning in (True, False) if (day, is_morning, user.id) not in riders)
+        return {
+            "routes": [route.to_dict() for route in routes],
+            "route_count": len(routes),
+            "unserved_users": unserved,
+            "api_calls": result.api_calls,
+            "elapsed_seconds": round(result.elapsed_seconds, 4),
+        }
+
+    def close(self):
+        """実行中の依頼の完了を待ってワーカーを終了する"""
+        self._executor.shutdown(wait=True)
+        self.distance_store.save()
+
+class PlanRequestHandler(BaseHTTPRequestHandler):
+    """計画サービスのHTTPリクエストを処理するクラス（server.service の PlanService を使う）"""
+
+    server_version = "KoredesougeiPlanService/1.0"
+
+    def _send_json(self, status, data, location=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {"error": message})
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["health"]:
+            self._send_json(200, service.health())
+            return
+        if len(parts) not in (2, 3) or parts[0] != "jobs" or (len(parts) == 3 and parts[2] != "result"):
+            self._send_error(404, "見つかりません")
+            return
+
+        job = service.get(parts[1])
+        if job is None:
+            self._send_error(404, "依頼が見つかりません")
+        elif len(parts) == 2:
+            self._send_json(200, job.to_dict())
+        elif job.status == "done":
+            self._send_json(200, dict(job.to_dict(), **job.result))
+        elif job.status == "failed":
+            self._send_json(500, job.to_dict())
+        else:
+            self._send_json(409, job.to_dict())
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            self._send_error(404, "見つかりません")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_error(413, "依頼が大きすぎます")
+            return
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+            job, created = service.submit(payload)
+        except ValueError as e:
+            self._send_error(400, f"JSONを読み込めません: {e}")
+            return
+        except JobError as e:
+            self._send_error(e.status, str(e))
+            return
+        self._send_json(202 if created else 200, job.to_dict(), location=f"/jobs/{job.id}")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, verbose=False):
+    """
+    計画サービスのHTTPサーバーを作る（serve_forever() で開始する）
+
+    Args:
+        service: PlanService
+        host: 待ち受けるアドレス（既定ではこのマシンからの接続だけを受け付ける）
+        port: ポート番号（0 の場合は空いているポート）
+        verbose: リクエストごとにログを出力するか
+    """
+    server = ThreadingHTTPServer((host, port), PlanRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+# ---- コマンドライン ----
+
+def main():
+    import argparse
+    import os
+    from distance_provider import FakeDistanceProvider, GoogleDistanceProvider
+    from distance_store import DistanceStore
+    from planner import default_data_dir
+
+    parser = argparse.ArgumentParser(description="送迎計画のHTTPサービス")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="ポート番号")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="同時に最適化する依頼の数")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="待ち・実行中の依頼の数の上限")
+    parser.add_argument("--provider", choices=["google", "fake"], default="google",
+                        help="所要時間の取得方法（fake はネットワークを使わない確認用）")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_MAPS_API_KEY", ""), help="Google Maps APIキー")
+    parser.add_argument("--cache-file", help="距離キャッシュファイル（省略時はデータディレクトリのもの。fake では保存しない）")
+    parser.add_argument("--verbose", action="store_true", help="リクエストごとにログを出力する")
+    args = parser.parse_args()
+
+    if args.provider == "fake":
+        store = DistanceStore(FakeDistanceProvider(), args.cache_file)
+    else:
+        cache_file = args.cache_file or os.path.join(default_data_dir(), "distance_matrix_cache.json")
+        store = DistanceStore(GoogleDistanceProvider(args.api_key), cache_file)
+
+    service = PlanService(store, workers=args.workers, max_pending=args.max_pending)
+    server = make_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"送迎計画サービスを開始しました: http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
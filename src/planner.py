@@ -0,0 +1,244 @@
+"""
+日付ごとの送迎計画（複数週）
+
+曜日ごとの1週間分ではなく、実際の日付の範囲（例: 1か月）について送迎ルートを作る。
+祝日などの休業日は計画せず、日付ごとの利用者・職員の欠席を除いて最適化する。
+
+日付・時間帯ごとに、最適化の入力（利用者・職員・車両の内容と並び）から署名を作り、
+同じ署名の計画がすでにあれば最適化せずにその結果を複製する。欠席などのない週は
+前の週と入力が同じになるので、1か月分の計画でも最適化するのは入力の異なる週の分だけになる。
+
+    planner = DatePlanner(optimizer, users, vehicles, staff, workdays=["月", "火", "水", "木", "金"],
+                          holidays=["2024-04-29"], absences={"2024-04-03": ["利用者のID"]})
+    result = planner.plan("2024-04-01", "2024-04-30")
+    result.routes  # Route.date は "2024-04-01" などの日付
+
+コマンドラインから、データディレクトリの内容で計画してエクスポートできる。
+
+    python src/planner.py --start 2024-04-01 --end 2024-04-30 --output 4月.xlsx
+    python src/planner.py --start 2024-04-01 --end 2024-04-07 --calendar calendar.json
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from models import Route, RouteStop
+from repository import WEEKDAYS, content_hash
+
+def parse_date(value):
+    """日付（date または "2024-04-01" 形式の文字列）を date に変換"""
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip())
+
+def weekday_of(date):
+    """日付の曜日（"月" など）"""
+    return WEEKDAYS[parse_date(date).weekday()]
+
+def date_range(start, end):
+    """start から end まで（両端を含む）の日付を順に返す"""
+    date = parse_date(start)
+    end = parse_date(end)
+    while date <= end:
+        yield date
+        date += datetime.timedelta(days=1)
+
+def _date_key(value):
+    """休業日・欠席の辞書のキー（"2024-04-01" 形式）"""
+    return parse_date(value).isoformat()
+
+def load_calendar(filepath):
+    """
+    休業日と欠席の設定を読み込む
+
+    ファイルの形式（JSON）:
+        {"holidays": ["2024-04-29", ...],
+         "absences": {"2024-04-03": ["利用者のID", ...]},
+         "staff_absences": {"2024-04-03": ["職員のID", ...]}}
+
+    Returns:
+        DatePlanner に渡す引数の辞書（holidays, absences, staff_absences）
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {
+        "holidays": data.get("holidays", []),
+        "absences": data.get("absences", {}),
+        "staff_absences": data.get("staff_absences", {}),
+    }
+
+class PlanResult:
+    """日付ごとの計画の結果"""
+
+    def __init__(self):
+        self.routes = []  # 日付順（同じ日付では朝が先）のルート
+        self.dates = []  # 計画した日付（"2024-04-01" 形式）
+        self.holidays = []  # 休業日として計画しなかった日付
+        self.solved = 0  # 最適化を実行した時間帯の数
+        self.reused = 0  # 計画済みの結果を複製した時間帯の数
+
+    def summary(self):
+        """表示用の要約"""
+        return (f"{len(self.dates)} 日分を計画しました"
+                f"（最適化 {self.solved} 回、再利用 {self.reused} 回、休業日 {len(self.holidays)} 日）")
+
+class DatePlanner:
+    """日付の範囲について送迎ルートを作るクラス"""
+
+    def __init__(self, optimizer, users, vehicles, staff, workdays,
+                 holidays=(), absences=None, staff_absences=None):
+        """
+        初期化
+
+        Args:
+            optimizer: ルートの最適化に使う TransportOptimizer
+            users: 利用者のリスト
+            vehicles: 車両のリスト
+            staff: 職員のリスト
+            workdays: 営業日（曜日）のリスト
+            holidays: 休業日（日付）のイテラブル
+            absences: 日付 -> 欠席する利用者のIDのリスト
+            staff_absences: 日付 -> 休む職員のIDのリスト
+        """
+        self.optimizer = optimizer
+        self.users = list(users)
+        self.vehicles = list(vehicles)
+        self.staff = list(staff)
+        self.workdays = list(workdays)
+        self.holidays = {_date_key(date) for date in holidays}
+        self.absences = {_date_key(date): set(ids) for date, ids in (absences or {}).items()}
+        self.staff_absences = {_date_key(date): set(ids) for date, ids in (staff_absences or {}).items()}
+        self._solutions = {}  # 署名 -> 最適化の結果のルート（複製の元。変更しない）
+        self._hashes = {}  # id(エンティティ) -> 内容のハッシュ
+
+    def inputs_for(self, date):
+        """
+        日付の最適化の入力
+
+        Returns:
+            (曜日, 利用者のリスト, 職員のリスト)。欠席者は除く
+        """
+        key = _date_key(date)
+        day = weekday_of(date)
+        absent = self.absences.get(key, ())
+        off = self.staff_absences.get(key, ())
+        users = [u for u in self.users if day in u.attendance_days and u.id not in absent]
+        staff = [s for s in self.staff if day in s.workdays and s.id not in off]
+        return day, users, staff
+
+    def _hash(self, entity):
+        """エンティティの内容のハッシュ（計画中は変わらないのでキャッシュする）"""
+        value = self._hashes.get(id(entity))
+        if value is None:
+            value = self._hashes[id(entity)] = content_hash(entity)
+        return value
+
+    def signature(self, users, staff, is_morning):
+        """
+        最適化の入力の署名
+
+        職員は曜日で絞り込んだ後なので、曜日そのものは結果に影響しない（含めない）。
+        利用者の並びは車両への割り当てに影響するので、順序も含める。
+        """
+        digest = hashlib.sha1()
+        digest.update(b"M" if is_morning else b"E")
+        for kind, entities in (("u", users), ("s", staff), ("v", self.vehicles)):
+            digest.update(kind.encode())
+            for entity in entities:
+                digest.update(self._hash(entity).encode())
+        return digest.hexdigest()
+
+    def plan(self, start, end):
+        """
+        start から end まで（両端を含む）の送迎ルートを作る
+
+        Returns:
+            PlanResult
+        """
+        result = PlanResult()
+        for date in date_range(start, end):
+            key = date.isoformat()
+            if weekday_of(date) not in self.workdays:
+                continue
+            if key in self.holidays:
+                result.holidays.append(key)
+                continue
+
+            day, users, staff = self.inputs_for(date)
+            result.dates.append(key)
+            for is_morning in (True, False):
+                signature = self.signature(users, staff, is_morning)
+                template = self._solutions.get(signature)
+                if template is None:
+                    template = self.optimizer.optimize_routes(users, self.vehicles, staff, day, is_morning)
+                    self._solutions[signature] = template
+                    result.solved += 1
+                else:
+                    result.reused += 1
+                result.routes.extend(copy_route(route, key) for route in template)
+        return result
+
+def copy_route(route, date):
+    """ルートを日付を変えて複製（停車地点も複製するので、複製後に編集しても元に影響しない）"""
+    stops = []
+    for stop in route.stops:
+        copied = RouteStop.__new__(RouteStop)
+        copied.user = stop.user
+        copied.is_pickup = stop.is_pickup
+        copied.minutes = stop.minutes
+        stops.append(copied)
+    return Route(
+        id=route.id,
+        vehicle=route.vehicle,
+        driver=route.driver,
+        assistant=route.assistant,
+        stops=stops,
+        date=date,
+        is_morning=route.is_morning
+    )
+
+# ---- コマンドライン ----
+
+def default_data_dir():
+    """アプリと同じデータディレクトリ"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def main():
+    import argparse
+    import sys
+    import types
+    from data_store import DataStore
+    from optimizer import TransportOptimizer
+    from ui.export_manager import ExportManager
+
+    parser = argparse.ArgumentParser(description="日付の範囲の送迎計画")
+    parser.add_argument("--start", required=True, help="開始日（例: 2024-04-01）")
+    parser.add_argument("--end", required=True, help="終了日（例: 2024-04-30）")
+    parser.add_argument("--calendar", help="休業日と欠席を記録したJSONファイル")
+    parser.add_argument("--output", help="出力先（.xlsx または .txt。省略時はテキストを標準出力に書き出す）")
+    parser.add_argument("--data-dir", default=default_data_dir(), help="データディレクトリ")
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir, background=False)
+    settings = store.load_settings() or {}
+    workdays = settings.get("workdays", ["月", "火", "水", "木", "金", "土"])
+    calendar = load_calendar(args.calendar) if args.calendar else {}
+
+    optimizer = TransportOptimizer(settings.get("api_key", ""), settings.get("facility_address", ""),
+                                   cache_file=os.path.join(args.data_dir, "distance_matrix_cache.json"))
+    planner = DatePlanner(optimizer, store.load_users() or [], store.load_vehicles() or [],
+                          store.load_staff() or [], workdays, **calendar)
+    result = planner.plan(args.start, args.end)
+    print(result.summary(), file=sys.stderr)
+
+    export_manager = ExportManager(types.SimpleNamespace(settings=dict(settings, workdays=workdays)))
+    if not args.output:
+        export_manager.write_text(result.routes, sys.stdout)
+    elif args.output.lower().endswith(".xlsx"):
+        export_manager.export_to_excel(result.routes, args.output)
+    else:
+        export_manager.export_to_text(result.routes, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+処理時間の計測
+
+各処理段階をタイミングスパンで囲み、経過時間をJSON Lines形式で記録する。
+記録が無効な間は span() は何もしないので、常時埋め込んでおいても負荷はほとんどない。
+
+使用例:
+    from profiling import profiler
+
+    with profiler.span("optimizer.solve", nodes=len(matrix)):
+        ...
+    profiler.incr("distance.api_calls")
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+class Profiler:
+    """タイミングスパンとカウンタを記録するクラス"""
+
+    def __init__(self):
+        self.enabled = False
+        self.output_file = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def configure(self, output_file):
+        """
+        記録を有効にする
+
+        Args:
+            output_file: JSON Linesを追記するファイルのパス
+        """
+        self.close()
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.output_file = output_file
+        self._file = open(output_file, 'a', encoding='utf-8')
+        self.enabled = True
+
+    def close(self):
+        """記録を終了してファイルを閉じる"""
+        with self._lock:
+            self.enabled = False
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def emit(self, record_type, name, **fields):
+        """1件のレコードを書き出す"""
+        if not self.enabled:
+            return
+        record = {"type": record_type, "name": name, "ts": round(time.time(), 6)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    @contextlib.contextmanager
+    def span(self, name, **fields):
+        """処理段階の経過時間を記録するコンテキストマネージャ"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if error:
+                fields["error"] = error
+            self.emit("span", name, duration_ms=round(duration_ms, 3),
+                      thread=threading.current_thread().name, **fields)
+
+    def timed(self, name):
+        """関数全体をスパンで囲むデコレータ"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def incr(self, name, value=1):
+        """カウンタを加算する（記録が無効でも集計は行う）"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counters(self):
+        """現在のカウンタの値"""
+        with self._lock:
+            return dict(self._counters)
+
+    def emit_counters(self, name="counters", **fields):
+        """
+        カウンタの値とキャッシュヒット率を書き出す
+
+        キャッシュヒット率は "<prefix>.cache_hits" と "<prefix>.cache_misses" の組から求める。
+        """
+        counters = self.counters()
+        hit_rates = {}
+        for key, hits in counters.items():
+            if key.endswith(".cache_hits"):
+                prefix = key[:-len(".cache_hits")]
+                total = hits + counters.get(prefix + ".cache_misses", 0)
+                hit_rates[prefix] = round(hits / total, 4) if total else None
+        self.emit("counters", name, counters=counters, cache_hit_rates=hit_rates, **fields)
+
+# アプリケーション全体で共有するインスタンス
+profiler = Profiler()
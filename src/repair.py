@@ -0,0 +1,114 @@
+"""
+当日のキャンセルに合わせたルートの修正
+
+当日の朝に利用者から欠席の連絡があった場合に、その日の時間帯を最適化し直すのではなく、
+作成済みのルートからキャンセルした利用者を外して時刻を付け直す。
+そのうえで局所探索（local_search.py）で改善するが、ほかの利用者の車両はなるべく変えない。
+車両を変える移動は、移動時間の減少が move_penalty を超える場合だけ、max_moves 回まで行う。
+
+    result = repair_routes(optimizer, routes, ["キャンセルした利用者のID"])
+    result.routes  # 修正したルート（元のルートは変更しない）
+    result.moved   # 車両が変わった利用者
+"""
+
+import time
+import numpy as np
+from models import Route
+from local_search import improve, plan_cost
+
+# 利用者の車両を変えるときの罰則（秒）。車両を変えて減る移動時間がこれを超える場合だけ変える
+DEFAULT_MOVE_PENALTY = 600
+
+# 車両を変える移動・交換の最大回数
+DEFAULT_MAX_MOVES = 5
+
+# 局所探索の制限時間（秒）
+DEFAULT_TIME_LIMIT = 0.5
+
+class RepairResult:
+    """ルートの修正の結果"""
+
+    def __init__(self):
+        self.routes = []  # 修正したルート（利用者がいなくなった車両のルートは含めない）
+        self.cancelled = []  # ルートから外した利用者
+        self.moved = []  # 車両が変わった利用者
+        self.emptied = []  # 利用者がいなくなったルート（修正前のもの）
+        self.before = 0.0  # キャンセル前の移動時間の合計（秒）
+        self.after = 0.0  # 修正後の移動時間の合計（秒）
+        self.elapsed_seconds = 0.0
+
+    def summary(self):
+        """表示用の要約"""
+        return (f"{len(self.cancelled)} 人のキャンセルを反映しました"
+                f"（車両の変更 {len(self.moved)} 人、空いた車両 {len(self.emptied)} 台、"
+                f"移動時間 {self.before / 60:.0f} 分 → {self.after / 60:.0f} 分）")
+
+def route_users(route):
+    """ルートの利用者（訪問する順）"""
+    return [stop.user for stop in sorted(route.stops, key=lambda x: x.minutes) if stop.user]
+
+def repair_routes(optimizer, routes, cancelled_user_ids, move_penalty=DEFAULT_MOVE_PENALTY,
+                  max_moves=DEFAULT_MAX_MOVES, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    ルートからキャンセルした利用者を外し、時刻を付け直して改善する
+
+    Args:
+        optimizer: 距離行列と時刻の計算に使う TransportOptimizer
+        routes: 同じ日・同じ時間帯のルートのリスト
+        cancelled_user_ids: キャンセルした利用者のIDのイテラブル
+        move_penalty: 利用者の車両を変えるときの罰則（秒）
+        max_moves: 車両を変える移動・交換の最大回数
+        time_limit: 局所探索の制限時間（秒）
+
+    Returns:
+        RepairResult
+    """
+    started = time.perf_counter()
+    cancelled_ids = set(cancelled_user_ids)
+    result = RepairResult()
+    if not routes:
+        return result
+    is_morning = routes[0].is_morning
+
+    # 距離行列は、キャンセル前の全員について1回だけ作る（キャッシュ済みなら通信しない）
+    visits = [route_users(route) for route in routes]
+    users = [user for route_visits in visits for user in route_visits]
+    matrix = np.asarray(optimizer.calculate_distance_matrix(users), dtype=float)
+    node_of = {id(user): i + 1 for i, user in enumerate(users)}
+
+    tours = [[node_of[id(user)] for user in route_visits] for route_visits in visits]
+    result.before = plan_cost(matrix, tours)
+
+    # キャンセルした利用者を外す（残りの利用者の順序と車両はそのまま）
+    tours = [[node for node in tour if users[node - 1].id not in cancelled_ids] for tour in tours]
+    result.cancelled = [user for user in users if user.id in cancelled_ids]
+
+    # 車両の変更を抑えて改善する（ルートの数と順序は変わらない）
+    capacities = [route.vehicle.capacity if route.vehicle else len(tour) for route, tour in zip(routes, tours)]
+    tours = improve(matrix, tours, capacities, time_limit=time_limit,
+                    move_penalty=move_penalty, max_moves=max_moves)
+    result.after = plan_cost(matrix, tours)
+
+    home = {node_of[id(user)]: r for r, route_visits in enumerate(visits) for user in route_visits}
+    for r, (route, tour) in enumerate(zip(routes, tours)):
+        result.moved.extend(users[node - 1] for node in tour if home[node] != r)
+        if not tour:
+            result.emptied.append(route)
+            continue
+
+        # 部分行列から時刻を付け直す（最適化したときと同じ計算）
+        nodes = [0] + tour
+        stops = optimizer.build_stops([users[node - 1] for node in tour], list(range(len(nodes))) + [0],
+                                      matrix[np.ix_(nodes, nodes)], is_morning)
+        result.routes.append(Route(
+            id=route.id,
+            vehicle=route.vehicle,
+            driver=route.driver,
+            assistant=route.assistant,
+            stops=stops,
+            date=route.date,
+            is_morning=is_morning
+        ))
+
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
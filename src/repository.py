@@ -0,0 +1,301 @@
+"""
+職員・利用者・車両のメモリ上のリポジトリ
+
+IDと曜日の索引を持ち、追加・更新・削除のたびに索引を差分で更新する。
+曜日（利用者の通所曜日、職員の勤務曜日）はビットマスクでも保持する。
+変更があるたびに、変更内容（ChangeSet）を登録されたリスナーに通知する。
+
+    repository = Repository("user", users, days_attr="attendance_days")
+    repository.get(user_id)     # IDで検索（O(1)）
+    repository.on_day("月")     # 月曜日の利用者（O(結果の件数)）
+    changes = repository.upsert_all(imported_users)  # IDで照合して差分だけ反映
+"""
+
+import hashlib
+import json
+
+# 曜日とビット位置の対応（月=1, 火=2, 水=4, ...）
+WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
+WEEKDAY_BITS = {day: 1 << i for i, day in enumerate(WEEKDAYS)}
+ALL_DAYS_MASK = (1 << len(WEEKDAYS)) - 1
+
+def days_to_mask(days):
+    """曜日のリストをビットマスクに変換（未知の曜日は無視）"""
+    mask = 0
+    for day in days or []:
+        mask |= WEEKDAY_BITS.get(day, 0)
+    return mask
+
+def mask_to_days(mask):
+    """ビットマスクを曜日のリストに変換"""
+    return [day for day in WEEKDAYS if mask & WEEKDAY_BITS[day]]
+
+def content_hash(entity):
+    """エンティティの内容のハッシュ（to_dict の内容が同じなら同じ値）"""
+    data = json.dumps(entity.to_dict(), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+class ChangeSet:
+    """リポジトリの変更内容（追加・変更・削除されたID）"""
+
+    def __init__(self, kind, added=None, modified=None, removed=None, day_mask=0, reset=False):
+        """
+        初期化
+
+        Args:
+            kind: 種別（"staff", "user", "vehicle"）
+            added: 追加されたIDのリスト
+            modified: 内容が変わったIDのリスト
+            removed: 削除されたIDのリスト
+            day_mask: 変更の影響を受ける曜日のビットマスク（変更前と変更後の曜日の和）
+            reset: 一覧全体が置き換えられた場合はTrue
+        """
+        self.kind = kind
+        self.added = added or []
+        self.modified = modified or []
+        self.removed = removed or []
+        self.day_mask = day_mask
+        self.reset = reset
+
+    def __bool__(self):
+        return bool(self.reset or self.added or self.modified or self.removed)
+
+    @property
+    def days(self):
+        """変更の影響を受ける曜日のリスト"""
+        return mask_to_days(self.day_mask)
+
+    def summary(self):
+        """表示用の要約"""
+        return f"追加 {len(self.added)} 件、変更 {len(self.modified)} 件、削除 {len(self.removed)} 件"
+
+class Repository:
+    """IDと曜日の索引付きでエンティティを保持するクラス"""
+
+    def __init__(self, kind, items=None, days_attr=None, data_store=None):
+        """
+        初期化
+
+        Args:
+            kind: ジャーナルに記録する種別（"staff", "user", "vehicle"）
+            items: 初期データのリスト
+            days_attr: 曜日のリストを持つ属性名（曜日の索引を作らない場合はNone）
+            data_store: 変更を記録する DataStore（記録しない場合はNone）
+        """
+        self.kind = kind
+        self.days_attr = days_attr
+        self.data_store = data_store
+        self._by_id = {}  # ID -> エンティティ（追加順）
+        self._masks = {}  # ID -> 曜日のビットマスク
+        self._by_day = {day: {} for day in WEEKDAYS}  # 曜日 -> {ID: エンティティ}（追加順）
+        self._items = None  # all() の結果のキャッシュ
+        self._listeners = []  # 変更を通知する関数
+        self.replace_all(items or [])
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def __contains__(self, entity_id):
+        return entity_id in self._by_id
+
+    # ---- 検索 ----
+
+    def all(self):
+        """すべてのエンティティのリスト（追加順、変更しないこと）"""
+        if self._items is None:
+            self._items = list(self._by_id.values())
+        return self._items
+
+    def get(self, entity_id):
+        """IDで検索（見つからない場合はNone）"""
+        return self._by_id.get(entity_id)
+
+    def on_day(self, day):
+        """指定した曜日のエンティティのリスト（追加順）"""
+        return list(self._by_day.get(day, {}).values())
+
+    def mask(self, entity_id):
+        """エンティティの曜日のビットマスク"""
+        return self._masks.get(entity_id, 0)
+
+    def matching_mask(self, mask):
+        """曜日のビットマスクと重なるエンティティのリスト"""
+        return [self._by_id[entity_id] for entity_id, m in self._masks.items() if m & mask]
+
+    # ---- 変更の通知 ----
+
+    def add_listener(self, listener):
+        """変更時に ChangeSet を受け取る関数を登録"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """登録した関数を解除"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, changes):
+        """登録された関数に変更を通知"""
+        if not changes:
+            return
+        for listener in list(self._listeners):
+            listener(changes)
+
+    def _affected_mask(self, mask):
+        """変更の影響を受ける曜日（曜日を持たない種別はすべての曜日）"""
+        return mask if self.days_attr else ALL_DAYS_MASK
+
+    # ---- 変更 ----
+
+    def _index(self, entity):
+        """エンティティを索引に追加"""
+        self._by_id[entity.id] = entity
+        if self.days_attr:
+            mask = days_to_mask(getattr(entity, self.days_attr))
+            self._masks[entity.id] = mask
+            for day, bit in WEEKDAY_BITS.items():
+                if mask & bit:
+                    self._by_day[day][entity.id] = entity
+
+    def _unindex(self, entity_id):
+        """エンティティを索引から削除"""
+        entity = self._by_id.pop(entity_id, None)
+        mask = self._masks.pop(entity_id, 0)
+        for day, bit in WEEKDAY_BITS.items():
+            if mask & bit:
+                self._by_day[day].pop(entity_id, None)
+        return entity
+
+    def add(self, entity):
+        """エンティティを追加"""
+        self._index(entity)
+        self._items = None
+        if self.data_store:
+            self.data_store.record_upsert(self.kind, entity)
+        self._notify(ChangeSet(self.kind, added=[entity.id],
+                               day_mask=self._affected_mask(self._masks.get(entity.id, 0))))
+
+    def update(self, entity):
+        """変更したエンティティの索引を更新（一覧の順序は変わらない）"""
+        if entity.id not in self._by_id:
+            self.add(entity)
+            return
+        old_mask = self._reindex_days(entity)
+        self._by_id[entity.id] = entity
+        self._items = None
+        if self.data_store:
+            self.data_store.record_upsert(self.kind, entity)
+        self._notify(ChangeSet(self.kind, modified=[entity.id],
+                               day_mask=self._affected_mask(old_mask | self._masks.get(entity.id, 0))))
+
+    def _reindex_days(self, entity, reorder=True):
+        """
+        エンティティの曜日の索引を差分で更新し、変更前の曜日のビットマスクを返す
+
+        Args:
+            reorder: 新しく加わった曜日の索引を追加順に並べ直すか
+                     （まとめて変更する場合は False にして、最後に _reorder_days を呼ぶ）
+        """
+        if not self.days_attr:
+            return 0
+        old_mask = self._masks.get(entity.id, 0)
+        new_mask = days_to_mask(getattr(entity, self.days_attr))
+        self._masks[entity.id] = new_mask
+        for day, bit in WEEKDAY_BITS.items():
+            if old_mask & bit and not new_mask & bit:
+                self._by_day[day].pop(entity.id, None)
+            elif new_mask & bit and not old_mask & bit:
+                self._by_day[day][entity.id] = entity
+        if reorder:
+            self._reorder_days(new_mask & ~old_mask)
+        return old_mask
+
+    def _reorder_days(self, mask):
+        """mask の曜日の索引を追加順に並べ直す"""
+        for day, bit in WEEKDAY_BITS.items():
+            if mask & bit:
+                index = self._by_day[day]
+                self._by_day[day] = {i: index[i] for i in self._by_id if i in index}
+
+    def delete(self, entity_id):
+        """IDで削除（削除したエンティティを返す。見つからない場合はNone）"""
+        mask = self._masks.get(entity_id, 0)
+        entity = self._unindex(entity_id)
+        if entity is None:
+            return None
+        self._items = None
+        if self.data_store:
+            self.data_store.record_delete(self.kind, entity_id)
+        self._notify(ChangeSet(self.kind, removed=[entity_id], day_mask=self._affected_mask(mask)))
+        return entity
+
+    def upsert_all(self, items, remove_missing=True, keep_ids=()):
+        """
+        IDで照合して一覧を items の内容にそろえる（インポート用）
+
+        内容が変わっていないエンティティには触れず、変わったものは既存のオブジェクトの
+        属性を書き換える（オブジェクトを置き換えないので、既存の参照はそのまま使える）。
+        変更はジャーナルに1件ずつ記録する。
+
+        Args:
+            items: 新しいエンティティのリスト
+            remove_missing: items にないエンティティを削除するか
+            keep_ids: items になくても削除しないID（インポートでエラーになった行など）
+
+        Returns:
+            ChangeSet
+        """
+        changes = ChangeSet(self.kind)
+        mask = 0
+        reorder_mask = 0  # 追加順に並べ直す必要のある曜日
+        incoming_ids = set()
+
+        for entity in items:
+            incoming_ids.add(entity.id)
+            existing = self._by_id.get(entity.id)
+            if existing is None:
+                self._index(entity)
+                changes.added.append(entity.id)
+                mask |= self._masks.get(entity.id, 0)
+                if self.data_store:
+                    self.data_store.record_upsert(self.kind, entity)
+                continue
+            if content_hash(existing) == content_hash(entity):
+                continue
+            for key, value in entity.to_dict().items():
+                if key != "id":
+                    setattr(existing, key, value)
+            old_mask = self._reindex_days(existing, reorder=False)
+            new_mask = self._masks.get(existing.id, 0)
+            mask |= old_mask | new_mask
+            reorder_mask |= new_mask & ~old_mask
+            changes.modified.append(existing.id)
+            if self.data_store:
+                self.data_store.record_upsert(self.kind, existing)
+
+        if remove_missing:
+            for entity_id in [i for i in self._by_id if i not in incoming_ids and i not in keep_ids]:
+                mask |= self._masks.get(entity_id, 0)
+                self._unindex(entity_id)
+                changes.removed.append(entity_id)
+                if self.data_store:
+                    self.data_store.record_delete(self.kind, entity_id)
+
+        self._reorder_days(reorder_mask)
+        if changes:
+            changes.day_mask = self._affected_mask(mask)
+            self._items = None
+            self._notify(changes)
+        return changes
+
+    def replace_all(self, items):
+        """すべてのエンティティを置き換える（ジャーナルには記録しない）"""
+        self._by_id = {}
+        self._masks = {}
+        self._by_day = {day: {} for day in WEEKDAYS}
+        for entity in items:
+            self._index(entity)
+        self._items = None
+        self._notify(ChangeSet(self.kind, reset=True, day_mask=ALL_DAYS_MASK))
@@ -0,0 +1,212 @@
+"""
+ルートの経路（道路に沿った線）のキャッシュ
+
+区間（出発地の住所, 到着地の住所, 時間帯）ごとに、経路の座標列を
+エンコード済みポリライン（Google Maps と同じ形式の文字列）としてJSONファイルに保存する。
+計画を作ったときにキャッシュにない区間だけをまとめて並列に取得しておき、
+地図やプレビュー、エクスポートはキャッシュから読むだけにする。
+
+    store = RouteGeometryStore(provider, "data/route_geometry_cache.json")
+    store.fill(routes, facility_address)          # キャッシュにない区間を取得
+    path = store.route_path(route, facility_address)  # [(緯度, 経度), ...]
+"""
+
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from data_store import atomic_write_json
+
+# 時間帯の区切り（分）。同じ区間でも時間帯によって経路が変わりうるので別に保存する
+BUCKET_MINUTES = 60
+
+# 区間を並列に取得するスレッド数
+MAX_WORKERS = 8
+
+def encode_polyline(points, precision=5):
+    """(緯度, 経度) のリストをエンコード済みポリラインの文字列に変換"""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_i, lng_i = int(round(lat * factor)), int(round(lng * factor))
+        for delta in (lat_i - prev_lat, lng_i - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(result)
+
+def decode_polyline(text, precision=5):
+    """エンコード済みポリラインの文字列を (緯度, 経度) のリストに変換"""
+    factor = 10 ** precision
+    points = []
+    index = lat = lng = 0
+    while index < len(text):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(text[index]) - 63
+                index += 1
+                value |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+    return points
+
+def path_length_km(points):
+    """座標列の長さ（km）"""
+    total = 0.0
+    for (lat1, lng1), (lat2, lng2) in zip(points, points[1:]):
+        p1, p2 = math.radians(lat1), math.radians(lat2)
+        a = (math.sin((p2 - p1) / 2) ** 2
+             + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+        total += 6371.0 * 2 * math.asin(math.sqrt(a))
+    return total
+
+def time_bucket(minutes, size=BUCKET_MINUTES):
+    """0時からの分数を時間帯の番号に変換（時刻が未設定の場合は-1）"""
+    return minutes // size if minutes is not None and minutes >= 0 else -1
+
+class RouteGeometryStore:
+    """区間ごとの経路をエンコード済みポリラインで保存するクラス"""
+
+    def __init__(self, provider, cache_file, bucket_minutes=BUCKET_MINUTES, max_workers=MAX_WORKERS):
+        """
+        初期化
+
+        Args:
+            provider: get_leg_geometry(出発地, 到着地) で座標列を返すプロバイダー（Noneの場合はキャッシュだけを使う）
+            cache_file: キャッシュファイルのパス
+            bucket_minutes: 時間帯の区切り（分）
+            max_workers: 区間を並列に取得するスレッド数
+        """
+        self.provider = provider
+        self.cache_file = cache_file
+        self.bucket_minutes = bucket_minutes
+        self.max_workers = max_workers
+        self.polylines = self._load()  # "出発地\t到着地\t時間帯" -> エンコード済みポリライン
+        self.fetches = 0  # プロバイダーに問い合わせた区間の数
+        self._decoded = {}  # キー -> 座標列（デコード結果のキャッシュ）
+        self._lock = threading.Lock()  # 取得とファイルへの保存を直列化
+
+    def _load(self):
+        """キャッシュファイルを読み込む"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"経路のキャッシュの読み込みに失敗しました: {e}")
+            return {}
+
+    def _key(self, origin, destination, minutes):
+        return f"{origin}\t{destination}\t{time_bucket(minutes, self.bucket_minutes)}"
+
+    def legs(self, route, facility_address):
+        """
+        ルートの区間のリスト（停車地点を時間順に結ぶ）
+
+        Returns:
+            (出発地の住所, 到着地の住所, 出発時刻の分数) のリスト
+        """
+        stops = sorted(route.stops, key=lambda x: x.time)
+        addresses = [stop.user.address if stop.user else facility_address for stop in stops]
+        return [(addresses[i], addresses[i + 1], stops[i].minutes)
+                for i in range(len(stops) - 1) if addresses[i] != addresses[i + 1]]
+
+    def get(self, origin, destination, minutes):
+        """区間の座標列（キャッシュにない場合はNone）"""
+        key = self._key(origin, destination, minutes)
+        points = self._decoded.get(key)
+        if points is None:
+            encoded = self.polylines.get(key)
+            if encoded is None:
+                return None
+            points = self._decoded[key] = decode_polyline(encoded)
+        return points
+
+    def missing_legs(self, routes, facility_address):
+        """キャッシュにない区間のリスト（重複を除く）"""
+        missing = {}
+        for route in routes:
+            for origin, destination, minutes in self.legs(route, facility_address):
+                key = self._key(origin, destination, minutes)
+                if key not in self.polylines and key not in missing:
+                    missing[key] = (origin, destination)
+        return missing
+
+    def fill(self, routes, facility_address):
+        """
+        ルートの区間のうち、キャッシュにないものをまとめて並列に取得して保存する
+
+        Returns:
+            新しく保存した区間の数
+        """
+        if self.provider is None:
+            return 0
+
+        with self._lock:
+            missing = self.missing_legs(routes, facility_address)
+            if not missing:
+                return 0
+
+            def fetch(item):
+                key, (origin, destination) = item
+                try:
+                    return key, self.provider.get_leg_geometry(origin, destination)
+                except Exception as e:
+                    print(f"経路の取得に失敗しました: {origin} -> {destination}: {e}")
+                    return key, None
+
+            added = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for key, points in executor.map(fetch, missing.items()):
+                    self.fetches += 1
+                    if points:
+                        self.polylines[key] = encode_polyline(points)
+                        added += 1
+
+            if added:
+                os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+                atomic_write_json(self.cache_file, self.polylines, indent=None)
+            return added
+
+    def route_path(self, route, facility_address, coordinates=None):
+        """
+        ルートの経路の座標列
+
+        キャッシュにない区間は、coordinates（住所 -> 座標）があれば直線で結ぶ。
+
+        Returns:
+            [(緯度, 経度), ...]
+        """
+        coordinates = coordinates or {}
+        path = []
+        for origin, destination, minutes in self.legs(route, facility_address):
+            points = self.get(origin, destination, minutes)
+            if points is None:
+                points = [coordinates[a] for a in (origin, destination) if a in coordinates]
+            if path and points and path[-1] == points[0]:
+                points = points[1:]
+            path.extend(points)
+        return path
+
+    def route_length_km(self, route, facility_address):
+        """ルートの走行距離（km）。キャッシュにない区間がある場合はNone"""
+        total = 0.0
+        for origin, destination, minutes in self.legs(route, facility_address):
+            points = self.get(origin, destination, minutes)
+            if points is None:
+                return None
+            total += path_length_km(points)
+        return total
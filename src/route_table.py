@@ -0,0 +1,200 @@
+"""
+ルートの列指向表現
+
+多数の週間計画を保存・集計するために、Route / RouteStop のオブジェクトを
+NumPyの構造化配列（ルート表と停車地点表）にまとめる。利用者・車両・職員は
+オブジェクトへの参照ではなくID表への添字で持ち、時刻は0時からの分数で持つ。
+
+    table = RouteTable.from_routes(routes)
+    data = table.to_dict()            # JSONに書き出せる形式
+    table = RouteTable.from_dict(data)
+    routes = table.to_routes(users_by_id, vehicles_by_id, staff_by_id)
+"""
+
+import io
+import numpy as np
+
+try:
+    from src.models import Route, RouteStop
+except ImportError:
+    from models import Route, RouteStop
+
+# ルート表（1行が1ルート）。stop_start, stop_count で停車地点表の範囲を指す
+ROUTE_DTYPE = np.dtype([
+    ("id", np.int32),
+    ("vehicle", np.int32),     # vehicle_ids への添字（-1はなし）
+    ("driver", np.int32),      # staff_ids への添字（-1はなし）
+    ("assistant", np.int32),   # staff_ids への添字（-1はなし）
+    ("date", np.int32),        # dates への添字
+    ("is_morning", np.bool_),
+    ("stop_start", np.int32),
+    ("stop_count", np.int32),
+])
+
+# 停車地点表（1行が1停車地点）
+STOP_DTYPE = np.dtype([
+    ("user", np.int32),        # user_ids への添字（-1は施設）
+    ("is_pickup", np.bool_),
+    ("minutes", np.int16),     # 0時からの分数（-1は未設定）
+])
+
+class _Interner:
+    """文字列IDを連番の添字に変換する"""
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self.index = {value: i for i, value in enumerate(self.values)}
+
+    def __call__(self, value):
+        if value is None:
+            return -1
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+class RouteTable:
+    """ルートと停車地点をNumPyの構造化配列で保持するクラス"""
+
+    def __init__(self, routes, stops, user_ids, vehicle_ids, staff_ids, dates):
+        self.routes = routes
+        self.stops = stops
+        self.user_ids = user_ids
+        self.vehicle_ids = vehicle_ids
+        self.staff_ids = staff_ids
+        self.dates = dates
+
+    def __len__(self):
+        return len(self.routes)
+
+    @property
+    def nbytes(self):
+        """配列部分のメモリ使用量（バイト）"""
+        return self.routes.nbytes + self.stops.nbytes
+
+    @classmethod
+    def from_routes(cls, routes):
+        """Routeのリストから作成"""
+        users, vehicles, staff, dates = _Interner(), _Interner(), _Interner(), _Interner()
+        route_array = np.empty(len(routes), dtype=ROUTE_DTYPE)
+        stop_array = np.empty(sum(len(route.stops) for route in routes), dtype=STOP_DTYPE)
+
+        position = 0
+        for i, route in enumerate(routes):
+            route_array[i] = (
+                route.id if route.id is not None else -1,
+                vehicles(route.vehicle.id if route.vehicle else None),
+                staff(route.driver.id if route.driver else None),
+                staff(route.assistant.id if route.assistant else None),
+                dates(route.date),
+                route.is_morning,
+                position,
+                len(route.stops),
+            )
+            for stop in route.stops:
+                stop_array[position] = (users(stop.user.id if stop.user else None), stop.is_pickup, stop.minutes)
+                position += 1
+
+        return cls(route_array, stop_array, users.values, vehicles.values, staff.values, dates.values)
+
+    @classmethod
+    def concatenate(cls, tables):
+        """複数の表（例: 週ごとの計画）を1つにまとめる"""
+        users, vehicles, staff, dates = _Interner(), _Interner(), _Interner(), _Interner()
+        route_parts, stop_parts = [], []
+        offset = 0
+        for table in tables:
+            routes = table.routes.copy()
+            stops = table.stops.copy()
+            for column, interner, values in (("vehicle", vehicles, table.vehicle_ids),
+                                             ("driver", staff, table.staff_ids),
+                                             ("assistant", staff, table.staff_ids),
+                                             ("date", dates, table.dates)):
+                remap = np.array([interner(value) for value in values] + [-1], dtype=np.int32)
+                routes[column] = remap[routes[column]]  # -1 は末尾の -1 に対応する
+            remap = np.array([users(value) for value in table.user_ids] + [-1], dtype=np.int32)
+            stops["user"] = remap[stops["user"]]
+            routes["stop_start"] += offset
+            offset += len(stops)
+            route_parts.append(routes)
+            stop_parts.append(stops)
+
+        return cls(
+            np.concatenate(route_parts) if route_parts else np.empty(0, dtype=ROUTE_DTYPE),
+            np.concatenate(stop_parts) if stop_parts else np.empty(0, dtype=STOP_DTYPE),
+            users.values, vehicles.values, staff.values, dates.values
+        )
+
+    def to_routes(self, users_by_id, vehicles_by_id, staff_by_id):
+        """Routeのリストに戻す（利用者・車両・職員はIDから解決する）"""
+        users = [users_by_id.get(user_id) for user_id in self.user_ids] + [None]
+        vehicles = [vehicles_by_id.get(vehicle_id) for vehicle_id in self.vehicle_ids] + [None]
+        staff = [staff_by_id.get(staff_id) for staff_id in self.staff_ids] + [None]
+        dates = list(self.dates) + [None]
+
+        stop_users = self.stops["user"].tolist()
+        stop_pickups = self.stops["is_pickup"].tolist()
+        stop_minutes = self.stops["minutes"].tolist()
+
+        routes = []
+        for row in self.routes.tolist():
+            route_id, vehicle, driver, assistant, date, is_morning, start, count = row
+            stops = []
+            for k in range(start, start + count):
+                stop = RouteStop.__new__(RouteStop)
+                stop.user = users[stop_users[k]]
+                stop.is_pickup = stop_pickups[k]
+                stop.minutes = stop_minutes[k]
+                stops.append(stop)
+            routes.append(Route(
+                id=route_id,
+                vehicle=vehicles[vehicle],
+                driver=staff[driver],
+                assistant=staff[assistant],
+                stops=stops,
+                date=dates[date],
+                is_morning=is_morning
+            ))
+        return routes
+
+    def to_dict(self):
+        """JSONに書き出せる辞書形式（列ごとのリスト）に変換"""
+        return {
+            "user_ids": self.user_ids,
+            "vehicle_ids": self.vehicle_ids,
+            "staff_ids": self.staff_ids,
+            "dates": self.dates,
+            "routes": {name: self.routes[name].tolist() for name in ROUTE_DTYPE.names},
+            "stops": {name: self.stops[name].tolist() for name in STOP_DTYPE.names},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict の逆変換"""
+        routes = np.empty(len(data["routes"]["id"]), dtype=ROUTE_DTYPE)
+        for name in ROUTE_DTYPE.names:
+            routes[name] = data["routes"][name]
+        stops = np.empty(len(data["stops"]["user"]), dtype=STOP_DTYPE)
+        for name in STOP_DTYPE.names:
+            stops[name] = data["stops"][name]
+        return cls(routes, stops, list(data["user_ids"]), list(data["vehicle_ids"]),
+                   list(data["staff_ids"]), list(data["dates"]))
+
+    def to_bytes(self):
+        """バイナリ形式（.npz）に変換"""
+        buffer = io.BytesIO()
+        np.savez(buffer, routes=self.routes, stops=self.stops,
+                 user_ids=np.array(self.user_ids, dtype=str),
+                 vehicle_ids=np.array(self.vehicle_ids, dtype=str),
+                 staff_ids=np.array(self.staff_ids, dtype=str),
+                 dates=np.array(self.dates, dtype=str))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """to_bytes の逆変換"""
+        with np.load(io.BytesIO(data)) as archive:
+            return cls(archive["routes"], archive["stops"],
+                       archive["user_ids"].tolist(), archive["vehicle_ids"].tolist(),
+                       archive["staff_ids"].tolist(), archive["dates"].tolist())
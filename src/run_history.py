@@ -0,0 +1,222 @@
+"""
+最適化の実行履歴
+
+送迎ルート最適化を実行するたびに、入力の規模、曜日・時間帯ごとの計算時間、
+目的関数値（移動時間の合計）、割り当てられなかった利用者数、距離キャッシュの
+ヒット率を data/run_history.jsonl に1行ずつ追記する。
+
+記録はCSVとPrometheusのtextfile形式（node exporterのtextfile collector用）で
+書き出せる。
+
+    python src/run_history.py --last 30
+    python src/run_history.py --csv history.csv --prometheus /var/lib/node_exporter/koredesougei.prom
+"""
+
+import collections
+import csv
+import datetime
+import json
+import os
+import uuid
+
+# CSVに出力する列（サブ問題ごとの内訳は subproblems 列にJSONで入れる）
+CSV_FIELDS = [
+    "run_id", "timestamp", "users", "staff", "vehicles", "subproblem_count",
+    "elapsed_seconds", "solve_seconds", "objective", "route_count",
+    "unserved_users", "api_calls", "cache_hits", "cache_misses", "cache_hit_ratio",
+    "subproblems",
+]
+
+METRIC_PREFIX = "koredesougei"
+
+def build_run_record(optimizer, users, staff, vehicles, routes, elapsed_seconds):
+    """
+    最適化1回分の記録を作成
+
+    Args:
+        optimizer: 最適化に使ったTransportOptimizer（subproblems と stats を参照）
+        users, staff, vehicles: 入力データ
+        routes: 最適化結果のルート
+        elapsed_seconds: 最適化全体の経過時間
+
+    Returns:
+        実行履歴のレコード（辞書）
+    """
+    subproblems = list(optimizer.subproblems)
+    stats = optimizer.stats
+    lookups = stats["cache_hits"] + stats["cache_misses"]
+
+    return {
+        "run_id": str(uuid.uuid4()),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "users": len(users),
+        "staff": len(staff),
+        "vehicles": len(vehicles),
+        "subproblem_count": len(subproblems),
+        "elapsed_seconds": round(elapsed_seconds, 4),
+        "solve_seconds": round(sum(p["solve_seconds"] for p in subproblems), 4),
+        "objective": sum(p["objective"] for p in subproblems),
+        "route_count": len(routes),
+        "unserved_users": sum(p["unserved_users"] for p in subproblems),
+        "api_calls": stats["api_calls"],
+        "cache_hits": stats["cache_hits"],
+        "cache_misses": stats["cache_misses"],
+        "cache_hit_ratio": round(stats["cache_hits"] / lookups, 4) if lookups else None,
+        "subproblems": subproblems,
+    }
+
+class RunHistoryStore:
+    """実行履歴をJSON Linesファイルに保存するクラス"""
+
+    def __init__(self, history_file):
+        self.history_file = history_file
+
+    def append(self, record):
+        """レコードを1件追記する"""
+        directory = os.path.dirname(self.history_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def iter_runs(self):
+        """古い順にレコードを返す（壊れた行は読み飛ばす）"""
+        if not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def recent(self, limit=30):
+        """直近 limit 件のレコード（古い順）"""
+        return list(collections.deque(self.iter_runs(), maxlen=limit))
+
+    def trend(self, metric, limit=30):
+        """
+        直近 limit 件の指標の推移
+
+        Args:
+            metric: レコードのキー（例: "solve_seconds", "objective", "unserved_users"）
+            limit: 件数
+
+        Returns:
+            (timestamp, 値) のリスト
+        """
+        return [(record["timestamp"], record.get(metric)) for record in self.recent(limit)]
+
+    def export_csv(self, filepath, limit=None):
+        """実行履歴をCSVに書き出す"""
+        records = self.recent(limit) if limit else list(self.iter_runs())
+        with open(filepath, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                row = dict(record)
+                row["subproblems"] = json.dumps(record.get("subproblems", []), ensure_ascii=False)
+                writer.writerow(row)
+        return filepath
+
+    def export_prometheus(self, filepath):
+        """
+        直近の実行結果をPrometheusのtextfile形式で書き出す
+
+        node exporterが書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える。
+        """
+        records = list(self.iter_runs())
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(format_prometheus(records[-1] if records else None, len(records)))
+        os.replace(tmp_path, filepath)
+        return filepath
+
+def _metric(lines, name, help_text, samples):
+    """1つのゲージ指標を書き出す（samples は (ラベル辞書, 値) のリスト）"""
+    lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+    for labels, value in samples:
+        if value is None:
+            continue
+        label_str = ""
+        if labels:
+            label_str = "{" + ",".join(
+                f'{key}="{str(val)}"' for key, val in labels.items()
+            ) + "}"
+        lines.append(f"{METRIC_PREFIX}_{name}{label_str} {value}")
+
+def format_prometheus(record, run_count):
+    """実行履歴のレコードをPrometheusのテキスト形式に変換"""
+    lines = []
+    _metric(lines, "runs_recorded", "Number of recorded planning runs.", [({}, run_count)])
+    if record is None:
+        return "\n".join(lines) + "\n"
+
+    timestamp = datetime.datetime.fromisoformat(record["timestamp"]).timestamp()
+    _metric(lines, "last_run_timestamp_seconds", "Time the last planning run finished.", [({}, timestamp)])
+    _metric(lines, "last_run_users", "Users in the last planning run.", [({}, record["users"])])
+    _metric(lines, "last_run_staff", "Staff in the last planning run.", [({}, record["staff"])])
+    _metric(lines, "last_run_vehicles", "Vehicles in the last planning run.", [({}, record["vehicles"])])
+    _metric(lines, "last_run_elapsed_seconds", "Wall time of the last planning run.",
+            [({}, record["elapsed_seconds"])])
+    _metric(lines, "last_run_solve_seconds", "Solver time of the last planning run.",
+            [({}, record["solve_seconds"])])
+    _metric(lines, "last_run_objective_seconds", "Total route travel time of the last planning run.",
+            [({}, record["objective"])])
+    _metric(lines, "last_run_unserved_users", "Users left without a route in the last planning run.",
+            [({}, record["unserved_users"])])
+    _metric(lines, "last_run_api_calls", "Distance API calls in the last planning run.",
+            [({}, record["api_calls"])])
+    _metric(lines, "last_run_cache_hit_ratio", "Distance cache hit ratio of the last planning run.",
+            [({}, record["cache_hit_ratio"])])
+
+    samples = {"solve_seconds": [], "objective": [], "unserved_users": []}
+    for subproblem in record.get("subproblems", []):
+        labels = {"day": subproblem["day"], "period": "morning" if subproblem["is_morning"] else "evening"}
+        for key in samples:
+            samples[key].append((labels, subproblem[key]))
+    _metric(lines, "last_run_subproblem_solve_seconds", "Solver time per day and period.",
+            samples["solve_seconds"])
+    _metric(lines, "last_run_subproblem_objective_seconds", "Route travel time per day and period.",
+            samples["objective"])
+    _metric(lines, "last_run_subproblem_unserved_users", "Unserved users per day and period.",
+            samples["unserved_users"])
+
+    return "\n".join(lines) + "\n"
+
+def default_history_file():
+    """既定の実行履歴ファイル（data/run_history.jsonl）"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "run_history.jsonl")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="最適化の実行履歴を表示・出力する")
+    parser.add_argument("--history", default=default_history_file(), help="実行履歴ファイル")
+    parser.add_argument("--last", type=int, default=30, help="表示する件数")
+    parser.add_argument("--csv", help="CSVの出力先")
+    parser.add_argument("--prometheus", help="Prometheus textfileの出力先")
+    args = parser.parse_args()
+
+    store = RunHistoryStore(args.history)
+
+    if args.csv:
+        store.export_csv(args.csv)
+        print(f"CSVを出力しました: {args.csv}")
+    if args.prometheus:
+        store.export_prometheus(args.prometheus)
+        print(f"Prometheus textfileを出力しました: {args.prometheus}")
+    if not args.csv and not args.prometheus:
+        for record in store.recent(args.last):
+            print(f"{record['timestamp']}  利用者 {record['users']:>5}  "
+                  f"計算 {record['solve_seconds']:>8.2f}秒  "
+                  f"移動時間 {record['objective'] / 60:>8.1f}分  "
+                  f"未割り当て {record['unserved_users']:>4}  "
+                  f"キャッシュヒット率 {record['cache_hit_ratio']}")
+
+if __name__ == "__main__":
+    main()
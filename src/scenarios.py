@@ -0,0 +1,225 @@
+"""
+車両・ドライバーの数を変えた場合の比較（シナリオの一括計算）
+
+車両を買う、ドライバーを増やす・減らすといった検討のために、車両の台数とドライバーの人数の
+組み合わせごとに1週間分のルートを作り、移動時間の合計や送迎できなかった利用者の数を表にする。
+距離行列は全利用者について1回だけ計算し、各シナリオは別のプロセスで並行に最適化する
+（各プロセスには最初に1回だけ行列を渡す）。
+
+    table = DistanceTable.build(store, [facility_address] + [u.address for u in users])
+    scenarios = scenario_grid(vehicle_counts=[3, 4, 5, 6], driver_deltas=[0, -1])
+    rows = run_scenarios(scenarios, table, facility_address, users, staff, vehicles, workdays)
+    print(format_table(rows))
+
+コマンドラインから、データディレクトリの内容で比較できる。
+
+    python src/scenarios.py --vehicles 3 4 5 6 --driver-deltas 0 -1 --csv 比較.csv
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from models import Staff, Vehicle
+
+# 表の列（キー, 見出し）
+COLUMNS = [
+    ("name", "シナリオ"),
+    ("vehicles", "車両"),
+    ("drivers", "ドライバー"),
+    ("routes", "ルート数"),
+    ("total_minutes", "移動時間の合計（分）"),
+    ("longest_minutes", "最長のルート（分）"),
+    ("unserved_users", "送迎できない利用者"),
+    ("seconds", "計算時間（秒）"),
+]
+
+class Scenario:
+    """車両の台数とドライバーの人数を変えた1つの条件"""
+
+    def __init__(self, name, vehicle_count=None, driver_delta=0, added_capacity=None):
+        """
+        初期化
+
+        Args:
+            name: シナリオの名前
+            vehicle_count: 使う車両の台数（Noneの場合はすべて。今の台数より多い場合は車両を追加する）
+            driver_delta: ドライバーの増減（負の場合は一覧の後ろのドライバーから外し、
+                          正の場合は全営業日に勤務するドライバーを追加する）
+            added_capacity: 追加する車両の定員（Noneの場合は今の車両の最大の定員）
+        """
+        self.name = name
+        self.vehicle_count = vehicle_count
+        self.driver_delta = driver_delta
+        self.added_capacity = added_capacity
+
+    def apply(self, staff, vehicles, workdays):
+        """
+        シナリオの職員と車両（元のリストは変更しない）
+
+        Returns:
+            (職員のリスト, 車両のリスト)
+        """
+        vehicles = list(vehicles)
+        if self.vehicle_count is not None:
+            capacity = self.added_capacity or max((v.capacity for v in vehicles), default=4)
+            for i in range(self.vehicle_count - len(vehicles)):
+                vehicles.append(Vehicle(id=f"scenario-vehicle-{i + 1}", name=f"追加車両{i + 1}", capacity=capacity))
+            vehicles = vehicles[:self.vehicle_count]
+
+        staff = list(staff)
+        if self.driver_delta < 0:
+            drivers = [s for s in staff if s.can_drive][self.driver_delta:]
+            removed = {id(s) for s in drivers}
+            staff = [s for s in staff if id(s) not in removed]
+        for i in range(self.driver_delta):
+            staff.append(Staff(id=f"scenario-driver-{i + 1}", name=f"追加ドライバー{i + 1}",
+                               can_drive=True, workdays=list(workdays)))
+        return staff, vehicles
+
+def scenario_grid(vehicle_counts=(None,), driver_deltas=(0,), added_capacity=None):
+    """
+    車両の台数とドライバーの増減のすべての組み合わせのシナリオ
+
+    Returns:
+        Scenario のリスト
+    """
+    scenarios = []
+    for vehicle_count in vehicle_counts:
+        for driver_delta in driver_deltas:
+            parts = ["車両 今のまま" if vehicle_count is None else f"車両{vehicle_count}台"]
+            if driver_delta:
+                parts.append(f"ドライバー{driver_delta:+d}人")
+            scenarios.append(Scenario("・".join(parts), vehicle_count, driver_delta, added_capacity))
+    return scenarios
+
+# ---- ワーカープロセス ----
+
+# プロセスごとに1回だけ受け取る入力（距離行列など）
+_worker_inputs = None
+
+def _init_worker(inputs):
+    """ワーカープロセスの初期化（入力をプロセスに保持する）"""
+    global _worker_inputs
+    _worker_inputs = inputs
+
+def _run_scenario(scenario, inputs=None):
+    """1つのシナリオの1週間分のルートを作り、比較の1行を返す"""
+    from optimizer import TransportOptimizer
+
+    table, facility_address, users, staff, vehicles, workdays, use_local_search = inputs or _worker_inputs
+    started = time.perf_counter()
+    staff, vehicles = scenario.apply(staff, vehicles, workdays)
+    optimizer = TransportOptimizer("", facility_address, use_local_search=use_local_search,
+                                   distance_store=table)
+    routes = []
+    for day in workdays:
+        day_users = [user for user in users if day in user.attendance_days]
+        for is_morning in (True, False):
+            routes.extend(optimizer.optimize_routes(day_users, vehicles, staff, day, is_morning))
+
+    longest = 0
+    for route in routes:
+        if route.stops:
+            minutes = [stop.minutes for stop in route.stops]
+            longest = max(longest, max(minutes) - min(minutes))
+    return {
+        "name": scenario.name,
+        "vehicles": len(vehicles),
+        "drivers": sum(1 for s in staff if s.can_drive),
+        "routes": len(routes),
+        "total_minutes": round(sum(p["objective"] for p in optimizer.subproblems) / 60, 1),
+        "longest_minutes": longest,
+        "unserved_users": sum(p["unserved_users"] for p in optimizer.subproblems),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def run_scenarios(scenarios, table, facility_address, users, staff, vehicles, workdays,
+                  workers=None, use_local_search=True):
+    """
+    シナリオごとに1週間分のルートを作って比較する
+
+    Args:
+        scenarios: Scenario のリスト
+        table: 施設と全利用者の住所を含む DistanceTable
+        facility_address: 施設の住所
+        users, staff, vehicles: 今のデータ
+        workdays: 営業日（曜日）のリスト
+        workers: 並行に計算するプロセスの数（Noneの場合はCPUの数。1の場合はこのプロセスで計算する）
+        use_local_search: TransportOptimizer の use_local_search
+
+    Returns:
+        シナリオの順の、比較の行（辞書）のリスト
+    """
+    inputs = (table, facility_address, list(users), list(staff), list(vehicles), list(workdays), use_local_search)
+    workers = min(workers or os.cpu_count() or 1, len(scenarios))
+    if workers <= 1:
+        return [_run_scenario(scenario, inputs) for scenario in scenarios]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs,)) as executor:
+        return list(executor.map(_run_scenario, scenarios))
+
+def format_table(rows):
+    """比較の行を、列をそろえたテキストの表にする"""
+    header = [title for key, title in COLUMNS]
+    lines = [[str(row[key]) for key, title in COLUMNS] for row in rows]
+    widths = [max(_width(cell) for cell in column) for column in zip(header, *lines)]
+
+    def format_line(cells):
+        return "  ".join(cell + " " * (width - _width(cell)) for cell, width in zip(cells, widths)).rstrip()
+
+    return "\n".join([format_line(header)] + [format_line(cells) for cells in lines])
+
+def _width(text):
+    """表示幅（全角文字は2文字分）"""
+    import unicodedata
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+def write_csv(rows, filepath):
+    """比較の行をCSVに書き出す（Excelで開けるようBOM付きのUTF-8）"""
+    import csv
+    with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([title for key, title in COLUMNS])
+        for row in rows:
+            writer.writerow([row[key] for key, title in COLUMNS])
+
+# ---- コマンドライン ----
+
+def main():
+    import argparse
+    from data_store import DataStore
+    from distance_provider import GoogleDistanceProvider
+    from distance_store import DistanceStore, DistanceTable
+    from planner import default_data_dir
+
+    parser = argparse.ArgumentParser(description="車両・ドライバーの数を変えた場合の比較")
+    parser.add_argument("--vehicles", type=int, nargs="+", help="車両の台数（省略時は今の台数）")
+    parser.add_argument("--driver-deltas", type=int, nargs="+", default=[0], help="ドライバーの増減（例: 0 -1）")
+    parser.add_argument("--added-capacity", type=int, help="追加する車両の定員（省略時は今の車両の最大の定員）")
+    parser.add_argument("--days", nargs="+", help="計算する曜日（省略時は営業日）")
+    parser.add_argument("--workers", type=int, help="並行に計算するプロセスの数（省略時はCPUの数）")
+    parser.add_argument("--csv", help="比較の表を書き出すCSVファイル")
+    parser.add_argument("--data-dir", default=default_data_dir(), help="データディレクトリ")
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir, background=False)
+    settings = store.load_settings() or {}
+    users = store.load_users() or []
+    facility_address = settings.get("facility_address", "")
+    workdays = args.days or settings.get("workdays", ["月", "火", "水", "木", "金", "土"])
+
+    distance_store = DistanceStore(GoogleDistanceProvider(settings.get("api_key", "")),
+                                   os.path.join(args.data_dir, "distance_matrix_cache.json"))
+    table = DistanceTable.build(distance_store, [facility_address] + [user.address for user in users])
+    distance_store.save()
+
+    scenarios = scenario_grid(args.vehicles or [None], args.driver_deltas, args.added_capacity)
+    started = time.perf_counter()
+    rows = run_scenarios(scenarios, table, facility_address, users, store.load_staff() or [],
+                         store.load_vehicles() or [], workdays, workers=args.workers)
+    print(format_table(rows))
+    print(f"\n{len(rows)} シナリオを {time.perf_counter() - started:.1f} 秒で計算しました")
+    if args.csv:
+        write_csv(rows, args.csv)
+
+if __name__ == "__main__":
+    main()
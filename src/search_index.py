@@ -0,0 +1,106 @@
+"""
+名前・住所の検索用の索引
+
+検索する文字列と検索語は同じ規則で正規化してから比較する。
+NFKC正規化で半角カナ・全角英数字をそろえ、カタカナはひらがなに、英字は小文字に変換し、
+空白は取り除く（「ﾔﾏﾀﾞ」「ヤマダ」「やまだ」、「１丁目」「1丁目」がそれぞれ一致する）。
+
+索引は正規化した文字列の1文字と2文字の部分文字列から、それを含むIDの集合を引く。
+検索語の2文字の部分文字列の集合の共通部分を候補とし、候補だけを実際の文字列と照合するので、
+件数が多くても検索語に一致しそうにない行は調べない。
+
+    index = SearchIndex()
+    index.add(user.id, user.name, user.address)
+    index.search("やまだ")  # 名前か住所に「やまだ」を含む利用者のIDの集合
+"""
+
+import unicodedata
+
+# カタカナ（ァ〜ヶ）をひらがなに変換する表
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+def normalize(text):
+    """検索用に文字列を正規化（NFKC、カタカナ→ひらがな、小文字、空白を除く）"""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = text.translate(_KATAKANA_TO_HIRAGANA).casefold()
+    return "".join(text.split())
+
+def _grams(text):
+    """文字列に含まれる1文字と2文字の部分文字列の集合"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+class SearchIndex:
+    """IDごとの文字列を部分一致で検索する索引"""
+
+    def __init__(self):
+        self._texts = {}  # ID -> 正規化した文字列
+        self._postings = {}  # 1〜2文字の部分文字列 -> IDの集合
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, entity_id, *fields):
+        """
+        IDの検索対象の文字列を登録する（登録済みの場合は置き換える）
+
+        Args:
+            entity_id: ID
+            fields: 検索対象の文字列（名前、住所など）
+        """
+        # 項目の境目をまたいで一致しないよう、区切りに改行を入れる（検索語には空白が残らない）
+        text = "\n".join(normalize(field) for field in fields)
+        if self._texts.get(entity_id) == text:
+            return
+        self.remove(entity_id)
+        self._texts[entity_id] = text
+        for gram in _grams(text):
+            self._postings.setdefault(gram, set()).add(entity_id)
+
+    def remove(self, entity_id):
+        """IDを索引から取り除く"""
+        text = self._texts.pop(entity_id, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(entity_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def clear(self):
+        """すべてのIDを取り除く"""
+        self._texts = {}
+        self._postings = {}
+
+    def search(self, query):
+        """
+        検索語を含むIDの集合
+
+        Returns:
+            IDの集合（検索語が空の場合はNone。絞り込まないことを表す）
+        """
+        query = normalize(query)
+        if not query:
+            return None
+
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = []
+        for gram in set(grams):
+            ids = self._postings.get(gram)
+            if not ids:
+                return set()
+            postings.append(ids)
+
+        # 件数の少ない集合から順に共通部分をとる
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        if len(query) <= 2:
+            return candidates
+        return {entity_id for entity_id in candidates if query in self._texts[entity_id]}
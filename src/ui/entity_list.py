@@ -0,0 +1,163 @@
+import tkinter as tk
+from search_index import SearchIndex, normalize
+
+class EntityList:
+    """
+    リポジトリの内容を表示するツリービューの一覧（検索による絞り込み付き）
+    
+    行はスクロールして末尾に近づいたときに PAGE_SIZE 行ずつ作成するので、
+    件数が多くても表示や絞り込みにかかる時間は最初の1ページ分だけになる。
+    リポジトリの変更（ChangeSet）は、変更された行だけに反映する。
+    """
+    
+    PAGE_SIZE = 200  # 一度に作成する行数
+    LOAD_MORE_AT = 0.9  # スクロール位置がこの割合を超えたら次の行を作成する
+    SEARCH_DELAY_MS = 150  # 入力が止まってから検索するまでの時間
+    
+    def __init__(self, tree, scrollbar, repository, row_values, search_fields,
+                 search_var=None, count_label=None):
+        """
+        初期化
+        
+        Args:
+            tree: 表示に使うツリービュー（行のIDはエンティティのID）
+            scrollbar: ツリービューの縦のスクロールバー
+            repository: 表示するエンティティの Repository
+            row_values: エンティティを行の値のタプルに変換する関数
+            search_fields: エンティティの検索対象の文字列のタプルを返す関数
+            search_var: 検索語を入力する StringVar（Noneの場合は検索しない）
+            count_label: 件数を表示するラベル
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.repository = repository
+        self.row_values = row_values
+        self.search_fields = search_fields
+        self.search_var = search_var
+        self.count_label = count_label
+        self.index = SearchIndex()
+        self.query = ""
+        self.ids = []  # 表示するエンティティのID（絞り込み後、一覧の順）
+        self.shown = set()  # ids と同じIDの集合
+        self.loaded = 0  # ids の先頭から、ツリービューに作成済みの行数
+        self._load_pending = False
+        self._search_after = None
+        
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        if search_var is not None:
+            search_var.trace_add("write", lambda *args: self.schedule_search())
+    
+    def reload(self):
+        """索引を作り直して一覧を表示し直す"""
+        self.index.clear()
+        for entity in self.repository.all():
+            self.index.add(entity.id, *self.search_fields(entity))
+        self.refresh()
+    
+    def refresh(self):
+        """検索語で絞り込んで、最初のページから表示し直す"""
+        matches = self.index.search(self.query)
+        self.ids = [entity.id for entity in self.repository.all()
+                    if matches is None or entity.id in matches]
+        self.shown = set(self.ids)
+        self.tree.delete(*self.tree.get_children())
+        self.loaded = 0
+        self.load_more()
+        self.tree.yview_moveto(0)
+        self.update_count()
+    
+    def load_more(self):
+        """まだ作成していない行を PAGE_SIZE 行作成する"""
+        self._load_pending = False
+        end = min(self.loaded + self.PAGE_SIZE, len(self.ids))
+        for entity_id in self.ids[self.loaded:end]:
+            entity = self.repository.get(entity_id)
+            self.tree.insert("", tk.END, iid=str(entity_id), values=self.row_values(entity))
+        self.loaded = end
+    
+    def on_scroll(self, first, last):
+        """スクロール位置が変わったとき（末尾に近づいたら次の行を作成する）"""
+        self.scrollbar.set(first, last)
+        if (float(last) >= self.LOAD_MORE_AT and self.loaded < len(self.ids)
+                and not self._load_pending):
+            self._load_pending = True
+            self.tree.after_idle(self.load_more)
+    
+    def schedule_search(self):
+        """入力が止まってから検索する"""
+        if self._search_after is not None:
+            self.tree.after_cancel(self._search_after)
+        self._search_after = self.tree.after(self.SEARCH_DELAY_MS, self.search)
+    
+    def search(self, query=None):
+        """検索語で絞り込む（Noneの場合は search_var の値）"""
+        self._search_after = None
+        if query is None:
+            query = self.search_var.get() if self.search_var is not None else ""
+        if query == self.query:
+            return
+        self.query = query
+        self.refresh()
+    
+    def update_count(self):
+        """件数の表示を更新"""
+        if self.count_label is None:
+            return
+        total = len(self.repository)
+        if not normalize(self.query):
+            self.count_label.config(text=f"{total} 件")
+        else:
+            self.count_label.config(text=f"{total} 件中 {len(self.ids)} 件")
+    
+    def _remove_ids(self, removed):
+        """表示中のIDを取り除く（作成済みの行も削除する）"""
+        removed = set(removed) & self.shown
+        if not removed:
+            return
+        rows = [str(entity_id) for entity_id in removed if self.tree.exists(str(entity_id))]
+        if rows:
+            self.tree.delete(*rows)
+        self.loaded -= len(rows)
+        self.ids = [entity_id for entity_id in self.ids if entity_id not in removed]
+        self.shown -= removed
+    
+    def apply_changes(self, changes):
+        """リポジトリの変更（ChangeSet）を一覧に反映"""
+        if changes.reset:
+            self.reload()
+            return
+        
+        self._remove_ids(changes.removed)
+        for entity_id in changes.removed:
+            self.index.remove(entity_id)
+        
+        for entity_id in changes.modified + changes.added:
+            entity = self.repository.get(entity_id)
+            if entity is not None:
+                self.index.add(entity_id, *self.search_fields(entity))
+        matches = self.index.search(self.query)
+        
+        def matched(entity_id):
+            return self.repository.get(entity_id) is not None and (matches is None or entity_id in matches)
+        
+        # 変更されて検索語に一致しなくなった行は消す
+        self._remove_ids([entity_id for entity_id in changes.modified if not matched(entity_id)])
+        for entity_id in changes.modified:
+            if entity_id in self.shown and self.tree.exists(str(entity_id)):
+                self.tree.item(str(entity_id), values=self.row_values(self.repository.get(entity_id)))
+            elif entity_id not in self.shown and matched(entity_id):
+                # 変更されて新しく検索語に一致した行は、一覧の順を保つため表示し直す
+                self.refresh()
+                return
+        
+        # 追加された行は末尾に加える（それより前の行をすべて作成済みの場合だけ行を作成する）
+        for entity_id in changes.added:
+            if entity_id in self.shown or not matched(entity_id):
+                continue
+            self.ids.append(entity_id)
+            self.shown.add(entity_id)
+            if self.loaded == len(self.ids) - 1:
+                self.tree.insert("", tk.END, iid=str(entity_id),
+                                 values=self.row_values(self.repository.get(entity_id)))
+                self.loaded += 1
+        self.update_count()
@@ -1,185 +1,280 @@
 import os
 import datetime
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Alignment, Border, Side, PatternFill, Font
-import uuid
-from models import Staff, User, Vehicle
+from excel_import import import_excel
+from profiling import profiler
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+# openpyxl は読み込みに時間がかかるため、起動時ではなく各エクスポート処理の中でインポートする
+
 class ExportManager:
     """送迎スケジュールをエクスポートするためのクラス"""
     
     def __init__(self, app):
         self.app = app
+        self.route_geometry = None  # 走行距離の計算に使う RouteGeometryStore（画面から設定する）
         self.export_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "exports")
         os.makedirs(self.export_dir, exist_ok=True)
     
-    def export_to_excel(self, routes):
-        """送迎スケジュールをExcelにエクスポート"""
+    # スケジュールのExcelで使う名前付きスタイル（セルごとにスタイルを作らず共有する）
+    SCHEDULE_STYLES = {
+        "schedule_title": {"font": {"size": 14, "bold": True}, "fill": "DDEBF7", "align": "center"},
+        "schedule_vehicle": {"font": {"bold": True}, "fill": "E2EFDA"},
+        "schedule_header": {"font": {"bold": True}, "fill": "F2F2F2", "align": "center"},
+    }
+    
+    # スケジュールのExcelの列幅（順番, 時間, 種別, 利用者, 住所, 備考）
+    SCHEDULE_COLUMN_WIDTHS = {"A": 8, "B": 12, "C": 8, "D": 20, "E": 40, "F": 30}
+    
+    def group_routes(self, routes):
+        """
+        ルートを (日付, 朝か夕方か) ごとに1回の走査でまとめる
+        
+        Returns:
+            ((日付, 朝か夕方か), ルートのリスト) のリスト。設定の営業日（曜日）の順、
+            曜日以外の日付（"2024-04-01" など）はその後に日付順で、同じ日付では朝が先
+        """
+        groups = {}
+        for route in routes:
+            groups.setdefault((route.date, route.is_morning), []).append(route)
+        
+        workdays = {day: i for i, day in enumerate(self.app.settings["workdays"])}
+        
+        def sort_key(key):
+            date, is_morning = key
+            if date in workdays:
+                return (0, workdays[date], "", not is_morning)
+            return (1, 0, str(date), not is_morning)
+        
+        # 曜日で表された日付は、設定の営業日に含まれるものだけを出力する
+        keys = [key for key in groups if key[0] in workdays or not self._is_weekday(key[0])]
+        return [(key, groups[key]) for key in sorted(keys, key=sort_key)]
+    
+    def _route_length_km(self, route):
+        """キャッシュ済みの経路から求めたルートの走行距離（km。分からない場合はNone）"""
+        if self.route_geometry is None:
+            return None
+        return self.route_geometry.route_length_km(route, self.app.settings.get("facility_address", ""))
+    
+    def _is_weekday(self, date):
+        """日付が曜日（"月" など）で表されているか"""
+        return date in ("月", "火", "水", "木", "金", "土", "日")
+    
+    def _day_label(self, date):
+        """シートの見出しに使う日付の表示"""
+        return f"{date}曜日" if self._is_weekday(date) else str(date)
+    
+    def _add_schedule_styles(self, wb):
+        """名前付きスタイルをワークブックに登録"""
+        from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+        
+        for name, spec in self.SCHEDULE_STYLES.items():
+            style = NamedStyle(name=name)
+            style.font = Font(**spec["font"])
+            style.fill = PatternFill(start_color=spec["fill"], end_color=spec["fill"], fill_type="solid")
+            if "align" in spec:
+                style.alignment = Alignment(horizontal=spec["align"])
+            wb.add_named_style(style)
+    
+    @profiler.timed("export.excel")
+    def export_to_excel(self, routes, filepath=None):
+        """
+        送迎スケジュールをExcelにエクスポート
+        
+        書き込み専用モードで1行ずつファイルに書き出すので、ルートが多くてもメモリ使用量は増えない。
+        UIを止めないよう、画面からはバックグラウンドのスレッドで呼び出す。
+        
+        Args:
+            routes: ルートのリスト
+            filepath: 出力先（Noneの場合はエクスポート用のディレクトリに日時付きの名前で保存）
+        """
         if not routes:
             return None
-            
-        # 新しいワークブックを作成
-        wb = Workbook()
-        
-        # 曜日ごとにシートを作成
-        for day in self.app.settings["workdays"]:
-            # 朝のルート
-            morning_routes = [r for r in routes if r.date == day and r.is_morning]
-            if morning_routes:
-                ws = wb.create_sheet(title=f"{day}_朝")
-                self._fill_excel_sheet(ws, morning_routes, day, True)
-            
-            # 夕方のルート
-            evening_routes = [r for r in routes if r.date == day and not r.is_morning]
-            if evening_routes:
-                ws = wb.create_sheet(title=f"{day}_夕")
-                self._fill_excel_sheet(ws, evening_routes, day, False)
         
-        # デフォルトシートを削除
-        if "Sheet" in wb.sheetnames:
-            del wb["Sheet"]
+        from openpyxl import Workbook
+        
+        # 書き込み専用のワークブックを作成
+        wb = Workbook(write_only=True)
+        self._add_schedule_styles(wb)
+        
+        # 日付・時間帯ごとにシートを作成
+        for (date, is_morning), group in self.group_routes(routes):
+            ws = wb.create_sheet(title=f"{date}_{'朝' if is_morning else '夕'}")
+            self._fill_excel_sheet(ws, group, date, is_morning)
         
         # ファイル名
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = os.path.join(self.export_dir, f"送迎スケジュール_{timestamp}.xlsx")
+        if filepath is None:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            filepath = os.path.join(self.export_dir, f"送迎スケジュール_{timestamp}.xlsx")
         
         # ファイルを保存
         wb.save(filepath)
         return filepath
     
+    @profiler.timed("export.excel_sheet")
     def _fill_excel_sheet(self, ws, routes, day, is_morning):
-        """Excelシートにデータを入力"""
+        """Excelシートにデータを入力（書き込み専用シートに上から順に行を追加する）"""
+        from openpyxl.cell import WriteOnlyCell
+        
         time_of_day = "朝" if is_morning else "夕方"
+        facility_address = self.app.settings.get("facility_address", "")
         
-        # ヘッダー
-        ws.merge_cells('A1:F1')
-        header_cell = ws['A1']
-        header_cell.value = f"{day}曜日 {time_of_day}の送迎スケジュール"
-        header_cell.font = Font(size=14, bold=True)
-        header_cell.alignment = Alignment(horizontal='center')
+        def styled_row(values, style):
+            row = []
+            for value in values:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style
+                row.append(cell)
+            return row
+        
+        # 列幅の調整（書き込み専用シートでは行を書く前に設定する）
+        for column, width in self.SCHEDULE_COLUMN_WIDTHS.items():
+            ws.column_dimensions[column].width = width
         
-        # ヘッダーの背景色
-        header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-        for cell in ws[1]:
-            cell.fill = header_fill
+        # ヘッダー
+        ws.append(styled_row([f"{self._day_label(day)} {time_of_day}の送迎スケジュール"] + [None] * 5, "schedule_title"))
+        ws.merged_cells.add("A1:F1")
+        ws.append([])
         
         # 各車両のルート
         row = 3
+        headers = ["順番", "時間", "種別", "利用者", "住所", "備考"]
         for route in routes:
             # 車両情報ヘッダー
-            ws.merge_cells(f'A{row}:F{row}')
-            vehicle_cell = ws[f'A{row}']
-            vehicle_cell.value = f"車両: {route.vehicle.name} （運転: {route.driver.name if route.driver else '未定'}, 同乗: {route.assistant.name if route.assistant else 'なし'}）"
-            vehicle_cell.font = Font(bold=True)
-            vehicle_cell.fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
+            vehicle_text = f"車両: {route.vehicle.name} （運転: {route.driver.name if route.driver else '未定'}, 同乗: {route.assistant.name if route.assistant else 'なし'}）"
+            length_km = self._route_length_km(route)
+            if length_km is not None:
+                vehicle_text += f" 走行距離: 約{length_km:.1f}km"
+            ws.append(styled_row([vehicle_text] + [None] * 5, "schedule_vehicle"))
+            ws.merged_cells.add(f"A{row}:F{row}")
             
             # カラムヘッダー
-            row += 1
-            headers = ["順番", "時間", "種別", "利用者", "住所", "備考"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = header
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-                cell.alignment = Alignment(horizontal='center')
+            ws.append(styled_row(headers, "schedule_header"))
+            row += 2
             
             # ルート詳細
             for i, stop in enumerate(route.stops):
-                row += 1
-                
-                # データの入力
-                ws.cell(row=row, column=1).value = i + 1  # 順番
-                ws.cell(row=row, column=2).value = stop.time  # 時間
-                ws.cell(row=row, column=3).value = "迎え" if stop.is_pickup else "送り"  # 種別
-                ws.cell(row=row, column=4).value = stop.user.name if stop.user else "施設"  # 利用者
-                ws.cell(row=row, column=5).value = stop.user.address if stop.user else self.app.settings.get("facility_address", "")  # 住所
-                
-                # 備考（利用者の特記事項）
-                if stop.user and hasattr(stop.user, 'notes') and stop.user.notes:
-                    ws.cell(row=row, column=6).value = stop.user.notes
+                user = stop.user
+                ws.append([
+                    i + 1,  # 順番
+                    stop.time,  # 時間
+                    "迎え" if stop.is_pickup else "送り",  # 種別
+                    user.name if user else "施設",  # 利用者
+                    user.address if user else facility_address,  # 住所
+                    getattr(user, 'notes', None) or None,  # 備考（利用者の特記事項）
+                ])
+            row += len(route.stops)
             
             # 空行を追加
-            row += 2
-        
-        # 列幅の調整
-        ws.column_dimensions['A'].width = 8  # 順番
-        ws.column_dimensions['B'].width = 12  # 時間
-        ws.column_dimensions['C'].width = 8  # 種別
-        ws.column_dimensions['D'].width = 20  # 利用者
-        ws.column_dimensions['E'].width = 40  # 住所
-        ws.column_dimensions['F'].width = 30  # 備考
+            ws.append([])
+            row += 1
+    
+    # テキストのエクスポートで、まとめて書き込む文字数の目安
+    TEXT_CHUNK_SIZE = 64 * 1024
     
-    def export_to_text(self, routes):
-        """送迎スケジュールをテキストにエクスポート（ChatGPTチェック用）"""
+    @profiler.timed("export.text")
+    def export_to_text(self, routes, filepath=None):
+        """
+        送迎スケジュールをテキストにエクスポート（ChatGPTチェック用）
+        
+        Args:
+            routes: ルートのリスト（複数週の日付ごとのルートでもよい）
+            filepath: 出力先（Noneの場合はエクスポート用のディレクトリに日時付きの名前で保存）
+        
+        Returns:
+            保存したファイルのパス（ルートがない場合はNone）
+        """
         if not routes:
             return None
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = os.path.join(self.export_dir, f"送迎スケジュール_ChatGPT用_{timestamp}.txt")
+        
+        if filepath is None:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            filepath = os.path.join(self.export_dir, f"送迎スケジュール_ChatGPT用_{timestamp}.txt")
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            # ヘッダー情報
-            f.write("# 送迎スケジュールチェックプロンプト\n\n")
-            f.write("以下の送迎スケジュールをチェックして、問題点や改善点があれば指摘してください。\n\n")
-            f.write("## 施設情報\n")
-            f.write(f"施設住所: {self.app.settings.get('facility_address', '未設定')}\n\n")
-            
-            # 各曜日のスケジュールを出力
-            f.write("## 送迎スケジュール詳細\n\n")
-            
-            for day in self.app.settings["workdays"]:
-                day_routes = [r for r in routes if r.date == day]
-                if day_routes:
-                    f.write(f"### {day}曜日\n\n")
-                    
-                    # 朝の送迎
-                    morning_routes = [r for r in day_routes if r.is_morning]
-                    if morning_routes:
-                        f.write("#### 朝の送迎\n\n")
-                        for route in morning_routes:
-                            self._write_route_text(f, route)
-                    
-                    # 夕方の送迎
-                    evening_routes = [r for r in day_routes if not r.is_morning]
-                    if evening_routes:
-                        f.write("#### 夕方の送迎\n\n")
-                        for route in evening_routes:
-                            self._write_route_text(f, route)
-            
-            # 分析の観点を追加
-            f.write("\n## チェックの観点\n")
-            f.write("1. 各車両の利用者数は適切か（過剰に多くないか）\n")
-            f.write("2. 各ルートの時間配分は適切か\n")
-            f.write("3. 地理的に効率的なルートになっているか\n")
-            f.write("4. 特記事項に対応できているか\n")
-            f.write("5. 運転手と同乗スタッフの配置は適切か\n")
-            f.write("6. 全体的な効率性と安全性のバランスは取れているか\n")
+            self.write_text(routes, f)
         
         return filepath
     
-    def _write_route_text(self, file, route):
-        """テキストファイルにルート情報を書き込む"""
-        file.write(f"* 車両: {route.vehicle.name} (乗車可能人数: {route.vehicle.capacity}人)\n")
-        file.write(f"* 運転手: {route.driver.name if route.driver else '未割り当て'}\n")
-        file.write(f"* 同乗スタッフ: {route.assistant.name if route.assistant else 'なし'}\n")
-        file.write("\n| 順番 | 時間 | 種別 | 利用者 | 住所 | 備考 |\n")
-        file.write("|------|------|------|--------|------|------|\n")
-        
-        for i, stop in enumerate(route.stops):
-            pickup_str = "迎え" if stop.is_pickup else "送り"
-            user_name = stop.user.name if stop.user else "施設"
-            address = stop.user.address if stop.user else self.app.settings.get("facility_address", "")
-            notes = stop.user.notes if stop.user and hasattr(stop.user, 'notes') else ""
-            
-            file.write(f"| {i+1} | {stop.time} | {pickup_str} | {user_name} | {address} | {notes} |\n")
+    def write_text(self, routes, stream):
+        """
+        送迎スケジュールのテキストを stream（ファイルや sys.stdout）に書き出す
+        
+        iter_text_lines の行を TEXT_CHUNK_SIZE 文字程度ずつまとめて書き込むので、
+        複数週のスケジュールでも全体を文字列として組み立てない。
+        """
+        chunk = []
+        size = 0
+        for line in self.iter_text_lines(routes):
+            chunk.append(line)
+            size += len(line)
+            if size >= self.TEXT_CHUNK_SIZE:
+                stream.write("".join(chunk))
+                chunk = []
+                size = 0
+        if chunk:
+            stream.write("".join(chunk))
+    
+    def iter_text_lines(self, routes):
+        """送迎スケジュールのテキストを1行ずつ（改行付きで）返す"""
+        facility_address = self.app.settings.get("facility_address", "")
+        
+        # ヘッダー情報
+        yield "# 送迎スケジュールチェックプロンプト\n\n"
+        yield "以下の送迎スケジュールをチェックして、問題点や改善点があれば指摘してください。\n\n"
+        yield "## 施設情報\n"
+        yield f"施設住所: {self.app.settings.get('facility_address', '未設定')}\n\n"
+        
+        # 日付・時間帯ごとのスケジュールを出力（ルートは1回の走査でまとめる）
+        yield "## 送迎スケジュール詳細\n\n"
+        
+        current_date = None
+        for (date, is_morning), group in self.group_routes(routes):
+            if date != current_date:
+                current_date = date
+                yield f"### {self._day_label(date)}\n\n"
+            yield "#### 朝の送迎\n\n" if is_morning else "#### 夕方の送迎\n\n"
+            for route in group:
+                yield from self._route_text_lines(route, facility_address)
         
-        file.write("\n")
+        # 分析の観点を追加
+        yield "\n## チェックの観点\n"
+        yield "1. 各車両の利用者数は適切か（過剰に多くないか）\n"
+        yield "2. 各ルートの時間配分は適切か\n"
+        yield "3. 地理的に効率的なルートになっているか\n"
+        yield "4. 特記事項に対応できているか\n"
+        yield "5. 運転手と同乗スタッフの配置は適切か\n"
+        yield "6. 全体的な効率性と安全性のバランスは取れているか\n"
+    
+    def _route_text_lines(self, route, facility_address):
+        """1ルート分のテキスト（車両情報と停車地点の表）を1行ずつ返す"""
+        yield f"* 車両: {route.vehicle.name} (乗車可能人数: {route.vehicle.capacity}人)\n"
+        yield f"* 運転手: {route.driver.name if route.driver else '未割り当て'}\n"
+        yield f"* 同乗スタッフ: {route.assistant.name if route.assistant else 'なし'}\n"
+        length_km = self._route_length_km(route)
+        if length_km is not None:
+            yield f"* 走行距離: 約{length_km:.1f}km\n"
+        yield "\n| 順番 | 時間 | 種別 | 利用者 | 住所 | 備考 |\n"
+        yield "|------|------|------|--------|------|------|\n"
+        
+        for i, stop in enumerate(route.stops, 1):
+            user = stop.user
+            if user:
+                # 特記事項（notes）は利用者のモデルにない場合がある
+                yield (f"| {i} | {stop.time} | {'迎え' if stop.is_pickup else '送り'} | {user.name} | "
+                       f"{user.address} | {getattr(user, 'notes', None) or ''} |\n")
+            else:
+                yield f"| {i} | {stop.time} | {'迎え' if stop.is_pickup else '送り'} | 施設 | {facility_address} |  |\n"
+        
+        yield "\n"
 
     # 職員、利用者、車両データのエクスポート機能
+    @profiler.timed("export.data_excel")
     def export_data_to_excel(self, data_type):
         """指定したデータ型（職員、利用者、車両）をExcelにエクスポートする"""
+        from openpyxl import Workbook
+        from openpyxl.styles import PatternFill, Font
+        
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if data_type == "staff":
@@ -297,138 +392,39 @@ class ExportManager:
         if not filepath:
             return False
         
+        names = {"staff": "職員", "user": "利用者", "vehicle": "車両"}
+        
         try:
-            # Excelファイルの読み込み
-            wb = load_workbook(filepath)
-            ws = wb.active
-            
-            # 既存データのバックアップ
-            if data_type == "staff":
-                original_data = self.app.staff_list.copy()
-            elif data_type == "user":
-                original_data = self.app.user_list.copy()
-            elif data_type == "vehicle":
-                original_data = self.app.vehicle_list.copy()
-            
-            # ヘッダー行を飛ばす
-            rows = list(ws.rows)
-            data_rows = rows[1:]  # 1行目（ヘッダー）をスキップ
-            
-            if data_type == "staff":
-                # 新しいデータリストを作成
-                new_data = []
-                
-                for row in data_rows:
-                    # IDは既存のものを保持するか、新規に生成する
-                    id_value = row[0].value if row[0].value else str(uuid.uuid4())
-                    name = row[1].value
-                    can_drive = True if row[2].value == "はい" else False
-                    workdays = [day.strip() for day in (row[3].value or "").split(",")] if row[3].value else []
-                    
-                    # 必須項目のチェック
-                    if not name:
-                        continue
-                    
-                    # 新しい職員オブジェクトを作成
-                    staff = Staff(
-                        id=id_value,
-                        name=name,
-                        can_drive=can_drive,
-                        workdays=workdays
-                    )
-                    new_data.append(staff)
-                
-                # データを更新
-                self.app.staff_list = new_data
-                
-            elif data_type == "user":
-                # 新しいデータリストを作成
-                new_data = []
-                
-                for row in data_rows:
-                    # IDは既存のものを保持するか、新規に生成する
-                    id_value = row[0].value if row[0].value else str(uuid.uuid4())
-                    name = row[1].value
-                    address = row[2].value
-                    pickup_time_morning = row[3].value or ""
-                    dropoff_time_morning = row[4].value or ""
-                    pickup_time_evening = row[5].value or ""
-                    dropoff_time_evening = row[6].value or ""
-                    constraints = row[7].value or ""
-                    attendance_days = [day.strip() for day in (row[8].value or "").split(",")] if row[8].value else []
-                    
-                    # 必須項目のチェック
-                    if not name or not address:
-                        continue
-                    
-                    # 新しい利用者オブジェクトを作成
-                    user = User(
-                        id=id_value,
-                        name=name,
-                        address=address,
-                        pickup_time_morning=pickup_time_morning,
-                        dropoff_time_morning=dropoff_time_morning,
-                        pickup_time_evening=pickup_time_evening,
-                        dropoff_time_evening=dropoff_time_evening,
-                        constraints=constraints,
-                        attendance_days=attendance_days
-                    )
-                    new_data.append(user)
-                
-                # データを更新
-                self.app.user_list = new_data
-                
-            elif data_type == "vehicle":
-                # 新しいデータリストを作成
-                new_data = []
-                
-                for row in data_rows:
-                    # IDは既存のものを保持するか、新規に生成する
-                    id_value = row[0].value if row[0].value else str(uuid.uuid4())
-                    name = row[1].value
-                    
-                    # 乗車可能人数
-                    try:
-                        capacity = int(row[2].value) if row[2].value else 0
-                    except (ValueError, TypeError):
-                        capacity = 0
-                    
-                    # 必須項目のチェック
-                    if not name or capacity <= 0:
-                        continue
-                    
-                    # 新しい車両オブジェクトを作成
-                    vehicle = Vehicle(
-                        id=id_value,
-                        name=name,
-                        capacity=capacity
-                    )
-                    new_data.append(vehicle)
-                
-                # データを更新
-                self.app.vehicle_list = new_data
-            
-            # 対応するフレームのリストを更新
-            if data_type == "staff" and hasattr(self.app, 'staff_frame'):
-                self.app.staff_frame.load_staff_list()
-            elif data_type == "user" and hasattr(self.app, 'user_frame'):
-                self.app.user_frame.load_user_list()
-            elif data_type == "vehicle" and hasattr(self.app, 'vehicle_frame'):
-                self.app.vehicle_frame.load_vehicle_list()
-            
-            # データを保存
-            self.app.save_all_data()
-            messagebox.showinfo("インポート完了", f"{data_type}データのインポートが完了しました。")
-            return True
-            
+            # Excelファイルの読み込みと検証（Read-onlyモードで1行ずつ読み込む）
+            with profiler.span("export.import_excel", data_type=data_type):
+                result = import_excel(filepath, data_type)
         except Exception as e:
-            # エラーが発生した場合は元のデータを復元
-            if data_type == "staff":
-                self.app.staff_list = original_data
-            elif data_type == "user":
-                self.app.user_list = original_data
-            elif data_type == "vehicle":
-                self.app.vehicle_list = original_data
-                
             messagebox.showerror("エラー", f"データのインポート中にエラーが発生しました: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+        
+        # エラーのある行があれば内容を表示し、それ以外の行を取り込むか確認する
+        if result.errors:
+            if not result.items:
+                messagebox.showerror("エラー", f"取り込める行がありませんでした。\n\n{result.error_summary()}")
+                return False
+            if not messagebox.askyesno(
+                "確認",
+                f"{len(result.errors)} 行にエラーがあります。\n\n{result.error_summary()}\n\n"
+                f"エラーのある行を除いた {len(result.items)} 件をインポートしますか？"
+            ):
+                return False
+        
+        # IDで照合して、追加・変更・削除された分だけを反映する（エラーになった行のデータは削除しない）
+        # （内容が同じ行は既存のオブジェクトをそのまま残すので、リストの表示やルートの計算結果も保たれる）
+        repository = {
+            "staff": self.app.staff_repository,
+            "user": self.app.user_repository,
+            "vehicle": self.app.vehicle_repository,
+        }[data_type]
+        changes = repository.upsert_all(result.items, keep_ids=result.skipped_ids)
+        
+        # データを保存（変更はジャーナルに記録済み）
+        self.app.save_all_data()
+        messagebox.showinfo("インポート完了",
+                            f"{names.get(data_type, data_type)}データをインポートしました。\n（{changes.summary()}）")
+        return True
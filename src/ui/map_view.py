@@ -2,204 +2,198 @@ import tkinter as tk
 from tkinter import ttk
 import webbrowser
 import os
-import json
 
 class MapView:
-    """Google Mapsを使用してルートを表示するクラス"""
+    """folium（Leaflet）の地図でルートを表示するクラス"""
+    
+    # 1日の地図でルートを塗り分ける色
+    ROUTE_COLORS = ["blue", "green", "purple", "orange", "darkred", "cadetblue",
+                    "darkgreen", "darkblue", "pink", "gray", "black"]
+    
+    # 停車地点がこの数を超える地図では、近くのマーカーをまとめて表示する
+    CLUSTER_THRESHOLD = 50
     
     def __init__(self, facility_address):
         self.facility_address = facility_address
         self.html_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "maps")
         os.makedirs(self.html_dir, exist_ok=True)
     
-    def create_map_for_route(self, route, api_key=None):
-        """ルートのマップを生成してブラウザで表示する"""
+    def create_map_for_route(self, route, geocoder, geometry=None):
+        """
+        ルートのマップを生成してブラウザで表示する
+        
+        座標と経路はキャッシュから読み込んでHTMLに埋め込むので、キャッシュ済みのルートでは
+        住所の検索や経路の計算のための通信は発生しない。
+        
+        Args:
+            route: 表示するルート
+            geocoder: 住所の座標を返す GeocodeCache
+            geometry: 区間の経路を返す RouteGeometryStore（Noneの場合は停車地点を直線で結ぶ）
+        """
         if not route.stops:
             return None
-            
+        
+        addresses = [self.facility_address] + [stop.user.address for stop in route.stops if stop.user]
+        coordinates = geocoder.lookup(addresses)
+        
         # HTMLファイルの作成
         filename = f"{route.date}_{route.is_morning}_{route.vehicle.name}.html".replace(" ", "_")
         filepath = os.path.join(self.html_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(self._generate_map_html(route, api_key))
+        self.create_day_map([route], route.date, route.is_morning, coordinates, filepath, geometry)
         
         # ブラウザでHTMLを開く
         webbrowser.open('file://' + os.path.realpath(filepath))
         return filepath
     
-    def _generate_map_html(self, route, api_key=None):
-        """Google Mapsを使用したHTMLを生成"""
-        # ルートの表示名（日付と時間帯）
-        time_of_day = "朝" if route.is_morning else "夕方"
-        route_title = f"{route.date}曜日 {time_of_day} - {route.vehicle.name}"
+    def create_overview_maps(self, routes, geocoder, geometry=None):
+        """
+        日付・時間帯ごとに、すべてのルートを1枚にまとめた地図を作成する（1週間分をまとめて作成）
         
-        # マーカーとウェイポイントの作成
-        waypoints = []
-        markers = []
+        座標は geocoder（GeocodeCache）から取得し、全日分の住所を1回で問い合わせる。
+        地図には座標と経路を埋め込むので、ブラウザで開くときに住所の検索や経路の計算は行わない。
         
-        # ルートの停留所を時間で並べ替え
-        sorted_stops = sorted(route.stops, key=lambda x: x.time)
+        Args:
+            routes: ルートのリスト
+            geocoder: 住所の座標を返す GeocodeCache
+            geometry: 区間の経路を返す RouteGeometryStore（Noneの場合は停車地点を直線で結ぶ）
         
-        for i, stop in enumerate(sorted_stops):
-            # 施設または利用者の住所
-            address = stop.user.address if stop.user else self.facility_address
-            label = stop.user.name if stop.user else "施設"
-            is_facility = stop.user is None
-            
-            if is_facility:
-                # 施設は始点と終点になる
-                icon_color = "red"
-            else:
-                # 利用者の場合
-                icon_color = "blue"
-            
-            waypoints.append(address)
+        Returns:
+            ({(日付, 朝か夕方か): HTMLファイルのパス}, 座標が分からなかった住所のリスト)
+        """
+        # ルートを (日付, 朝か夕方か) ごとに1回の走査でまとめる
+        groups = {}
+        for route in routes:
+            groups.setdefault((route.date, route.is_morning), []).append(route)
+        
+        addresses = [self.facility_address] + [stop.user.address for route in routes
+                                               for stop in route.stops if stop.user]
+        coordinates = geocoder.lookup(addresses)
+        missing = [address for address in dict.fromkeys(addresses) if address and address not in coordinates]
+        
+        paths = {}
+        for (date, is_morning), group in groups.items():
+            filename = f"overview_{date}_{'朝' if is_morning else '夕'}.html"
+            filepath = os.path.join(self.html_dir, filename)
+            self.create_day_map(group, date, is_morning, coordinates, filepath, geometry)
+            paths[(date, is_morning)] = filepath
+        return paths, missing
+    
+    def create_day_map(self, routes, date, is_morning, coordinates, filepath, geometry=None):
+        """
+        1つの日付・時間帯のすべてのルートを folium の地図に描いて保存する
+        
+        Args:
+            routes: その日付・時間帯のルートのリスト
+            date: 日付（曜日または "2024-04-01" など）
+            is_morning: 朝か夕方か
+            coordinates: {住所: (緯度, 経度)}
+            filepath: 保存先
+            geometry: 区間の経路を返す RouteGeometryStore（Noneの場合は停車地点を直線で結ぶ）
+        """
+        import folium
+        from folium.plugins import MarkerCluster
+        
+        day_label = f"{date}曜日" if date in ("月", "火", "水", "木", "金", "土", "日") else str(date)
+        if len(routes) == 1 and routes[0].vehicle:
+            title = f"{day_label} {'朝' if is_morning else '夕方'} - {routes[0].vehicle.name}"
+        else:
+            title = f"{day_label} {'朝' if is_morning else '夕方'}の送迎（{len(routes)} ルート）"
+        
+        # 地図の中心は施設（座標が分からない場合は停車地点の平均）
+        facility_point = coordinates.get(self.facility_address)
+        points = [coordinates[stop.user.address] for route in routes for stop in route.stops
+                  if stop.user and stop.user.address in coordinates]
+        if facility_point:
+            center = facility_point
+        elif points:
+            center = (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+        else:
+            center = (35.6812, 139.7671)  # 東京駅
+        
+        fmap = folium.Map(location=center, zoom_start=12, control_scale=True)
+        fmap.get_root().header.add_child(folium.Element(f"<title>{title}</title>"))
+        fmap.get_root().html.add_child(folium.Element(
+            f'<div style="position: fixed; top: 10px; left: 60px; z-index: 1000; background: white; '
+            f'padding: 4px 8px; border-radius: 4px; font-weight: bold;">{title}</div>'))
+        
+        if facility_point:
+            folium.Marker(facility_point, tooltip="施設", icon=folium.Icon(color="red", icon="home")).add_to(fmap)
+        
+        # 経路と停車地点は、それぞれ全ルート分を1つのGeoJSONにまとめる
+        # （folium はマーカーや線ごとにテンプレートを描画するため、要素の数を減らすと大幅に速くなる）
+        lines = []
+        stops = []
+        for i, route in enumerate(routes):
+            color = self.ROUTE_COLORS[i % len(self.ROUTE_COLORS)]
+            vehicle_name = route.vehicle.name if route.vehicle else f"ルート{i + 1}"
+            driver_name = route.driver.name if route.driver else "未割り当て"
             
-            # マーカー情報 - ここでは位置情報にインデックスではなく仮の座標を入れる
-            marker = {
-                "address": address,  # 住所をそのまま保持
-                "label": f"{i+1}",
-                "title": label,
-                "icon": f"https://maps.google.com/mapfiles/ms/icons/{icon_color}-dot.png"
-            }
-            markers.append(marker)
-        
-        # APIキーが設定されているかどうかのメッセージ
-        api_key_message = ""
-        if not api_key:
-            api_key_message = """
-            <div style="background-color: #ffe0e0; padding: 10px; margin-bottom: 10px; border-radius: 5px;">
-                <strong>注意:</strong> Google Maps APIキーが設定されていません。「設定」タブでAPIキーを設定してください。
-            </div>
-            """
-        
-        # HTMLテンプレート
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>{route_title}</title>
-            <style>
-                #map {{
-                    height: 800px;
-                    width: 100%;
-                }}
-                #info {{
-                    padding: 10px;
-                    background-color: #f5f5f5;
-                    margin-bottom: 10px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div id="info">
-                <h2>{route_title}</h2>
-                <p>運転手: {route.driver.name if route.driver else '未割り当て'}</p>
-                <p>同乗スタッフ: {route.assistant.name if route.assistant else 'なし'}</p>
-            </div>
-            {api_key_message}
-            <div id="map"></div>
+            path = self.route_path(route, coordinates, geometry)
+            if len(path) > 1:
+                lines.append({
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": [[lng, lat] for lat, lng in path]},
+                    "properties": {"label": f"{vehicle_name}（運転: {driver_name}）", "color": color},
+                })
             
-            <script>
-                // Google Maps APIのコールバック関数
-                function initMap() {{
-                    const directionsService = new google.maps.DirectionsService();
-                    const directionsRenderer = new google.maps.DirectionsRenderer({{
-                        suppressMarkers: true
-                    }});
-                    
-                    // マップの初期化
-                    const map = new google.maps.Map(document.getElementById("map"), {{
-                        zoom: 12,
-                        center: {{ lat: 35.6895, lng: 139.6917 }}, // 東京
-                    }});
-                    
-                    directionsRenderer.setMap(map);
-                    
-                    // マーカー情報とアドレス
-                    const markerInfo = {json.dumps(markers)};
-                    const addresses = markerInfo.map(m => m.address);
-                    
-                    // ジオコーディングを行う関数
-                    const geocoder = new google.maps.Geocoder();
-                    const geocodePromises = [];
-                    
-                    // 各アドレスのジオコーディングを非同期で実行
-                    const geocodeAddress = (address, index) => {{
-                        return new Promise((resolve, reject) => {{
-                            geocoder.geocode({{ 'address': address }}, (results, status) => {{
-                                if (status === 'OK') {{
-                                    resolve({{ index: index, location: results[0].geometry.location }});
-                                }} else {{
-                                    console.error('Geocode failed: ' + status + ' for address: ' + address);
-                                    // エラーの場合は東京駅の座標をデフォルトとして使用
-                                    resolve({{ index: index, location: {{ lat: 35.6812, lng: 139.7671 }} }});
-                                }}
-                            }});
-                        }});
-                    }};
-                    
-                    // 全てのアドレスをジオコーディング
-                    addresses.forEach((address, index) => {{
-                        geocodePromises.push(geocodeAddress(address, index));
-                    }});
-                    
-                    // 全てのジオコーディングが完了したら
-                    Promise.all(geocodePromises).then(locations => {{
-                        // マーカーの配置
-                        locations.forEach(loc => {{
-                            const idx = loc.index;
-                            const markerData = markerInfo[idx];
-                            // ここで正しい位置情報を使ってマーカーを作成
-                            const marker = new google.maps.Marker({{
-                                position: loc.location,  // ジオコードされた位置情報
-                                map: map,
-                                label: markerData.label,
-                                title: markerData.title,
-                                icon: markerData.icon
-                            }});
-                        }});
-                        
-                        // ルートの計算と表示
-                        if (locations.length > 1) {{
-                            const origin = locations[0].location;
-                            const destination = locations[locations.length - 1].location;
-                            
-                            // 始点と終点以外のウェイポイント
-                            const waypointsForRoute = locations.slice(1, locations.length - 1).map(loc => ({{
-                                location: loc.location,
-                                stopover: true
-                            }}));
-                            
-                            directionsService.route(
-                                {{
-                                    origin: origin,
-                                    destination: destination,
-                                    waypoints: waypointsForRoute,
-                                    optimizeWaypoints: false,
-                                    travelMode: google.maps.TravelMode.DRIVING,
-                                }},
-                                (response, status) => {{
-                                    if (status === "OK") {{
-                                        directionsRenderer.setDirections(response);
-                                    }} else {{
-                                        window.alert("ルートの取得に失敗しました: " + status);
-                                    }}
-                                }}
-                            );
-                        }}
-                    }}).catch(error => {{
-                        console.error('Error in geocoding promises:', error);
-                    }});
-                }}
-            </script>
-            <script async defer
-                src="https://maps.googleapis.com/maps/api/js?key={api_key or ''}&callback=initMap">
-            </script>
-        </body>
-        </html>
+            for stop in route.stops:
+                if not stop.user or stop.user.address not in coordinates:
+                    continue
+                lat, lng = coordinates[stop.user.address]
+                stops.append({
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lng, lat]},
+                    "properties": {
+                        "label": f"{stop.time} {stop.user.name}（{'迎え' if stop.is_pickup else '送り'}）",
+                        "address": stop.user.address,
+                        "vehicle": vehicle_name,
+                        "color": color,
+                    },
+                })
+        
+        def style(feature):
+            color = feature["properties"]["color"]
+            return {"color": color, "fillColor": color, "fillOpacity": 0.8, "weight": 4, "opacity": 0.8}
+        
+        if lines:
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": lines},
+                name="経路",
+                style_function=style,
+                tooltip=folium.GeoJsonTooltip(fields=["label"], labels=False),
+            ).add_to(fmap)
+        
+        if stops:
+            stop_layer = folium.GeoJson(
+                {"type": "FeatureCollection", "features": stops},
+                name="利用者",
+                marker=folium.CircleMarker(radius=7, fill=True),
+                style_function=style,
+                tooltip=folium.GeoJsonTooltip(fields=["label"], labels=False),
+                popup=folium.GeoJsonPopup(fields=["label", "address", "vehicle"], aliases=["利用者", "住所", "車両"]),
+            )
+            # 停車地点が多い場合は、近くのマーカーをまとめて表示する
+            if len(stops) > self.CLUSTER_THRESHOLD:
+                stop_layer.add_to(MarkerCluster(name="利用者").add_to(fmap))
+            else:
+                stop_layer.add_to(fmap)
+        
+        folium.LayerControl().add_to(fmap)
+        fmap.save(filepath)
+        return filepath
+    
+    def route_path(self, route, coordinates, geometry=None):
         """
+        ルートの経路の座標のリスト
         
-        return html 
\ No newline at end of file
+        geometry にキャッシュされた区間は道路に沿った経路、それ以外は停車地点を時間順に直線で結ぶ。
+        """
+        if geometry is not None:
+            return geometry.route_path(route, self.facility_address, coordinates)
+        path = []
+        for stop in sorted(route.stops, key=lambda x: x.time):
+            address = stop.user.address if stop.user else self.facility_address
+            point = coordinates.get(address)
+            if point:
+                path.append(point)
+        return path
@@ -0,0 +1,152 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+from ui.map_view import MapView
+
+class Projection:
+    """緯度・経度をキャンバス上の座標に変換するクラス（正距円筒図法、縦横比を保つ）"""
+    
+    def __init__(self, points, width, height, padding=20):
+        """
+        初期化
+        
+        Args:
+            points: 表示する (緯度, 経度) のリスト（すべてが収まるように縮尺を決める）
+            width: キャンバスの幅
+            height: キャンバスの高さ
+            padding: 余白
+        """
+        lats = [p[0] for p in points] or [0.0]
+        lngs = [p[1] for p in points] or [0.0]
+        self.north = max(lats)
+        self.west = min(lngs)
+        # 経度1度あたりの距離は緯度によって縮むので、中心の緯度で補正する
+        self.lng_scale = math.cos(math.radians((max(lats) + min(lats)) / 2))
+        span_x = max((max(lngs) - self.west) * self.lng_scale, 1e-6)
+        span_y = max(self.north - min(lats), 1e-6)
+        self.scale = min((width - 2 * padding) / span_x, (height - 2 * padding) / span_y)
+        # 余った幅・高さは両側に均等に割り振る（中央に表示する）
+        self.offset_x = (width - span_x * self.scale) / 2
+        self.offset_y = (height - span_y * self.scale) / 2
+    
+    def __call__(self, point):
+        """(緯度, 経度) をキャンバス上の (x, y) に変換"""
+        lat, lng = point
+        return (self.offset_x + (lng - self.west) * self.lng_scale * self.scale,
+                self.offset_y + (self.north - lat) * self.scale)
+
+class RoutePreview(ttk.Frame):
+    """ルートの簡易地図（キャッシュ済みの座標からキャンバスに描画する）"""
+    
+    PADDING = 20
+    STOP_RADIUS = 4
+    
+    def __init__(self, parent, facility_address=""):
+        super().__init__(parent)
+        self.facility_address = facility_address
+        self.routes = []  # 表示中の曜日・時間帯のルート
+        self.coordinates = {}  # 住所 -> (緯度, 経度)
+        self.selected = None  # 強調表示するルートの番号
+        self.geometry = None  # 区間の経路（RouteGeometryStore）
+        
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0, width=360)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.status_label = ttk.Label(self, foreground="gray")
+        self.status_label.pack(anchor=tk.W)
+        
+        # ウィンドウの大きさが変わったら描き直す
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+    
+    def show(self, routes, coordinates, selected=None, geometry=None):
+        """
+        ルートを表示する
+        
+        Args:
+            routes: 表示するルートのリスト（同じ曜日・時間帯のもの）
+            coordinates: 住所 -> (緯度, 経度)（キャッシュ済みのもの）
+            selected: 強調表示するルートの番号
+            geometry: 区間の経路を返す RouteGeometryStore（Noneの場合は停車地点を直線で結ぶ）
+        """
+        self.routes = list(routes)
+        self.coordinates = coordinates
+        self.selected = selected
+        self.geometry = geometry
+        self.redraw()
+    
+    def select(self, index):
+        """強調表示するルートを切り替える（描き直さずに線の太さだけを変える）"""
+        if index == self.selected:
+            return
+        if self.selected is not None:
+            self.canvas.itemconfigure(f"leg{self.selected}", width=2)
+        self.selected = index
+        if index is not None:
+            self.canvas.itemconfigure(f"leg{index}", width=5)
+            self.canvas.tag_raise(f"route{index}")
+            self.canvas.tag_raise("facility")
+    
+    def _address(self, stop):
+        """停車地点の住所（施設の場合は施設の住所）"""
+        return stop.user.address if stop.user else self.facility_address
+    
+    def redraw(self):
+        """表示中のルートを描き直す"""
+        canvas = self.canvas
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if not self.routes or width <= 1 or height <= 1:
+            self.status_label.config(text="")
+            return
+        
+        facility_point = self.coordinates.get(self.facility_address)
+        points = [facility_point] if facility_point else []
+        missing = 0
+        for route in self.routes:
+            for stop in route.stops:
+                point = self.coordinates.get(self._address(stop))
+                if point:
+                    points.append(point)
+                elif stop.user:
+                    missing += 1
+        if not points:
+            self.status_label.config(text="住所の位置が分かりません（「1日の地図」で位置を取得できます）")
+            return
+        
+        project = Projection(points, width, height, self.PADDING)
+        colors = MapView.ROUTE_COLORS
+        r = self.STOP_RADIUS
+        
+        for i, route in enumerate(self.routes):
+            color = colors[i % len(colors)]
+            tags = ("route", f"route{i}")
+            stops = sorted(route.stops, key=lambda x: x.time)
+        
+            # キャッシュ済みの区間は道路に沿った経路、それ以外は停車地点を時間順に直線で結ぶ
+            if self.geometry is not None:
+                path = [project(point) for point in
+                        self.geometry.route_path(route, self.facility_address, self.coordinates)]
+            else:
+                path = [project(self.coordinates[self._address(stop)]) for stop in stops
+                        if self._address(stop) in self.coordinates]
+            if len(path) > 1:
+                canvas.create_line(*[c for xy in path for c in xy], fill=color,
+                                   width=5 if i == self.selected else 2, tags=tags + (f"leg{i}",))
+        
+            for stop in stops:
+                if not stop.user or stop.user.address not in self.coordinates:
+                    continue
+                x, y = project(self.coordinates[stop.user.address])
+                canvas.create_oval(x - r, y - r, x + r, y + r, fill=color, outline="white", tags=tags)
+        
+        if facility_point:
+            x, y = project(facility_point)
+            canvas.create_rectangle(x - 6, y - 6, x + 6, y + 6, fill="red", outline="black", tags=("facility",))
+        
+        if self.selected is not None:
+            canvas.tag_raise(f"route{self.selected}")
+            canvas.tag_raise("facility")
+        
+        status = f"{len(self.routes)} ルート"
+        if missing:
+            status += f"（位置が分からない住所 {missing} 件は表示していません）"
+        self.status_label.config(text=status)
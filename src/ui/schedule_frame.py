@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import datetime
+import os
+import threading
+import time
 from models import Route
-from ui.map_view import MapView
-from ui.export_manager import ExportManager
+from profiling import profiler
+from run_history import build_run_record
 
 class ScheduleFrame(ttk.Frame):
     """送迎スケジュール画面"""
@@ -12,6 +15,10 @@ class ScheduleFrame(ttk.Frame):
         super().__init__(parent)
         self.app = app
         self.routes = []  # 計算されたルート
+        self.slot_routes = {}  # (曜日, 朝か夕方か) -> 表示するルートのリスト（self.routes の索引）
+        self.slot_views = {}  # (曜日, 朝か夕方か) -> 作成済みの表示（車両ごとのタブのノートブック）
+        self.planned_slots = {}  # (曜日, 朝か夕方か) -> その時間帯のルートのリスト（最適化結果のキャッシュ）
+        self.stale_slots = set()  # データの変更により再計算が必要な (曜日, 朝か夕方か)
         self.weekdays = ["月", "火", "水", "木", "金", "土"]
         self.weekday_index = 0  # 現在表示している曜日のインデックス
         self.selected_day = self.weekdays[self.weekday_index]  # 現在選択している曜日
@@ -19,11 +26,24 @@ class ScheduleFrame(ttk.Frame):
         
         # 地図表示用オブジェクト
         self.map_view = None
+        self.overview_maps = None  # (曜日, 朝か夕方か) -> 1日の地図のHTMLファイル（ルートが変わったら作り直す）
+        self.map_thread = None  # 実行中の1日の地図の作成
+        self.geocoder = None  # 住所の座標のキャッシュ（GeocodeCache）
+        self.geocode_thread = None  # 実行中の住所の検索（プレビュー用）
+        self.geocode_attempted = set()  # プレビューのために検索した住所（見つからなくても再検索しない）
+        self.route_geometry = None  # 区間の経路のキャッシュ（RouteGeometryStore）
+        self.geometry_thread = None  # 実行中の経路の取得
         
         # エクスポート管理用オブジェクト
         self.export_manager = None
+        self.export_thread = None  # 実行中のExcelエクスポート
         
         self.create_widgets()
+        
+        # 職員・利用者・車両が変わったら、影響を受ける曜日だけを再計算の対象にする
+        self.app.staff_repository.add_listener(self.on_data_changed)
+        self.app.user_repository.add_listener(self.on_data_changed)
+        self.app.vehicle_repository.add_listener(self.on_data_changed)
     
     def create_widgets(self):
         """ウィジェットの作成"""
@@ -62,6 +82,7 @@ class ScheduleFrame(ttk.Frame):
         
         # 地図表示ボタン
         ttk.Button(action_frame, text="地図表示", command=self.show_map).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="1日の地図", command=self.show_day_map).pack(side=tk.LEFT, padx=5)
         
         # エクスポートボタンフレーム
         export_frame = ttk.LabelFrame(action_frame, text="エクスポート", padding=5)
@@ -74,16 +95,29 @@ class ScheduleFrame(ttk.Frame):
         result_frame = ttk.LabelFrame(self, text="送迎スケジュール", padding=10)
         result_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # ツリービュー（車両ごとのタブを作成）
-        self.notebook = ttk.Notebook(result_frame)
-        self.notebook.pack(fill=tk.BOTH, expand=True)
+        # 左に車両ごとのタブ、右にルートのプレビュー
+        paned = ttk.PanedWindow(result_frame, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True)
+        
+        # 曜日・時間帯ごとの表示（車両ごとのタブのノートブック）を切り替えて表示する領域
+        self.view_container = ttk.Frame(paned)
+        paned.add(self.view_container, weight=3)
+        
+        # ルートのプレビュー（キャッシュ済みの座標から描画）
+        from ui.route_preview import RoutePreview
+        self.preview = RoutePreview(paned, self.app.settings.get("facility_address", ""))
+        paned.add(self.preview, weight=2)
         
-        # デフォルトのタブ（未計算時）
-        self.default_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.default_tab, text="スケジュールなし")
+        # デフォルトのタブ（未計算時、ルートがない時間帯）
+        self.default_view = ttk.Notebook(self.view_container)
+        self.default_tab = ttk.Frame(self.default_view)
+        self.default_view.add(self.default_tab, text="スケジュールなし")
         
         ttk.Label(self.default_tab, text="「送迎ルート最適化」ボタンをクリックして、\n送迎ルートを計算してください。", 
                   font=("", 12), justify=tk.CENTER).pack(expand=True)
+        
+        self.default_view.pack(fill=tk.BOTH, expand=True)
+        self.notebook = self.default_view  # 表示中のノートブック
     
     def prev_day(self):
         """前の曜日に移動"""
@@ -162,34 +196,53 @@ class ScheduleFrame(ttk.Frame):
                                     f"モジュール名: {getattr(e, 'name', 'unknown')}")
                 raise
             
-            self.routes = []  # 既存のルートをクリア
+            # 前回の結果があり、変更の影響を受けた時間帯だけが分かっている場合はそこだけ再計算する
+            slots = self.slots_to_plan()
+            started = time.perf_counter()
             
-            for day in self.weekdays:
-                # その日の利用者をフィルタリング
-                day_users = [u for u in self.app.user_list if day in u.attendance_days]
-                
-                if day_users:
-                    # 朝の送迎
-                    morning_routes = optimizer.optimize_routes(
-                        day_users, self.app.vehicle_list, self.app.staff_list, day, is_morning=True
-                    )
-                    self.routes.extend(morning_routes)
+            with profiler.span("schedule.optimize_all", users=len(self.app.user_list), slots=len(slots)):
+                for day in self.weekdays:
+                    # その日の利用者と職員（曜日の索引から取得）
+                    day_users = self.app.user_repository.on_day(day)
+                    day_staff = self.app.staff_repository.on_day(day)
                     
-                    # 夕方の送迎
-                    evening_routes = optimizer.optimize_routes(
-                        day_users, self.app.vehicle_list, self.app.staff_list, day, is_morning=False
-                    )
-                    self.routes.extend(evening_routes)
+                    # 朝と夕方の送迎
+                    for is_morning in (True, False):
+                        if (day, is_morning) not in slots:
+                            continue
+                        routes = []
+                        if day_users:
+                            with profiler.span("schedule.optimize_day", day=day, is_morning=is_morning, users=len(day_users)):
+                                routes = optimizer.optimize_routes(
+                                    day_users, self.app.vehicle_list, day_staff, day, is_morning=is_morning
+                                )
+                        self.planned_slots[(day, is_morning)] = routes
+            
+            self.stale_slots.clear()
+            self.overview_maps = None
+            self.routes = [route for day in self.weekdays for is_morning in (True, False)
+                           for route in self.planned_slots.get((day, is_morning), [])]
+            self.slot_routes = dict(self.planned_slots)
+            
+            # 再計算した時間帯の表示は作り直す
+            self.invalidate_views(slots)
+            
+            # APIの呼び出し回数とキャッシュヒット率を記録
+            profiler.emit_counters("schedule.optimize_all", optimizer_stats=optimizer.stats)
+            
+            # 実行履歴に記録
+            self.record_run_history(optimizer, time.perf_counter() - started)
             
             # マップビューの初期化
+            from ui.map_view import MapView
             self.map_view = MapView(self.app.settings.get("facility_address", ""))
             
-            # エクスポートマネージャーの初期化
-            self.export_manager = ExportManager(self.app)
-            
             # ルートの表示更新
             self.update_schedule_display()
             
+            # 地図とエクスポートで使う区間の経路を、バックグラウンドでまとめて取得しておく
+            self.fill_route_geometry()
+            
             messagebox.showinfo("成功", "送迎ルートの最適化が完了しました。")
             
         except ImportError as e:
@@ -205,25 +258,105 @@ class ScheduleFrame(ttk.Frame):
             progress_bar.stop()
             progress.destroy()
     
+    def slots_to_plan(self):
+        """
+        最適化する (曜日, 朝か夕方か) の集合
+        
+        前回の結果がない場合と、前回から変更がない場合（設定の変更などを反映するための再実行）はすべての時間帯、
+        それ以外は職員・利用者・車両の変更の影響を受けた時間帯だけ。
+        """
+        all_slots = {(day, is_morning) for day in self.weekdays for is_morning in (True, False)}
+        if not self.planned_slots or not self.stale_slots:
+            return all_slots
+        return self.stale_slots & all_slots
+    
+    def on_data_changed(self, changes):
+        """職員・利用者・車両の変更（ChangeSet）を受けて、影響を受ける時間帯を再計算の対象にする"""
+        if not self.planned_slots:
+            return
+        self.overview_maps = None
+        for day in changes.days:
+            self.stale_slots.add((day, True))
+            self.stale_slots.add((day, False))
+        
+        # 名前などの変更を反映するため、影響を受ける曜日の表示は作り直す
+        self.invalidate_views([slot for slot in self.slot_views if slot[0] in changes.days])
+        if self.selected_day in changes.days:
+            self.update_schedule_display()
+    
+    def invalidate_plans(self):
+        """すべての時間帯を再計算の対象にする（施設の住所などの設定を変えた場合）"""
+        self.planned_slots = {}
+        self.stale_slots.clear()
+        self.overview_maps = None
+        self.invalidate_views()
+        
+        # 施設の住所やAPIキーが変わった可能性があるので、座標のキャッシュも開き直す
+        self.geocoder = None
+        self.geocode_attempted.clear()
+        self.route_geometry = None
+        self.preview.facility_address = self.app.settings.get("facility_address", "")
+    
+    def record_run_history(self, optimizer, elapsed_seconds):
+        """最適化の結果を実行履歴に記録（失敗しても最適化結果には影響させない）"""
+        try:
+            record = build_run_record(optimizer, self.app.user_list, self.app.staff_list,
+                                      self.app.vehicle_list, self.routes, elapsed_seconds)
+            self.app.run_history.append(record)
+            
+            # 設定にPrometheus textfileの出力先があれば更新する
+            metrics_textfile = self.app.settings.get("metrics_textfile")
+            if metrics_textfile:
+                self.app.run_history.export_prometheus(metrics_textfile)
+        except Exception as e:
+            print(f"実行履歴の記録に失敗しました: {e}")
+    
+    def current_routes(self):
+        """表示中の曜日・時間帯のルートのリスト"""
+        return self.slot_routes.get((self.selected_day, self.is_morning), [])
+    
+    @profiler.timed("schedule.update_display")
     def update_schedule_display(self):
-        """スケジュール表示の更新"""
-        # タブをクリアして再作成
-        for tab in self.notebook.tabs():
-            self.notebook.forget(tab)
+        """
+        スケジュール表示の更新
         
-        # 現在の曜日と時間帯のルートをフィルタリング
-        current_routes = [r for r in self.routes 
-                          if r.date == self.selected_day and r.is_morning == self.is_morning]
+        曜日・時間帯ごとの表示は初めて表示するときに作成して保存しておき、
+        次からは表示を切り替えるだけにする（再計算やデータの変更で作り直す）。
+        """
+        slot = (self.selected_day, self.is_morning)
+        current_routes = self.current_routes()
         
         if not current_routes:
             # ルートがない場合はデフォルトタブを表示
-            self.notebook.add(self.default_tab, text="スケジュールなし")
-            return
+            view = self.default_view
+        else:
+            view = self.slot_views.get(slot)
+            if view is None:
+                view = self.slot_views[slot] = self._build_slot_view(current_routes)
+        
+        if view is not self.notebook:
+            if self.notebook is not None:
+                self.notebook.pack_forget()
+            view.pack(fill=tk.BOTH, expand=True)
+            self.notebook = view
+        
+        # プレビューを更新（位置が分からない住所はバックグラウンドで検索する）
+        self.preview.show(current_routes, self.get_geocoder().coordinates,
+                          selected=self.notebook.index("current") if current_routes else None,
+                          geometry=self.get_route_geometry())
+        self.geocode_for_preview(current_routes)
+    
+    @profiler.timed("schedule.build_view")
+    def _build_slot_view(self, routes):
+        """1つの曜日・時間帯の表示（車両ごとのタブのノートブック）を作成"""
+        notebook = ttk.Notebook(self.view_container)
+        notebook.bind("<<NotebookTabChanged>>", self.on_vehicle_tab_changed)
+        facility_address = self.app.settings.get("facility_address", "")
         
         # 車両ごとのタブを作成
-        for route in current_routes:
-            tab = ttk.Frame(self.notebook)
-            self.notebook.add(tab, text=f"{route.vehicle.name}")
+        for route in routes:
+            tab = ttk.Frame(notebook)
+            notebook.add(tab, text=f"{route.vehicle.name}")
             
             # タブ内のコンテンツ
             content_frame = ttk.Frame(tab, padding=10)
@@ -272,7 +405,7 @@ class ScheduleFrame(ttk.Frame):
                     i + 1,
                     stop.time,
                     stop.user.name if stop.user else "施設",
-                    stop.user.address if stop.user else self.app.settings.get("facility_address", ""),
+                    stop.user.address if stop.user else facility_address,
                     pickup_str
                 ))
             
@@ -280,6 +413,23 @@ class ScheduleFrame(ttk.Frame):
             scrollbar = ttk.Scrollbar(content_frame, orient=tk.VERTICAL, command=route_tree.yview)
             route_tree.configure(yscroll=scrollbar.set)
             scrollbar.place(relx=1, rely=0, relheight=1, anchor=tk.NE)
+        
+        return notebook
+    
+    def invalidate_views(self, slots=None):
+        """
+        作成済みの表示を破棄する（次に表示するときに作り直す）
+        
+        Args:
+            slots: 破棄する (曜日, 朝か夕方か) のイテラブル（Noneの場合はすべて）
+        """
+        for slot in list(self.slot_views) if slots is None else list(slots):
+            view = self.slot_views.pop(slot, None)
+            if view is None:
+                continue
+            if view is self.notebook:
+                self.notebook = None
+            view.destroy()
     
     def show_map(self):
         """現在表示中の曜日・時間帯のルートを地図表示"""
@@ -287,8 +437,7 @@ class ScheduleFrame(ttk.Frame):
             messagebox.showinfo("情報", "表示するルートがありません。まず「送迎ルート最適化」を実行してください。")
             return
         
-        current_routes = [r for r in self.routes 
-                          if r.date == self.selected_day and r.is_morning == self.is_morning]
+        current_routes = self.current_routes()
         
         if not current_routes:
             messagebox.showinfo("情報", f"{self.selected_day}曜日 {self.time_var.get()}の送迎ルートはありません。")
@@ -307,62 +456,217 @@ class ScheduleFrame(ttk.Frame):
     def show_map_for_route(self, route):
         """特定のルートを地図表示"""
         if not self.map_view:
+            from ui.map_view import MapView
             self.map_view = MapView(self.app.settings.get("facility_address", ""))
         
-        # APIキーの取得
+        # 住所の位置がキャッシュにない場合だけ、APIキーが必要になる
+        geocoder = self.get_geocoder()
+        addresses = [self.app.settings.get("facility_address", "")] + [
+            stop.user.address for stop in route.stops if stop.user]
         api_key = self.app.settings.get("api_key", "")
-        
-        # APIキーの警告表示
-        if not api_key:
+        if not api_key and any(geocoder.get(address) is None for address in addresses):
             if not messagebox.askyesno("警告", 
                 "Google Maps APIキーが設定されていません。\n"
-                "地図表示は機能しない可能性があります。\n\n"
+                "位置が分からない住所は地図に表示されません。\n\n"
                 "続行しますか？"):
                 return
-        else:
-            # APIキーの形式チェック
-            if not api_key.startswith("AIza"):
-                messagebox.showwarning("警告", 
-                    "Google Maps APIキーの形式が正しくない可能性があります。\n"
-                    "APIキーは通常「AIza」で始まります。\n"
-                    "また、以下の設定が必要です：\n"
-                    "1. Google Maps JavaScript API が有効\n"
-                    "2. Google Maps Geocoding API が有効\n"
-                    "3. Google Maps Directions API が有効\n"
-                    "4. APIキー制限が正しく設定されていること")
         
         try:
-            filepath = self.map_view.create_map_for_route(route, api_key)
-            if filepath:
-                messagebox.showinfo("地図表示", "ブラウザでルートマップを開きました。\n"
-                                           f"ファイルは {filepath} に保存されました。\n\n"
-                                           "注意: 地図が正しく表示されない場合は、以下を確認してください：\n"
-                                           "- APIキーが正しく設定されているか\n"
-                                           "- APIキーに必要な権限があるか\n"
-                                           "- ブラウザでJavaScriptが有効か")
-            else:
+            filepath = self.map_view.create_map_for_route(route, geocoder, self.get_route_geometry())
+            if not filepath:
                 messagebox.showwarning("警告", "ルートマップの作成に失敗しました。")
         except Exception as e:
             messagebox.showerror("エラー", f"地図表示中にエラーが発生しました: {str(e)}")
     
+    def get_geocoder(self):
+        """住所の座標のキャッシュ（地図とプレビューで共有する）"""
+        if self.geocoder is None:
+            from distance_provider import GoogleDistanceProvider
+            from geocode_cache import GeocodeCache
+            self.geocoder = GeocodeCache(GoogleDistanceProvider(self.app.settings.get("api_key", "")),
+                                         os.path.join(self.app.data_dir, "geocode_cache.json"))
+        return self.geocoder
+    
+    def get_route_geometry(self):
+        """区間の経路のキャッシュ（地図・プレビュー・エクスポートで共有する）"""
+        if self.route_geometry is None:
+            from distance_provider import GoogleDistanceProvider
+            from route_geometry import RouteGeometryStore
+            self.route_geometry = RouteGeometryStore(GoogleDistanceProvider(self.app.settings.get("api_key", "")),
+                                                     os.path.join(self.app.data_dir, "route_geometry_cache.json"))
+        return self.route_geometry
+    
+    def fill_route_geometry(self):
+        """計画したルートの区間のうち、キャッシュにないものをバックグラウンドでまとめて取得する"""
+        if not self.app.settings.get("api_key") or not self.routes:
+            return
+        if self.geometry_thread and self.geometry_thread.is_alive():
+            return
+        
+        geometry = self.get_route_geometry()
+        routes = list(self.routes)
+        facility_address = self.app.settings.get("facility_address", "")
+        result = {}
+        
+        def run():
+            result["added"] = geometry.fill(routes, facility_address)
+        
+        self.geometry_thread = threading.Thread(target=run, name="RouteGeometry", daemon=True)
+        self.geometry_thread.start()
+        self.after(100, self._check_route_geometry, result)
+    
+    def _check_route_geometry(self, result):
+        """経路の取得の完了を確認し、新しい経路があれば地図とプレビューに反映する"""
+        if self.geometry_thread and self.geometry_thread.is_alive():
+            self.after(100, self._check_route_geometry, result)
+            return
+        self.geometry_thread = None
+        if result.get("added"):
+            self.overview_maps = None
+            self.preview.redraw()
+    
+    def on_vehicle_tab_changed(self, event=None):
+        """車両のタブを切り替えたら、プレビューでそのルートを強調表示する"""
+        if event is not None and event.widget is not self.notebook:
+            return
+        if self.preview.routes and self.notebook.tabs():
+            self.preview.select(self.notebook.index("current"))
+    
+    def geocode_for_preview(self, routes):
+        """プレビューに表示するルートのうち、位置が分からない住所をバックグラウンドで検索する"""
+        if not self.app.settings.get("api_key") or (self.geocode_thread and self.geocode_thread.is_alive()):
+            return
+        
+        geocoder = self.get_geocoder()
+        addresses = [self.app.settings.get("facility_address", "")] + [
+            stop.user.address for route in routes for stop in route.stops if stop.user]
+        missing = [address for address in dict.fromkeys(addresses)
+                   if address and geocoder.get(address) is None and address not in self.geocode_attempted]
+        if not missing:
+            return
+        self.geocode_attempted.update(missing)
+        
+        self.geocode_thread = threading.Thread(target=geocoder.lookup, args=(missing,), name="PreviewGeocode", daemon=True)
+        self.geocode_thread.start()
+        self.after(100, self._check_geocode)
+    
+    def _check_geocode(self):
+        """住所の検索の完了を確認し、完了していればプレビューを描き直す"""
+        if self.geocode_thread and self.geocode_thread.is_alive():
+            self.after(100, self._check_geocode)
+            return
+        self.geocode_thread = None
+        self.preview.redraw()
+    
+    def show_day_map(self):
+        """現在表示中の曜日・時間帯のすべてのルートを1枚の地図で表示"""
+        if not self.routes:
+            messagebox.showinfo("情報", "表示するルートがありません。まず「送迎ルート最適化」を実行してください。")
+            return
+        
+        if self.overview_maps is not None:
+            self._open_day_map([])
+            return
+        
+        if self.map_thread and self.map_thread.is_alive():
+            messagebox.showinfo("情報", "地図を作成中です。完了までお待ちください。")
+            return
+        
+        if not self.map_view:
+            from ui.map_view import MapView
+            self.map_view = MapView(self.app.settings.get("facility_address", ""))
+        
+        geocoder = self.get_geocoder()
+        geometry = self.get_route_geometry()
+        
+        # 1週間分の地図をまとめてバックグラウンドで作成する（住所の検索は初回だけ）
+        routes = list(self.routes)
+        result = {}
+        
+        def run():
+            try:
+                result["paths"], result["missing"] = self.map_view.create_overview_maps(routes, geocoder, geometry)
+            except Exception as e:
+                result["error"] = e
+        
+        self.map_thread = threading.Thread(target=run, name="OverviewMaps", daemon=True)
+        self.map_thread.start()
+        self.after(100, self._check_day_maps, result)
+    
+    def _check_day_maps(self, result):
+        """1日の地図の作成の完了を確認し、完了していれば表示"""
+        if self.map_thread and self.map_thread.is_alive():
+            self.after(100, self._check_day_maps, result)
+            return
+        self.map_thread = None
+        
+        if "error" in result:
+            messagebox.showerror("エラー", f"地図の作成中にエラーが発生しました: {str(result['error'])}")
+            return
+        
+        self.overview_maps = result["paths"]
+        self.preview.redraw()
+        self._open_day_map(result["missing"])
+    
+    def _open_day_map(self, missing):
+        """作成済みの1日の地図をブラウザで開く"""
+        filepath = self.overview_maps.get((self.selected_day, self.is_morning))
+        if not filepath:
+            messagebox.showinfo("情報", f"{self.selected_day}曜日 {self.time_var.get()}の送迎ルートはありません。")
+            return
+        
+        if missing:
+            messagebox.showwarning("警告", f"{len(missing)} 件の住所の位置が分からないため、地図に表示していません。\n"
+                                         "設定タブでGoogle Maps APIキーを確認してください。")
+        
+        import webbrowser
+        webbrowser.open('file://' + os.path.realpath(filepath))
+    
     def export_to_excel(self):
-        """送迎スケジュールをExcelにエクスポート"""
+        """送迎スケジュールをExcelにエクスポート（バックグラウンドのスレッドで実行）"""
         if not self.routes:
             messagebox.showinfo("情報", "エクスポートするルートがありません。まず「送迎ルート最適化」を実行してください。")
             return
         
+        if self.export_thread and self.export_thread.is_alive():
+            messagebox.showinfo("情報", "Excelエクスポートを実行中です。完了までお待ちください。")
+            return
+        
         if not self.export_manager:
-            self.export_manager = ExportManager(self.app)
+            self.export_manager = self.app.export_manager
+        self.export_manager.route_geometry = self.get_route_geometry()
         
-        try:
-            filepath = self.export_manager.export_to_excel(self.routes)
-            if filepath:
-                if messagebox.askyesno("エクスポート完了", 
-                                      f"Excelファイルが保存されました。\n\nファイル: {filepath}\n\nファイルを開きますか？"):
-                    import os
-                    os.startfile(filepath)
-        except Exception as e:
-            messagebox.showerror("エラー", f"Excelエクスポート中にエラーが発生しました: {str(e)}")
+        # 実行中にルートが再計算されても影響しないよう、一覧をコピーして渡す
+        routes = list(self.routes)
+        result = {}
+        
+        def run_export():
+            try:
+                result["filepath"] = self.export_manager.export_to_excel(routes)
+            except Exception as e:
+                result["error"] = e
+        
+        self.export_thread = threading.Thread(target=run_export, name="ExcelExport", daemon=True)
+        self.export_thread.start()
+        self.after(100, self._check_excel_export, result)
+    
+    def _check_excel_export(self, result):
+        """Excelエクスポートの完了を確認し、完了していれば結果を表示"""
+        if self.export_thread and self.export_thread.is_alive():
+            self.after(100, self._check_excel_export, result)
+            return
+        self.export_thread = None
+        
+        if "error" in result:
+            messagebox.showerror("エラー", f"Excelエクスポート中にエラーが発生しました: {str(result['error'])}")
+            return
+        
+        filepath = result.get("filepath")
+        if filepath:
+            if messagebox.askyesno("エクスポート完了", 
+                                  f"Excelファイルが保存されました。\n\nファイル: {filepath}\n\nファイルを開きますか？"):
+                import os
+                os.startfile(filepath)
     
     def export_for_chat_gpt(self):
         """ChatGPTチェック用にテキスト形式でエクスポート"""
@@ -371,7 +675,8 @@ class ScheduleFrame(ttk.Frame):
             return
         
         if not self.export_manager:
-            self.export_manager = ExportManager(self.app)
+            self.export_manager = self.app.export_manager
+        self.export_manager.route_geometry = self.get_route_geometry()
         
         try:
             filepath = self.export_manager.export_to_text(self.routes)
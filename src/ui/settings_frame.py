@@ -104,4 +104,8 @@ class SettingsFrame(ttk.Frame):
         # 設定を保存
         self.app.save_all_data()
         
+        # 施設の住所や営業日が変わった可能性があるので、次回の最適化ではすべての時間帯を再計算する
+        if hasattr(self.app, 'schedule_frame'):
+            self.app.schedule_frame.invalidate_plans()
+        
         messagebox.showinfo("成功", "設定が保存されました。") 
\ No newline at end of file
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import uuid
+from ui.entity_list import EntityList
 from models import Staff
 
 class StaffFrame(ttk.Frame):
@@ -11,6 +12,9 @@ class StaffFrame(ttk.Frame):
         self.app = app
         self.create_widgets()
         self.load_staff_list()
+        
+        # 職員の追加・更新・削除・インポートを、変更された行だけリストに反映する
+        self.app.staff_repository.add_listener(self.on_staffs_changed)
     
     def create_widgets(self):
         """ウィジェットの作成"""
@@ -62,6 +66,16 @@ class StaffFrame(ttk.Frame):
         list_frame = ttk.LabelFrame(self, text="職員リスト", padding=10)
         list_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # 検索（かな・カナ、全角・半角を区別しない）
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(search_frame, text="名前で検索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var, width=25).pack(side=tk.LEFT, padx=5)
+        self.count_label = ttk.Label(search_frame, foreground="gray")
+        self.count_label.pack(side=tk.RIGHT)
+        
         # ツリービュー
         columns = ("id", "name", "can_drive", "workdays")
         self.staff_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
@@ -81,29 +95,29 @@ class StaffFrame(ttk.Frame):
         
         # スクロールバー
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.staff_tree.yview)
-        self.staff_tree.configure(yscroll=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # 行はスクロールに合わせて必要な分だけ作成する
+        self.staff_list_view = EntityList(self.staff_tree, scrollbar, self.app.staff_repository, self._staff_row,
+                                          lambda staff: (staff.name,),
+                                          search_var=self.search_var, count_label=self.count_label)
+        
         # 選択時のイベント
         self.staff_tree.bind("<<TreeviewSelect>>", self.on_staff_select)
     
+    def _staff_row(self, staff):
+        """ツリービューの1行分の値"""
+        workdays_str = ", ".join(staff.workdays)
+        can_drive_str = "はい" if staff.can_drive else "いいえ"
+        return (staff.id, staff.name, can_drive_str, workdays_str)
+    
     def load_staff_list(self):
-        """職員リストの読み込み"""
-        # ツリービューの中身をクリア
-        for item in self.staff_tree.get_children():
-            self.staff_tree.delete(item)
-        
-        # 職員リストをツリービューに追加
-        for staff in self.app.staff_list:
-            workdays_str = ", ".join(staff.workdays)
-            can_drive_str = "はい" if staff.can_drive else "いいえ"
-            
-            self.staff_tree.insert("", tk.END, values=(
-                staff.id,
-                staff.name,
-                can_drive_str,
-                workdays_str
-            ))
+        """職員リストの読み込み（検索の索引を作り直し、最初のページの行だけを作成する）"""
+        self.staff_list_view.reload()
+    
+    def on_staffs_changed(self, changes):
+        """職員の変更（ChangeSet）をリストに反映（変更された行と検索の索引だけを更新する）"""
+        self.staff_list_view.apply_changes(changes)
     
     def on_staff_select(self, event):
         """職員選択時の処理"""
@@ -115,18 +129,16 @@ class StaffFrame(ttk.Frame):
         item = selected_items[0]
         staff_id = self.staff_tree.item(item, "values")[0]
         
-        # 職員IDに一致する職員を検索
-        for staff in self.app.staff_list:
-            if str(staff.id) == str(staff_id):
-                # フォームに値を設定
-                self.name_var.set(staff.name)
-                self.can_drive_var.set(staff.can_drive)
-                
-                # 勤務曜日チェックボックスの設定
-                for day, var in self.workday_vars.items():
-                    var.set(day in staff.workdays)
-                
-                break
+        # 職員IDで検索
+        staff = self.app.staff_repository.get(staff_id)
+        if staff:
+            # フォームに値を設定
+            self.name_var.set(staff.name)
+            self.can_drive_var.set(staff.can_drive)
+            
+            # 勤務曜日チェックボックスの設定
+            for day, var in self.workday_vars.items():
+                var.set(day in staff.workdays)
     
     def get_selected_workdays(self):
         """選択された勤務曜日を取得"""
@@ -148,11 +160,8 @@ class StaffFrame(ttk.Frame):
             workdays=self.get_selected_workdays()
         )
         
-        # 職員リストに追加
-        self.app.staff_list.append(new_staff)
-        
-        # リストを更新
-        self.load_staff_list()
+        # 職員リストに追加（ジャーナルにも記録される）
+        self.app.staff_repository.add(new_staff)
         
         # フォームをクリア
         self.clear_form()
@@ -178,18 +187,15 @@ class StaffFrame(ttk.Frame):
             return
         
         # 職員の更新
-        for i, staff in enumerate(self.app.staff_list):
-            if str(staff.id) == str(staff_id):
-                # 職員情報を更新
-                staff.name = name
-                staff.can_drive = self.can_drive_var.get()
-                staff.workdays = self.get_selected_workdays()
-                
-                # リストを更新
-                self.load_staff_list()
-                
-                messagebox.showinfo("成功", f"職員「{name}」の情報が更新されました。")
-                break
+        staff = self.app.staff_repository.get(staff_id)
+        if staff:
+            # 職員情報を更新
+            staff.name = name
+            staff.can_drive = self.can_drive_var.get()
+            staff.workdays = self.get_selected_workdays()
+            self.app.staff_repository.update(staff)
+            
+            messagebox.showinfo("成功", f"職員「{name}」の情報が更新されました。")
     
     def delete_staff(self):
         """職員の削除"""
@@ -208,13 +214,7 @@ class StaffFrame(ttk.Frame):
             return
         
         # 職員の削除
-        for i, staff in enumerate(self.app.staff_list):
-            if str(staff.id) == str(staff_id):
-                del self.app.staff_list[i]
-                break
-        
-        # リストを更新
-        self.load_staff_list()
+        self.app.staff_repository.delete(staff_id)
         
         # フォームをクリア
         self.clear_form()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import uuid
+from ui.entity_list import EntityList
 from models import User
 
 class UserFrame(ttk.Frame):
@@ -11,6 +12,9 @@ class UserFrame(ttk.Frame):
         self.app = app
         self.create_widgets()
         self.load_user_list()
+        
+        # 利用者の追加・更新・削除・インポートを、変更された行だけリストに反映する
+        self.app.user_repository.add_listener(self.on_users_changed)
     
     def create_widgets(self):
         """ウィジェットの作成"""
@@ -95,6 +99,16 @@ class UserFrame(ttk.Frame):
         list_frame = ttk.LabelFrame(self, text="利用者リスト", padding=10)
         list_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # 検索（かな・カナ、全角・半角を区別しない）
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(search_frame, text="名前・住所で検索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var, width=25).pack(side=tk.LEFT, padx=5)
+        self.count_label = ttk.Label(search_frame, foreground="gray")
+        self.count_label.pack(side=tk.RIGHT)
+        
         # ツリービュー
         columns = ("id", "name", "address", "attendance_days")
         self.user_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
@@ -114,28 +128,28 @@ class UserFrame(ttk.Frame):
         
         # スクロールバー
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.user_tree.yview)
-        self.user_tree.configure(yscroll=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # 行はスクロールに合わせて必要な分だけ作成する
+        self.user_list_view = EntityList(self.user_tree, scrollbar, self.app.user_repository, self._user_row,
+                                         lambda user: (user.name, user.address),
+                                         search_var=self.search_var, count_label=self.count_label)
+        
         # 選択時のイベント
         self.user_tree.bind("<<TreeviewSelect>>", self.on_user_select)
     
+    def _user_row(self, user):
+        """ツリービューの1行分の値"""
+        attendance_days_str = ", ".join(user.attendance_days)
+        return (user.id, user.name, user.address, attendance_days_str)
+    
     def load_user_list(self):
-        """利用者リストの読み込み"""
-        # ツリービューの中身をクリア
-        for item in self.user_tree.get_children():
-            self.user_tree.delete(item)
-        
-        # 利用者リストをツリービューに追加
-        for user in self.app.user_list:
-            attendance_days_str = ", ".join(user.attendance_days)
-            
-            self.user_tree.insert("", tk.END, values=(
-                user.id,
-                user.name,
-                user.address,
-                attendance_days_str
-            ))
+        """利用者リストの読み込み（検索の索引を作り直し、最初のページの行だけを作成する）"""
+        self.user_list_view.reload()
+    
+    def on_users_changed(self, changes):
+        """利用者の変更（ChangeSet）をリストに反映（変更された行と検索の索引だけを更新する）"""
+        self.user_list_view.apply_changes(changes)
     
     def on_user_select(self, event):
         """利用者選択時の処理"""
@@ -147,23 +161,21 @@ class UserFrame(ttk.Frame):
         item = selected_items[0]
         user_id = self.user_tree.item(item, "values")[0]
         
-        # 利用者IDに一致する利用者を検索
-        for user in self.app.user_list:
-            if str(user.id) == str(user_id):
-                # フォームに値を設定
-                self.name_var.set(user.name)
-                self.address_var.set(user.address)
-                self.pickup_time_morning_var.set(user.pickup_time_morning)
-                self.dropoff_time_morning_var.set(user.dropoff_time_morning)
-                self.pickup_time_evening_var.set(user.pickup_time_evening)
-                self.dropoff_time_evening_var.set(user.dropoff_time_evening)
-                self.constraints_var.set(user.constraints)
-                
-                # 通所曜日チェックボックスの設定
-                for day, var in self.attendance_vars.items():
-                    var.set(day in user.attendance_days)
-                
-                break
+        # 利用者IDで検索
+        user = self.app.user_repository.get(user_id)
+        if user:
+            # フォームに値を設定
+            self.name_var.set(user.name)
+            self.address_var.set(user.address)
+            self.pickup_time_morning_var.set(user.pickup_time_morning)
+            self.dropoff_time_morning_var.set(user.dropoff_time_morning)
+            self.pickup_time_evening_var.set(user.pickup_time_evening)
+            self.dropoff_time_evening_var.set(user.dropoff_time_evening)
+            self.constraints_var.set(user.constraints)
+            
+            # 通所曜日チェックボックスの設定
+            for day, var in self.attendance_vars.items():
+                var.set(day in user.attendance_days)
     
     def get_selected_attendance_days(self):
         """選択された通所曜日を取得"""
@@ -195,11 +207,8 @@ class UserFrame(ttk.Frame):
             attendance_days=self.get_selected_attendance_days()
         )
         
-        # 利用者リストに追加
-        self.app.user_list.append(new_user)
-        
-        # リストを更新
-        self.load_user_list()
+        # 利用者リストに追加（ジャーナルにも記録される）
+        self.app.user_repository.add(new_user)
         
         # フォームをクリア
         self.clear_form()
@@ -230,23 +239,20 @@ class UserFrame(ttk.Frame):
             return
         
         # 利用者の更新
-        for i, user in enumerate(self.app.user_list):
-            if str(user.id) == str(user_id):
-                # 利用者情報を更新
-                user.name = name
-                user.address = address
-                user.pickup_time_morning = self.pickup_time_morning_var.get()
-                user.dropoff_time_morning = self.dropoff_time_morning_var.get()
-                user.pickup_time_evening = self.pickup_time_evening_var.get()
-                user.dropoff_time_evening = self.dropoff_time_evening_var.get()
-                user.constraints = self.constraints_var.get()
-                user.attendance_days = self.get_selected_attendance_days()
-                
-                # リストを更新
-                self.load_user_list()
-                
-                messagebox.showinfo("成功", f"利用者「{name}」の情報が更新されました。")
-                break
+        user = self.app.user_repository.get(user_id)
+        if user:
+            # 利用者情報を更新
+            user.name = name
+            user.address = address
+            user.pickup_time_morning = self.pickup_time_morning_var.get()
+            user.dropoff_time_morning = self.dropoff_time_morning_var.get()
+            user.pickup_time_evening = self.pickup_time_evening_var.get()
+            user.dropoff_time_evening = self.dropoff_time_evening_var.get()
+            user.constraints = self.constraints_var.get()
+            user.attendance_days = self.get_selected_attendance_days()
+            self.app.user_repository.update(user)
+            
+            messagebox.showinfo("成功", f"利用者「{name}」の情報が更新されました。")
     
     def delete_user(self):
         """利用者の削除"""
@@ -265,13 +271,7 @@ class UserFrame(ttk.Frame):
             return
         
         # 利用者の削除
-        for i, user in enumerate(self.app.user_list):
-            if str(user.id) == str(user_id):
-                del self.app.user_list[i]
-                break
-        
-        # リストを更新
-        self.load_user_list()
+        self.app.user_repository.delete(user_id)
         
         # フォームをクリア
         self.clear_form()
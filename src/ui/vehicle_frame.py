@@ -11,6 +11,9 @@ class VehicleFrame(ttk.Frame):
         self.app = app
         self.create_widgets()
         self.load_vehicle_list()
+        
+        # 車両の追加・更新・削除・インポートを、変更された行だけリストに反映する
+        self.app.vehicle_repository.add_listener(self.on_vehicles_changed)
     
     def create_widgets(self):
         """ウィジェットの作成"""
@@ -74,19 +77,37 @@ class VehicleFrame(ttk.Frame):
         # 選択時のイベント
         self.vehicle_tree.bind("<<TreeviewSelect>>", self.on_vehicle_select)
     
+    def _vehicle_row(self, vehicle):
+        """ツリービューの1行分の値"""
+        return (vehicle.id, vehicle.name, vehicle.capacity)
+    
     def load_vehicle_list(self):
         """車両リストの読み込み"""
         # ツリービューの中身をクリア
-        for item in self.vehicle_tree.get_children():
-            self.vehicle_tree.delete(item)
+        self.vehicle_tree.delete(*self.vehicle_tree.get_children())
         
-        # 車両リストをツリービューに追加
+        # 車両リストをツリービューに追加（行のIDは車両のID）
         for vehicle in self.app.vehicle_list:
-            self.vehicle_tree.insert("", tk.END, values=(
-                vehicle.id,
-                vehicle.name,
-                vehicle.capacity
-            ))
+            self.vehicle_tree.insert("", tk.END, iid=str(vehicle.id), values=self._vehicle_row(vehicle))
+    
+    def on_vehicles_changed(self, changes):
+        """車両の変更（ChangeSet）をリストに反映"""
+        if changes.reset:
+            self.load_vehicle_list()
+            return
+        
+        for vehicle_id in changes.removed:
+            if self.vehicle_tree.exists(str(vehicle_id)):
+                self.vehicle_tree.delete(str(vehicle_id))
+        
+        for vehicle_id in changes.modified + changes.added:
+            vehicle = self.app.vehicle_repository.get(vehicle_id)
+            if vehicle is None:
+                continue
+            if self.vehicle_tree.exists(str(vehicle_id)):
+                self.vehicle_tree.item(str(vehicle_id), values=self._vehicle_row(vehicle))
+            else:
+                self.vehicle_tree.insert("", tk.END, iid=str(vehicle_id), values=self._vehicle_row(vehicle))
     
     def on_vehicle_select(self, event):
         """車両選択時の処理"""
@@ -98,13 +119,12 @@ class VehicleFrame(ttk.Frame):
         item = selected_items[0]
         vehicle_id = self.vehicle_tree.item(item, "values")[0]
         
-        # 車両IDに一致する車両を検索
-        for vehicle in self.app.vehicle_list:
-            if str(vehicle.id) == str(vehicle_id):
-                # フォームに値を設定
-                self.name_var.set(vehicle.name)
-                self.capacity_var.set(vehicle.capacity)
-                break
+        # 車両IDで検索
+        vehicle = self.app.vehicle_repository.get(vehicle_id)
+        if vehicle:
+            # フォームに値を設定
+            self.name_var.set(vehicle.name)
+            self.capacity_var.set(vehicle.capacity)
     
     def add_vehicle(self):
         """車両の追加"""
@@ -129,11 +149,8 @@ class VehicleFrame(ttk.Frame):
             capacity=capacity
         )
         
-        # 車両リストに追加
-        self.app.vehicle_list.append(new_vehicle)
-        
-        # リストを更新
-        self.load_vehicle_list()
+        # 車両リストに追加（ジャーナルにも記録される）
+        self.app.vehicle_repository.add(new_vehicle)
         
         # フォームをクリア
         self.clear_form()
@@ -167,17 +184,14 @@ class VehicleFrame(ttk.Frame):
             return
         
         # 車両の更新
-        for i, vehicle in enumerate(self.app.vehicle_list):
-            if str(vehicle.id) == str(vehicle_id):
-                # 車両情報を更新
-                vehicle.name = name
-                vehicle.capacity = capacity
-                
-                # リストを更新
-                self.load_vehicle_list()
-                
-                messagebox.showinfo("成功", f"車両「{name}」の情報が更新されました。")
-                break
+        vehicle = self.app.vehicle_repository.get(vehicle_id)
+        if vehicle:
+            # 車両情報を更新
+            vehicle.name = name
+            vehicle.capacity = capacity
+            self.app.vehicle_repository.update(vehicle)
+            
+            messagebox.showinfo("成功", f"車両「{name}」の情報が更新されました。")
     
     def delete_vehicle(self):
         """車両の削除"""
@@ -196,13 +210,7 @@ class VehicleFrame(ttk.Frame):
             return
         
         # 車両の削除
-        for i, vehicle in enumerate(self.app.vehicle_list):
-            if str(vehicle.id) == str(vehicle_id):
-                del self.app.vehicle_list[i]
-                break
-        
-        # リストを更新
-        self.load_vehicle_list()
+        self.app.vehicle_repository.delete(vehicle_id)
         
         # フォームをクリア
         self.clear_form()